@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark for reading values with :meth:`maestral.config.user.UserConfig.get`.
+
+Measures the number of reads per second for options of different types, once with the
+cache of parsed values and once with the cache cleared before every read:
+
+    python benchmarks/config.py --reads 100000
+"""
+
+import argparse
+import os.path as osp
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from maestral.config.user import UserConfig
+
+
+DEFAULTS: List[Tuple[str, Dict[str, Any]]] = [
+    (
+        "sync",
+        {
+            "cursor": "AAGvR5J3Yx2L6mV8a3HzHqgDsE0Lq4",
+            "lastsync": 1626000000.123,
+            "keep_history": 604800,
+            "upload_errors": [f"/folder/file {i}.txt" for i in range(100)],
+        },
+    )
+]
+
+
+def measure(func: Callable[[], Any], n_reads: int) -> float:
+    """
+    Measures the throughput of ``func``.
+
+    :param func: Function to call.
+    :param n_reads: Number of calls.
+    :returns: Calls per second.
+    """
+
+    t0 = time.perf_counter()
+
+    for _ in range(n_reads):
+        func()
+
+    return n_reads / (time.perf_counter() - t0)
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--reads", type=int, default=100_000, help="Number of reads per option."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+
+        conf = UserConfig(osp.join(root, "benchmark.state"), defaults=DEFAULTS)
+
+        for option in DEFAULTS[0][1]:
+
+            def cached() -> None:
+                conf.get("sync", option)
+
+            def uncached() -> None:
+                conf._value_cache.clear()
+                conf.get("sync", option)
+
+            n_cached = measure(cached, args.reads)
+            n_uncached = measure(uncached, args.reads)
+
+            print(
+                f"{option:<16} cached {n_cached:>12.0f} reads/s   "
+                f"uncached {n_uncached:>12.0f} reads/s   "
+                f"speedup {n_cached / n_uncached:>6.1f}x"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for file status queries with :meth:`maestral.main.Maestral.get_file_status`
+and :meth:`maestral.main.Maestral.get_file_status_batch`.
+
+Creates a temporary configuration with an index of synced files, queued sync activity
+and sync errors and measures the number of status queries per second, once with one
+call per path and once with batched calls:
+
+    python benchmarks/file_status.py --files 10000 --activity 1000 --batch 500
+
+Calls are made in-process. When calling the daemon from another process, every call
+additionally requires a round trip over its socket, which batching also avoids.
+"""
+
+import argparse
+import os.path as osp
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+from dropbox.files import FileMetadata, FolderMetadata
+
+from maestral.main import Maestral
+from maestral.database import SyncEvent
+from maestral.errors import SyncError
+from maestral.config import remove_configuration
+
+
+CONFIG_NAME = "benchmark-file-status"
+
+
+def file_md(dbx_path: str) -> FileMetadata:
+    return FileMetadata(
+        name=osp.basename(dbx_path),
+        path_lower=dbx_path.lower(),
+        path_display=dbx_path,
+        id=f"id:{dbx_path}",
+        client_modified=datetime.utcnow(),
+        server_modified=datetime.utcnow(),
+        rev="a1c10ce0dd78",
+        size=100,
+    )
+
+
+def folder_md(dbx_path: str) -> FolderMetadata:
+    return FolderMetadata(
+        name=osp.basename(dbx_path),
+        path_lower=dbx_path.lower(),
+        path_display=dbx_path,
+        id=f"id:{dbx_path}",
+    )
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--files", type=int, default=10_000, help="Number of files in the index."
+    )
+    parser.add_argument(
+        "--activity", type=int, default=1000, help="Number of queued sync events."
+    )
+    parser.add_argument("--errors", type=int, default=100, help="Number of errors.")
+    parser.add_argument("--batch", type=int, default=500, help="Paths per batch.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+
+        m = Maestral(CONFIG_NAME)
+
+        try:
+            m.sync.dropbox_path = root
+            m.monitor.running.set()
+
+            dbx_paths = [f"/folder {i // 100}/file {i}.txt" for i in range(args.files)]
+            local_paths = [m.sync.to_local_path_from_cased(p) for p in dbx_paths]
+
+            for dbx_path in {osp.dirname(p) for p in dbx_paths}:
+                m.sync.update_index_from_dbx_metadata(folder_md(dbx_path))
+
+            for dbx_path in dbx_paths:
+                m.sync.update_index_from_dbx_metadata(file_md(dbx_path))
+
+            for dbx_path in dbx_paths[: args.activity]:
+                event = SyncEvent.from_dbx_metadata(file_md(dbx_path), m.sync)
+                m.sync.syncing.append(event)
+
+            for dbx_path in dbx_paths[-args.errors :]:
+                m.sync.sync_errors.add(SyncError("Error", "", dbx_path=dbx_path))
+
+            # Query paths in reverse order of insertion, including a path which is not
+            # in the index.
+            paths = local_paths[::-1] + [osp.join(root, "missing.txt")]
+
+            t0 = time.perf_counter()
+            single = [m.get_file_status(p) for p in paths]
+            t_single = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            batched: List[str] = []
+            for i in range(0, len(paths), args.batch):
+                batched += m.get_file_status_batch(paths[i : i + args.batch])
+            t_batch = time.perf_counter() - t0
+
+            assert single == batched
+
+            print(f"single   {len(paths) / t_single:>12.0f} queries/s")
+            print(f"batched  {len(paths) / t_batch:>12.0f} queries/s")
+            print(f"speedup  {t_single / t_batch:>12.1f}x")
+
+        finally:
+            m.monitor.running.clear()
+            remove_configuration(CONFIG_NAME)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
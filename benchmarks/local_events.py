@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the local event pipeline with synthetic watchdog event storms.
+
+Every scenario generates a stream of file system events of the given size and measures
+the throughput and peak memory usage of each stage that local events pass through
+before being uploaded:
+
+* ``is_ignored``: :meth:`maestral.sync.FSEventHandler._is_ignored` for every raw event
+* ``clean``: :meth:`maestral.sync.SyncEngine._clean_local_events`
+* ``convert``: :meth:`maestral.database.SyncEvent.from_file_system_event`
+* ``filter``: :meth:`maestral.sync.SyncEngine._filter_excluded_changes_local`
+
+Results can be saved as a baseline and later runs can be compared against it:
+
+    python benchmarks/local_events.py --save benchmarks/baselines/local_events.json
+    python benchmarks/local_events.py --compare benchmarks/baselines/local_events.json
+
+The comparison exits with a non-zero status if the throughput of any stage dropped or
+its peak memory usage increased by more than the given tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os.path as osp
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Any, Iterator
+
+from watchdog.events import (
+    FileSystemEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirMovedEvent,
+)
+
+from maestral.sync import SyncEngine, FSEventHandler, _Ignore
+from maestral.database import SyncEvent
+from maestral.client import DropboxClient
+from maestral.config import remove_configuration
+
+
+CONFIG_NAME = "benchmark-local-events"
+FILES_PER_FOLDER = 100
+N_IGNORED = 100
+
+
+# ==== synthetic event storms ==========================================================
+
+
+def _folder_paths(root: str, n: int) -> Iterator[str]:
+    """Yields ``n`` file paths, distributed over folders with 100 items each."""
+    for i in range(n):
+        yield f"{root}/folder {i // FILES_PER_FOLDER}/file {i}.txt"
+
+
+def mass_move(root: str, n: int) -> List[FileSystemEvent]:
+    """A folder tree with ``n`` items which is moved to a new location."""
+
+    n_folders = max(n // (FILES_PER_FOLDER + 1), 1)
+    events: List[FileSystemEvent] = [DirMovedEvent(f"{root}/src", f"{root}/dest")]
+
+    for i in range(n_folders):
+        events.append(
+            DirMovedEvent(f"{root}/src/folder {i}", f"{root}/dest/folder {i}")
+        )
+
+    for path in _folder_paths("", n - len(events)):
+        events.append(FileMovedEvent(f"{root}/src{path}", f"{root}/dest{path}"))
+
+    return events
+
+
+def mass_delete(root: str, n: int) -> List[FileSystemEvent]:
+    """A folder tree with ``n`` items which is deleted, children first."""
+
+    n_folders = max(n // (FILES_PER_FOLDER + 1), 1)
+    events: List[FileSystemEvent] = []
+
+    for path in _folder_paths(f"{root}/tree", n - n_folders - 1):
+        events.append(FileDeletedEvent(path))
+
+    for i in range(n_folders):
+        events.append(DirDeletedEvent(f"{root}/tree/folder {i}"))
+
+    events.append(DirDeletedEvent(f"{root}/tree"))
+
+    return events
+
+
+def safe_save(root: str, n: int) -> List[FileSystemEvent]:
+    """Editors which save to a temporary file and then replace the original."""
+
+    events: List[FileSystemEvent] = []
+
+    for path in _folder_paths(root, n // 5):
+        tmp_path = path + ".tmp"
+        backup_path = path + "~"
+        events.append(FileCreatedEvent(tmp_path))
+        events.append(FileModifiedEvent(tmp_path))
+        events.append(FileMovedEvent(path, backup_path))
+        events.append(FileMovedEvent(tmp_path, path))
+        events.append(FileDeletedEvent(backup_path))
+
+    return events
+
+
+def type_change(root: str, n: int) -> List[FileSystemEvent]:
+    """Files which are replaced by folders of the same name and vice versa."""
+
+    events: List[FileSystemEvent] = []
+
+    for i, path in enumerate(_folder_paths(root, n // 2)):
+        if i % 2 == 0:
+            events.append(FileDeletedEvent(path))
+            events.append(DirCreatedEvent(path))
+        else:
+            events.append(DirDeletedEvent(path))
+            events.append(FileCreatedEvent(path))
+
+    return events
+
+
+SCENARIOS: Dict[str, Callable[[str, int], List[FileSystemEvent]]] = {
+    "mass_move": mass_move,
+    "mass_delete": mass_delete,
+    "safe_save": safe_save,
+    "type_change": type_change,
+}
+
+
+# ==== measurements ====================================================================
+
+
+def measure(func: Callable[[], Any], n_items: int, repeat: int) -> Dict[str, float]:
+    """
+    Measures the best wall time of ``func`` over ``repeat`` runs and its peak memory
+    usage in a separate run with tracemalloc enabled.
+
+    :param func: Function to benchmark.
+    :param n_items: Number of items processed per call, used to compute throughput.
+    :param repeat: Number of timed runs.
+    :returns: Dictionary with the time in sec, the throughput in items per sec and the
+        peak memory usage in MB.
+    """
+
+    timings = []
+
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+
+    return dict(
+        time=round(best, 4),
+        throughput=round(n_items / best if best > 0 else float("inf"), 1),
+        peak_mb=round(peak / 1e6, 2),
+    )
+
+
+def run_scenario(
+    sync: SyncEngine, name: str, n: int, repeat: int
+) -> Dict[str, Dict[str, float]]:
+    """
+    Runs all stages of the local event pipeline for one scenario.
+
+    :param sync: SyncEngine instance to use.
+    :param name: Name of the scenario.
+    :param n: Number of events to generate.
+    :param repeat: Number of timed runs per stage.
+    :returns: Results for every stage.
+    """
+
+    events = SCENARIOS[name](sync.dropbox_path, n)
+
+    handler = FSEventHandler()
+
+    for i in range(N_IGNORED):
+        ignored = DirCreatedEvent(f"{sync.dropbox_path}/ignored {i}")
+        ignore = _Ignore(ignored, time.time(), ttl=None, recursive=bool(i % 2))
+        handler._ignored_events.add(ignore)
+
+    def is_ignored() -> None:
+        for event in events:
+            handler._is_ignored(event)
+
+    cleaned = sync._clean_local_events(events)
+    sync_events = [SyncEvent.from_file_system_event(e, sync) for e in cleaned]
+
+    results = dict(
+        is_ignored=measure(is_ignored, len(events), repeat),
+        clean=measure(lambda: sync._clean_local_events(events), len(events), repeat),
+        convert=measure(
+            lambda: [SyncEvent.from_file_system_event(e, sync) for e in cleaned],
+            len(cleaned),
+            repeat,
+        ),
+        filter=measure(
+            lambda: sync._filter_excluded_changes_local(sync_events),
+            len(sync_events),
+            repeat,
+        ),
+    )
+
+    for stage in results.values():
+        stage["n_events"] = len(events)
+
+    return results
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Compares results against a baseline.
+
+    :param results: Current benchmark results.
+    :param baseline: Baseline benchmark results.
+    :param tolerance: Allowed relative deviation.
+    :returns: List of regressions, empty if there are none.
+    """
+
+    regressions = []
+
+    for key, stages in results["results"].items():
+        for stage, res in stages.items():
+            try:
+                ref = baseline["results"][key][stage]
+            except KeyError:
+                continue
+
+            if res["throughput"] < ref["throughput"] * (1 - tolerance):
+                regressions.append(
+                    f"{key} / {stage}: throughput {res['throughput']:.0f}/s "
+                    f"< baseline {ref['throughput']:.0f}/s"
+                )
+            if res["peak_mb"] > ref["peak_mb"] * (1 + tolerance) + 0.1:
+                regressions.append(
+                    f"{key} / {stage}: peak memory {res['peak_mb']} MB "
+                    f"> baseline {ref['peak_mb']} MB"
+                )
+
+    return regressions
+
+
+# ==== command line interface ==========================================================
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000],
+        help="Number of events per scenario, e.g. 10000 100000 1000000.",
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="Scenarios to run.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of timed runs per stage."
+    )
+    parser.add_argument("--save", metavar="PATH", help="Save results as JSON.")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="Compare results against a JSON baseline."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative regression when comparing against a baseline.",
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        results=dict(),
+    )
+
+    with tempfile.TemporaryDirectory() as root:
+
+        sync = SyncEngine(DropboxClient(CONFIG_NAME))
+        sync.dropbox_path = osp.realpath(root)
+
+        try:
+            for n in args.sizes:
+                for name in args.scenarios:
+                    key = f"{name}[{n}]"
+                    res = run_scenario(sync, name, n, args.repeat)
+                    results["results"][key] = res
+
+                    for stage, r in res.items():
+                        print(
+                            f"{key:<24} {stage:<12} {r['time']:>9.4f} s "
+                            f"{r['throughput']:>12.0f} items/s {r['peak_mb']:>9.2f} MB"
+                        )
+        finally:
+            remove_configuration(CONFIG_NAME)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance)
+
+        if regressions:
+            print("\nRegressions compared to baseline:")
+            for r in regressions:
+                print(f"  {r}")
+            return 1
+        else:
+            print("\nNo regressions compared to baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
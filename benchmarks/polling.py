@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for polling file system observers on a large folder tree.
+
+Creates a folder tree with the given number of files, 100 per folder, and measures for
+the polling emitter and the incremental polling emitter:
+
+* ``initial``: the initial scan of the tree and the memory retained by the snapshot
+* ``poll``: a single poll after a small number of files was created, renamed and deleted
+
+To measure the performance on a network share, pass a folder on the share with
+``--path``. The tree is created in a temporary subfolder and removed afterwards:
+
+    python benchmarks/polling.py --files 500000 --changes 10
+"""
+
+import argparse
+import gc
+import json
+import os
+import os.path as osp
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from queue import Queue
+from typing import Callable, Dict, List, Any
+
+from watchdog.observers.api import ObservedWatch
+from watchdog.utils.dirsnapshot import DirectorySnapshot, DirectorySnapshotDiff
+
+from maestral.fsevents.polling import IncrementalPollingEmitter
+
+
+FILES_PER_FOLDER = 100
+FOLDERS_PER_GROUP = 100
+
+
+# ==== folder tree =====================================================================
+
+
+def create_tree(root: str, n_files: int) -> List[str]:
+    """
+    Creates a folder tree with ``n_files`` empty files.
+
+    :param root: Folder in which to create the tree.
+    :param n_files: Number of files.
+    :returns: Paths of all folders which contain files.
+    """
+
+    folders = []
+
+    for i in range(0, n_files, FILES_PER_FOLDER):
+        folder_index = i // FILES_PER_FOLDER
+        folder = osp.join(
+            root,
+            f"group {folder_index // FOLDERS_PER_GROUP}",
+            f"folder {folder_index}",
+        )
+        os.makedirs(folder)
+        folders.append(folder)
+
+        for j in range(i, min(i + FILES_PER_FOLDER, n_files)):
+            open(osp.join(folder, f"file {j}.txt"), "w").close()
+
+    age_tree(root)
+
+    return folders
+
+
+def age_tree(root: str) -> None:
+    """
+    Moves the mtime of all folders into the past. Otherwise, the incremental emitter
+    lists folders which changed within the mtime resolution on every poll.
+    """
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (0, 0))
+
+
+def make_changes(folders: List[str], n_changes: int, run: int) -> None:
+    """
+    Creates, renames and deletes ``n_changes`` files in different folders.
+
+    :param folders: Folders in which to make changes.
+    :param n_changes: Number of changes.
+    :param run: Index of the run, used to create unique file names.
+    """
+
+    step = max(len(folders) // n_changes, 1)
+
+    for i in range(n_changes):
+        folder = folders[(i * step + run) % len(folders)]
+        path = osp.join(folder, f"new {run} {i}.txt")
+
+        if i % 3 == 0:
+            open(path, "w").close()
+        elif i % 3 == 1:
+            os.rename(osp.join(folder, os.listdir(folder)[0]), path)
+        else:
+            os.remove(osp.join(folder, os.listdir(folder)[0]))
+
+
+# ==== emitters ========================================================================
+
+
+class FullSnapshotPoller:
+    """Polls like :class:`maestral.fsevents.polling.OrderedPollingEmitter`."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.snapshot = DirectorySnapshot(root)
+
+    def poll(self) -> int:
+        new_snapshot = DirectorySnapshot(self.root)
+        diff = DirectorySnapshotDiff(self.snapshot, new_snapshot)
+        self.snapshot = new_snapshot
+        return sum(
+            len(items)
+            for items in (
+                diff.files_created,
+                diff.files_deleted,
+                diff.files_modified,
+                diff.files_moved,
+            )
+        )
+
+
+class IncrementalPoller:
+    """Polls with :class:`maestral.fsevents.polling.IncrementalPollingEmitter`."""
+
+    def __init__(self, root: str) -> None:
+        self.events: List[Any] = []
+        self.emitter = IncrementalPollingEmitter(
+            Queue(), ObservedWatch(root, recursive=True), timeout=0
+        )
+        self.emitter.queue_event = self.events.append
+        self.emitter.on_thread_start()
+
+    def poll(self) -> int:
+        self.events.clear()
+        self.emitter.queue_events(0)
+        return sum(not e.is_directory for e in self.events)
+
+
+POLLERS: Dict[str, Callable[[str], Any]] = {
+    "full": FullSnapshotPoller,
+    "incremental": IncrementalPoller,
+}
+
+
+# ==== measurements ====================================================================
+
+
+def run_poller(
+    name: str, root: str, folders: List[str], n_changes: int, repeat: int, offset: int
+) -> Dict[str, Dict[str, float]]:
+    """
+    Measures the initial scan and polls of one poller.
+
+    :param name: Name of the poller.
+    :param root: Root of the folder tree.
+    :param folders: Folders in which to make changes.
+    :param n_changes: Number of changes before each poll.
+    :param repeat: Number of timed polls.
+    :param offset: Index of the first run, used to create unique file names.
+    :returns: Results for the initial scan and the polls.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        poller = POLLERS[name](root)
+        t_initial = time.perf_counter() - t0
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+
+    for run in range(repeat):
+        make_changes(folders, n_changes, offset + run)
+        gc.collect()
+        t0 = time.perf_counter()
+        n_events = poller.poll()
+        timings.append(time.perf_counter() - t0)
+
+        if n_events < n_changes:
+            raise RuntimeError(f"{name}: {n_events} events for {n_changes} changes")
+
+        age_tree(root)
+
+    return dict(
+        initial=dict(
+            time=round(t_initial, 4),
+            retained_mb=round(current / 1e6, 2),
+            peak_mb=round(peak / 1e6, 2),
+        ),
+        poll=dict(time=round(min(timings), 4)),
+    )
+
+
+# ==== command line interface ==========================================================
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--files", type=int, default=500_000, help="Number of files in the tree."
+    )
+    parser.add_argument(
+        "--changes", type=int, default=10, help="Number of changes before each poll."
+    )
+    parser.add_argument(
+        "--pollers",
+        nargs="+",
+        choices=list(POLLERS),
+        default=list(POLLERS),
+        help="Pollers to run.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed polls.")
+    parser.add_argument("--path", help="Folder in which to create the tree.")
+    parser.add_argument("--save", metavar="PATH", help="Save results as JSON.")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        files=args.files,
+        changes=args.changes,
+        results=dict(),
+    )
+
+    root = tempfile.mkdtemp(dir=args.path)
+
+    try:
+        print(f"Creating {args.files} files in {root}...")
+        folders = create_tree(root, args.files)
+
+        for i, name in enumerate(args.pollers):
+            offset = i * args.repeat
+            res = run_poller(name, root, folders, args.changes, args.repeat, offset)
+            results["results"][name] = res
+
+            initial = res["initial"]
+            print(
+                f"{name:<12} initial {initial['time']:>9.4f} s "
+                f"{initial['retained_mb']:>9.2f} MB retained "
+                f"{initial['peak_mb']:>9.2f} MB peak"
+            )
+            print(f"{name:<12} poll    {res['poll']['time']:>9.4f} s")
+    finally:
+        shutil.rmtree(root)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the startup of :class:`maestral.main.Maestral`.
+
+Creates a temporary configuration with an index of synced files and a cache directory
+with leftover temporary files, as after an interrupted sync, and reports the duration
+of each startup phase from :attr:`maestral.main.Maestral.startup_timings`:
+
+    python benchmarks/startup.py --files 100000 --cache-files 5000
+
+The cache directory is cleaned concurrently with loading the database. The total
+therefore stays below the sum of the individual phases of the sync engine.
+"""
+
+import argparse
+import os
+import os.path as osp
+import sys
+import tempfile
+from datetime import datetime
+
+from dropbox.files import FileMetadata, FolderMetadata
+
+from maestral.main import Maestral
+from maestral.config import remove_configuration
+
+
+CONFIG_NAME = "benchmark-startup"
+
+
+def file_md(dbx_path: str) -> FileMetadata:
+    return FileMetadata(
+        name=osp.basename(dbx_path),
+        path_lower=dbx_path.lower(),
+        path_display=dbx_path,
+        id=f"id:{dbx_path}",
+        client_modified=datetime.utcnow(),
+        server_modified=datetime.utcnow(),
+        rev="a1c10ce0dd78",
+        size=100,
+    )
+
+
+def folder_md(dbx_path: str) -> FolderMetadata:
+    return FolderMetadata(
+        name=osp.basename(dbx_path),
+        path_lower=dbx_path.lower(),
+        path_display=dbx_path,
+        id=f"id:{dbx_path}",
+    )
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--files", type=int, default=100_000, help="Number of files in the index."
+    )
+    parser.add_argument(
+        "--cache-files",
+        type=int,
+        default=5000,
+        help="Number of files in the cache directory.",
+    )
+    parser.add_argument(
+        "--index-mirror",
+        action="store_true",
+        help="Load an in-memory copy of the index on startup.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+
+        m = Maestral(CONFIG_NAME)
+
+        try:
+            m.sync.dropbox_path = root
+            m.set_conf("sync", "index_mirror", args.index_mirror)
+
+            dbx_paths = [f"/folder {i // 100}/file {i}.txt" for i in range(args.files)]
+
+            for dbx_path in {osp.dirname(p) for p in dbx_paths}:
+                m.sync.update_index_from_dbx_metadata(folder_md(dbx_path))
+
+            for dbx_path in dbx_paths:
+                m.sync.update_index_from_dbx_metadata(file_md(dbx_path))
+
+            cache_path = m.sync.file_cache_path
+
+            for i in range(args.cache_files):
+                folder = osp.join(cache_path, str(i // 100))
+                os.makedirs(folder, exist_ok=True)
+                with open(osp.join(folder, f"tmp{i}"), "wb") as f:
+                    f.write(b"\0" * 1024)
+
+            del m
+
+            m = Maestral(CONFIG_NAME)
+            timings = m.startup_timings
+
+            for name, duration in timings.items():
+                print(f"{name:<28} {duration * 1000:>8.1f} ms")
+
+            sequential = sum(
+                duration
+                for name, duration in timings.items()
+                if name.startswith("sync_engine.")
+            )
+            print(f"{'sync_engine (sequential)':<28} {sequential * 1000:>8.1f} ms")
+
+        finally:
+            remove_configuration(CONFIG_NAME)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@
 import sys
 
 # local imports
-from .cli import main
+from .thin_cli import main
 
 
 if __name__ == "__main__":
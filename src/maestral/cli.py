@@ -888,9 +888,16 @@ def sharelink_list(dropbox_path: Optional[str], config_name: str) -> None:
 
 
 @main.command(section="Information", help="Show the status of the daemon.")
+@click.option(
+    "--verbose",
+    "-v",
+    is_flag=True,
+    default=False,
+    help="Show the duration of each startup phase of the daemon.",
+)
 @existing_config_option
 @convert_py_errors
-def status(config_name: str) -> None:
+def status(verbose: bool, config_name: str) -> None:
 
     from .daemon import MaestralProxy, CommunicationError
 
@@ -932,6 +939,20 @@ def status(config_name: str) -> None:
                 table.echo()
                 cli.echo("")
 
+            if verbose:
+
+                phase_column = cli.Column(title="Startup phase")
+                duration_column = cli.Column(title="Duration", align=cli.Align.Right)
+
+                for name, duration in m.startup_timings.items():
+                    phase_column.append(name)
+                    duration_column.append(f"{duration * 1000:.0f} ms")
+
+                table = cli.Table([phase_column, duration_column])
+
+                table.echo()
+                cli.echo("")
+
     except CommunicationError:
         cli.echo("Maestral daemon is not running.")
 
@@ -939,27 +960,33 @@ def status(config_name: str) -> None:
 @main.command(
     section="Information",
     help="""
-Show the sync status of a local file or folder.
+Show the sync status of local files or folders.
 
 Returned value will be 'uploading', 'downloading', 'up to date', 'error', or 'unwatched'
 (for files outside of the Dropbox directory). This will always be 'unwatched' if syncing
 is paused. This command can be used to for instance to query information for a plugin to
-a file-manager.
+a file-manager. When multiple paths are given, one status per line is returned in the
+same order.
 """,
 )
-@click.argument("local_path", type=click.Path(exists=True, resolve_path=True))
+@click.argument(
+    "local_paths",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, resolve_path=True),
+)
 @existing_config_option
-def filestatus(local_path: str, config_name: str) -> None:
+def filestatus(local_paths: List[str], config_name: str) -> None:
 
     from .daemon import MaestralProxy, CommunicationError
 
     try:
         with MaestralProxy(config_name) as m:
-            stat = m.get_file_status(local_path)
-            cli.echo(stat)
+            stats = m.get_file_status_batch(list(local_paths))
+            cli.echo("\n".join(stats))
 
     except CommunicationError:
-        cli.echo("unwatched")
+        cli.echo("\n".join(["unwatched"] * len(local_paths)))
 
 
 @main.command(section="Information", help="Live view of all items being synced.")
@@ -968,7 +995,7 @@ def filestatus(local_path: str, config_name: str) -> None:
 def activity(config_name: str) -> None:
 
     import curses
-    from .utils import natural_size
+    from .thin_cli import format_activity
     from .daemon import MaestralProxy, CommunicationError
 
     try:
@@ -986,44 +1013,9 @@ def activity(config_name: str) -> None:
 
                     height, width = screen.getmaxyx()
 
-                    # create header
-                    lines = [f"Status: {m.status}, Sync errors: {len(m.sync_errors)}"]
-                    lines.append("")
-
-                    # create table
-                    filenames = ["Path"]
-                    states = ["Status"]
-                    col_len = 4
-
-                    for event in m.get_activity(limit=height - 3):
-
-                        dbx_path = cast(str, event["dbx_path"])
-                        direction = cast(str, event["direction"])
-                        state = cast(str, event["status"])
-                        size = cast(int, event["size"])
-                        completed = cast(int, event["completed"])
-
-                        filename = os.path.basename(dbx_path)
-                        filenames.append(filename)
-
-                        arrow = "↓" if direction == "down" else "↑"
-
-                        if completed > 0:
-                            done_str = natural_size(completed, sep=False)
-                            todo_str = natural_size(size, sep=False)
-                            states.append(f"{done_str}/{todo_str} {arrow}")
-                        else:
-                            if state == "syncing" and direction == "up":
-                                states.append("uploading")
-                            elif state == "syncing" and direction == "down":
-                                states.append("downloading")
-                            else:
-                                states.append(state)
-
-                        col_len = max(len(filename), col_len)
-
-                    for name, state in zip(filenames, states):  # create rows
-                        lines.append(name.ljust(col_len + 2) + state)
+                    lines = format_activity(
+                        m.status, len(m.sync_errors), m.get_activity(limit=height - 3)
+                    )
 
                     # print to console screen
                     screen.clear()
@@ -1047,6 +1039,30 @@ def activity(config_name: str) -> None:
         cli.echo("Maestral daemon is not running.")
 
 
+@main.command(
+    section="Information",
+    help="""
+Show metrics of the daemon in the Prometheus text format.
+
+This includes requests to the Dropbox API by endpoint, their latencies and retries,
+transferred bytes, backoffs and for the sync engine queue sizes, processed sync events,
+hashing and database access times and lock wait times. Metrics are collected since the
+daemon was started. Set the config option "metrics_port" to serve them over HTTP.
+""",
+)
+@existing_config_option
+@convert_py_errors
+def metrics(config_name: str) -> None:
+
+    from .daemon import MaestralProxy, CommunicationError
+
+    try:
+        with MaestralProxy(config_name) as m:
+            cli.echo(m.get_metrics(), nl=False)
+    except CommunicationError:
+        cli.echo("Maestral daemon is not running.")
+
+
 @main.command(section="Information", help="Show recently changed or added files.")
 @existing_config_option
 @convert_py_errors
@@ -1133,17 +1149,19 @@ def ls(long: bool, dropbox_path: str, include_deleted: bool, config_name: str) -
                 ]
             )
 
-            for entry in entries:
+            excluded_statuses = m.excluded_status_batch(
+                [cast(str, entry["path_lower"]) for entry in entries]
+            )
+
+            for entry, excluded_status in zip(entries, excluded_statuses):
 
                 item_type = to_short_type[cast(str, entry["type"])]
                 name = cast(str, entry["name"])
-                path_lower = cast(str, entry["path_lower"])
 
                 text = "shared" if "sharing_info" in entry else "private"
                 color = "bright_black" if text == "private" else None
                 shared_field = cli.TextField(text, fg=color)
 
-                excluded_status = m.excluded_status(path_lower)
                 color = "green" if excluded_status == "included" else None
                 text = "✓" if excluded_status == "included" else excluded_status
                 excluded_field = cli.TextField(text, fg=color)
@@ -11,6 +11,7 @@ import os.path as osp
 import time
 import logging
 import contextlib
+import threading
 from datetime import datetime, timezone
 from typing import (
     Callable,
@@ -71,6 +72,7 @@ from .errors import (
 )
 from .config import MaestralState
 from .constants import DROPBOX_APP_KEY
+from .metrics import Registry
 from .utils import natural_size, chunks, clamp
 
 if TYPE_CHECKING:
@@ -191,6 +193,71 @@ def convert_api_errors(
             raise os_to_maestral_error(exc, dbx_path, local_path)
 
 
+class _InstrumentedDropbox(Dropbox):
+    """
+    Dropbox SDK client which records metrics for every request to the Dropbox API.
+
+    :param client: The client whose metrics to update.
+    """
+
+    def __init__(self, *args, client: "DropboxClient", **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._client = client
+        self._attempts = threading.local()
+
+    def request_json_string_with_retry(self, *args, **kwargs):
+        self._attempts.count = 0
+        return super().request_json_string_with_retry(*args, **kwargs)
+
+    def request_json_string(
+        self,
+        host,
+        func_name,
+        route_style,
+        request_json_arg,
+        auth_type,
+        request_binary,
+        timeout=None,
+    ):
+
+        client = self._client
+
+        attempt = getattr(self._attempts, "count", 0) + 1
+        self._attempts.count = attempt
+
+        client._api_requests.labels(func_name).inc()
+
+        if attempt > 1:
+            client._api_retries.labels(func_name).inc()
+
+        if request_binary:
+            client._uploaded_bytes.inc(len(request_binary))
+
+        t0 = time.perf_counter()
+
+        try:
+            return super().request_json_string(
+                host,
+                func_name,
+                route_style,
+                request_json_arg,
+                auth_type,
+                request_binary,
+                timeout,
+            )
+        except exceptions.RateLimitError as exc:
+            client._api_errors.labels(func_name).inc()
+            backoff = 5.0 if exc.backoff is None else exc.backoff
+            client._record_backoff("rate_limit", backoff)
+            raise
+        except Exception:
+            client._api_errors.labels(func_name).inc()
+            raise
+        finally:
+            duration = time.perf_counter() - t0
+            client._api_request_duration.labels(func_name).observe(duration)
+
+
 class DropboxClient:
     """Client for the Dropbox SDK
 
@@ -203,6 +270,9 @@ class DropboxClient:
     :class:`errors.MaestralApiError`. Connection errors from requests will be caught and
     reraised as :class:`ConnectionError`.
 
+    Metrics for all requests to the Dropbox API are collected in :attr:`metrics`. The
+    registry is shared with the sync engine which uses this client.
+
     :param config_name: Name of config file and state file to use.
     :param timeout: Timeout for individual requests. Defaults to 100 sec if not given.
     """
@@ -221,6 +291,57 @@ class DropboxClient:
         self._dbx = None
         self._state = MaestralState(config_name)
 
+        # metrics
+        self.metrics = Registry()
+        self._api_requests = self.metrics.counter(
+            "maestral_api_requests_total",
+            "Requests to the Dropbox API, including retries.",
+            ["endpoint"],
+        )
+        self._api_retries = self.metrics.counter(
+            "maestral_api_retries_total",
+            "Requests to the Dropbox API which were retried by the SDK.",
+            ["endpoint"],
+        )
+        self._api_errors = self.metrics.counter(
+            "maestral_api_errors_total",
+            "Requests to the Dropbox API which failed.",
+            ["endpoint"],
+        )
+        self._api_request_duration = self.metrics.histogram(
+            "maestral_api_request_duration_seconds",
+            "Duration of requests to the Dropbox API until the response headers are "
+            "received.",
+            ["endpoint"],
+        )
+        self._uploaded_bytes = self.metrics.counter(
+            "maestral_uploaded_bytes_total", "Bytes sent in request bodies."
+        )
+        self._downloaded_bytes = self.metrics.counter(
+            "maestral_downloaded_bytes_total", "Bytes of downloaded files."
+        )
+        self._backoffs = self.metrics.counter(
+            "maestral_backoffs_total",
+            "Backoffs requested by Dropbox servers.",
+            ["reason"],
+        )
+        self._backoff_duration = self.metrics.counter(
+            "maestral_backoff_seconds_total",
+            "Time spent backing off as requested by Dropbox servers.",
+            ["reason"],
+        )
+
+    def _record_backoff(self, reason: str, duration: float) -> None:
+        """
+        Records a backoff which was requested by Dropbox servers.
+
+        :param reason: "rate_limit" for rate limiting or "longpoll" for a backoff
+            requested when waiting for remote changes.
+        :param duration: Duration of the backoff in seconds.
+        """
+        self._backoffs.labels(reason).inc()
+        self._backoff_duration.labels(reason).inc(duration)
+
     # ---- linking API -----------------------------------------------------------------
 
     @property
@@ -324,7 +445,8 @@ class DropboxClient:
 
         if refresh_token or access_token:
 
-            self._dbx = Dropbox(
+            self._dbx = _InstrumentedDropbox(
+                client=self,
                 oauth2_refresh_token=refresh_token,
                 oauth2_access_token=access_token,
                 oauth2_access_token_expiration=access_token_expiration,
@@ -473,6 +595,7 @@ class DropboxClient:
                 with contextlib.closing(http_resp):
                     for c in http_resp.iter_content(chunksize):
                         f.write(c)
+                        self._downloaded_bytes.inc(len(c))
                         if sync_event:
                             sync_event.completed = f.tell()
 
@@ -910,6 +1033,7 @@ class DropboxClient:
         if res.backoff:
             logger.debug("Backoff requested for %s sec", res.backoff)
             self._backoff_until = time.time() + res.backoff + 5.0
+            self._record_backoff("longpoll", res.backoff + 5.0)
         else:
             self._backoff_until = 0
 
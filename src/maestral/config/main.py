@@ -41,6 +41,7 @@ DEFAULTS_CONFIG: DefaultsType = [
             "log_level": 20,  # log level for journal and file, default: INFO
             "update_notification_interval": 60 * 60 * 24 * 7,  # default: weekly
             "keyring": "automatic",  # keychain backend to use for credential storage
+            "metrics_port": 0,  # localhost port to serve metrics on, 0: disabled
         },
     ),
     (
@@ -51,6 +52,10 @@ DEFAULTS_CONFIG: DefaultsType = [
             "keep_history": 60 * 60 * 24 * 7,  # default: one week
             "upload": True,  # if download sync is enabled
             "download": True,  # if upload sync is enabled
+            "remote_changes_batch_size": 0,  # remote changes to coalesce, 0: per page
+            "index_mirror": False,  # keep a copy of the index in memory
+            "stream_local_changes": False,  # upload quiet paths while others change
+            "observer": "auto",  # auto, fanotify, inotify, polling or incremental_polling
         },
     ),
 ]
@@ -101,6 +106,11 @@ DEFAULTS_STATE: DefaultsType = [
 # 3. You don't need to touch this value if you're just adding a new option
 CONF_VERSION = "15.0.0"
 
+# Maximum delay in seconds before changes to the state are written to the drive. The
+# state is updated frequently during sync, for instance for every page of changes
+# while indexing, and this coalesces those updates into fewer file writes.
+STATE_WRITE_BEHIND = 1.0
+
 
 # =============================================================================
 # Factories
@@ -112,6 +122,7 @@ def _get_conf(
     config_path: str,
     defaults: DefaultsType,
     registry: Dict[str, UserConfig],
+    write_behind: float = 0,
 ):
 
     try:
@@ -125,6 +136,7 @@ def _get_conf(
                 version=CONF_VERSION,
                 backup=True,
                 remove_obsolete=True,
+                write_behind=write_behind,
             )
         except OSError:
             conf = UserConfig(
@@ -133,6 +145,7 @@ def _get_conf(
                 version=CONF_VERSION,
                 backup=True,
                 remove_obsolete=True,
+                write_behind=write_behind,
                 load=False,
             )
 
@@ -171,11 +184,19 @@ def MaestralState(config_name: str) -> UserConfig:
 
     :param config_name: Name of maestral configuration to run. A new state file will
         be created if none exists for the given config_name.
-    :return: Maestral state instance which saves any changes to the drive.
+    :return: Maestral state instance which saves any changes to the drive. Changes
+        are written with a delay of up to :data:`STATE_WRITE_BEHIND` seconds, call
+        :meth:`UserConfig.flush` to write them immediately.
     """
 
     global _state_instances
 
     with _state_lock:
         state_path = get_data_path(CONFIG_DIR_NAME, f"{config_name}.state")
-        return _get_conf(config_name, state_path, DEFAULTS_STATE, _state_instances)
+        return _get_conf(
+            config_name,
+            state_path,
+            DEFAULTS_STATE,
+            _state_instances,
+            write_behind=STATE_WRITE_BEHIND,
+        )
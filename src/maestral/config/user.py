@@ -10,13 +10,16 @@ config module of the Spyder IDE.
 """
 
 import ast
+import atexit
+import copy
 import os
 import os.path as osp
 import re
 import shutil
+import tempfile
 import time
 import configparser as cp
-from threading import RLock
+from threading import RLock, Timer
 import logging
 from typing import Optional, List, Tuple, Dict, Union, Any
 
@@ -36,6 +39,26 @@ class NoDefault:
     pass
 
 
+def _get_file_signature(fpath: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Returns the inode, mtime and size of a file or None if it does not exist. Files are
+    replaced on every write, the inode therefore changes even if the mtime does not.
+    """
+    try:
+        stat = os.stat(fpath)
+    except OSError:
+        return None
+    else:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _copy_mutable(value: Any) -> Any:
+    """Returns a copy of lists, dicts and sets and other values unchanged."""
+    if isinstance(value, (list, dict, set)):
+        return copy.copy(value)
+    return value
+
+
 # =============================================================================
 # Defaults class
 # =============================================================================
@@ -58,6 +81,9 @@ class DefaultsConfig(cp.ConfigParser):
         self._name = filename
         self._suffix = ext
 
+        # (inode, mtime, size) of the file when we last read or wrote it
+        self._file_signature: Optional[Tuple[int, int, int]] = None
+
         if not osp.isdir(osp.dirname(self._path)):
             os.makedirs(osp.dirname(self._path))
 
@@ -78,28 +104,65 @@ class DefaultsConfig(cp.ConfigParser):
         # on why this method contains all the exception handling.
 
         with self._lock:
+            try:
+                tmp_fpath = self.__write_tmp_file()
+            except EnvironmentError:
+                logger.warning(
+                    "Failed to write user configuration to disk", exc_info=True
+                )
+                return
+
             try:
                 # The "easy" way
-                self.__write_file(fpath)
+                self.__replace_file(tmp_fpath, fpath)
             except EnvironmentError:
                 try:
-                    # The "delete and sleep" way
-                    if osp.isfile(fpath):
-                        os.remove(fpath)
-
+                    # The "sleep and retry" way, the old file is kept until replaced
                     time.sleep(0.05)
-                    self.__write_file(fpath)
+                    self.__replace_file(tmp_fpath, fpath)
                 except Exception:
                     logger.warning(
                         "Failed to write user configuration to disk", exc_info=True
                     )
+                    self.__remove_tmp_file(tmp_fpath)
+
+    def __write_tmp_file(self) -> str:
+        """
+        Writes the config to a new temporary file next to the config file. The config
+        file can then be replaced atomically so that a crash during writing does not
+        leave a truncated file. The temporary file has a unique name because other
+        processes may save the same config at the same time.
 
-    def __write_file(self, fpath: str) -> None:
+        :returns: Path of the temporary file.
+        """
 
         os.makedirs(self._path, exist_ok=True)
 
-        with open(fpath, "w", encoding="utf-8") as configfile:
-            self.write(configfile)
+        fd, tmp_fpath = tempfile.mkstemp(
+            dir=self._path, prefix=self._name + self._suffix + ".", suffix=".tmp"
+        )
+
+        try:
+            with open(fd, "w", encoding="utf-8") as configfile:
+                self.write(configfile)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+        except BaseException:
+            self.__remove_tmp_file(tmp_fpath)
+            raise
+
+        return tmp_fpath
+
+    def __replace_file(self, tmp_fpath: str, fpath: str) -> None:
+        os.replace(tmp_fpath, fpath)
+        self._file_signature = _get_file_signature(fpath)
+
+    @staticmethod
+    def __remove_tmp_file(tmp_fpath: str) -> None:
+        try:
+            os.remove(tmp_fpath)
+        except OSError:
+            pass
 
     def get_config_fpath(self) -> str:
         """Return the ini file where this configuration is stored."""
@@ -138,6 +201,11 @@ class UserConfig(DefaultsConfig):
     remove_obsolete:
         If `True`, values that were removed from the configuration on version
         change, are removed from the saved configuration file.
+    write_behind:
+        If larger than zero, changes are written to the file by a background
+        timer after at most this many seconds instead of immediately. Multiple
+        changes within this interval result in a single write. Pending changes
+        are written on `flush` and when the interpreter exits.
 
     Notes
     -----
@@ -147,6 +215,9 @@ class UserConfig(DefaultsConfig):
 
     DEFAULT_SECTION_NAME = "main"
 
+    # Minimum interval in seconds between checks for external changes to the file.
+    _reload_check_interval = 1.0
+
     def __init__(
         self,
         path: str,
@@ -155,10 +226,21 @@ class UserConfig(DefaultsConfig):
         version: str = "0.0.0",
         backup: bool = False,
         remove_obsolete: bool = False,
+        write_behind: float = 0,
     ) -> None:
         """UserConfig class, based on ConfigParser."""
         super(UserConfig, self).__init__(path=path)
 
+        self._write_behind = write_behind
+        self._dirty = False
+        self._flush_timer: Optional[Timer] = None
+
+        self._value_cache: Dict[Tuple[str, str], Any] = dict()
+        self._last_reload_check = time.monotonic()
+
+        if write_behind > 0:
+            atexit.register(self.flush)
+
         self._load = load
         self._version = self._check_version(version)
         self._backup = backup
@@ -307,6 +389,38 @@ class UserConfig(DefaultsConfig):
             except cp.MissingSectionHeaderError:
                 logger.error("File contains no section headers.")
 
+            self._file_signature = _get_file_signature(fpath)
+            self._value_cache.clear()
+
+    def _reload_if_changed(self) -> None:
+        """
+        Reloads the config from its file if it was changed by another process. Checks
+        at most once every :attr:`_reload_check_interval` seconds.
+        """
+
+        now = time.monotonic()
+
+        if now - self._last_reload_check < self._reload_check_interval:
+            return
+
+        self._last_reload_check = now
+
+        if not self._load or self._dirty:
+            # Don't overwrite changes which have not been written yet.
+            return
+
+        fpath = self.get_config_fpath()
+
+        if _get_file_signature(fpath) != self._file_signature:
+            logger.debug("Reloading %s after external changes", fpath)
+            self._load_from_ini(fpath)
+
+    def _set(self, section: str, option: str, value: Any) -> None:
+        """Private set method which invalidates the cached value"""
+        with self._lock:
+            super(UserConfig, self)._set(section, option, value)
+            self._value_cache.pop((section, option), None)
+
     def _load_old_defaults(self, old_version: str) -> cp.ConfigParser:
         """Read old defaults."""
         old_defaults = cp.ConfigParser()
@@ -411,6 +525,33 @@ class UserConfig(DefaultsConfig):
 
     # --- Public API -------------------------------------------------------------------
 
+    def save(self) -> None:
+        """
+        Save config into the associated file. In write-behind mode, schedule a write
+        instead if none is pending.
+        """
+        if self._write_behind > 0:
+            with self._lock:
+                self._dirty = True
+                if not self._flush_timer:
+                    self._flush_timer = Timer(self._write_behind, self.flush)
+                    self._flush_timer.name = "maestral-config-flush"
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+        else:
+            super(UserConfig, self).save()
+
+    def flush(self) -> None:
+        """Write pending changes to the associated file in write-behind mode."""
+        with self._lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if self._dirty:
+                self._dirty = False
+                super(UserConfig, self).save()
+
     def get_version(self, version: str = "0.0.0") -> str:
         """Return configuration (not application!) version."""
         return self.get(self.DEFAULT_SECTION_NAME, "version", version)
@@ -471,9 +612,28 @@ class UserConfig(DefaultsConfig):
         default:
             Default value (if not specified, an exception will be raised if
             option doesn't exist).
+
+        Parsed values are cached until the option is changed. Lists, dicts and sets
+        are returned as shallow copies so that callers cannot modify the cache.
         """
         section = self._check_section_option(section, option)
 
+        self._reload_if_changed()
+
+        try:
+            return _copy_mutable(self._value_cache[(section, option)])
+        except KeyError:
+            pass
+
+        with self._lock:
+            value = self._get_uncached(section, option, default)
+            self._value_cache[(section, option)] = value
+
+        return _copy_mutable(value)
+
+    def _get_uncached(self, section: str, option: str, default: Any) -> Any:
+        """Get and parse an option from the config parser."""
+
         if not self.has_section(section):
             if default is NoDefault:
                 raise cp.NoSectionError(section)
@@ -544,25 +704,37 @@ class UserConfig(DefaultsConfig):
                 f"got {value.__class__.__name__}."
             )
 
-        self._set(section, option, value)
-        if save:
-            self.save()
+        # Don't modify the config while a background flush is writing it.
+        with self._lock:
+            self._set(section, option, value)
+            if save:
+                self.save()
 
     def remove_section(self, section: str) -> bool:
         """Remove `section` and all options within it."""
-        res = super(UserConfig, self).remove_section(section)
-        self.save()
+        with self._lock:
+            res = super(UserConfig, self).remove_section(section)
+            self._value_cache.clear()
+            self.save()
         return res
 
     def remove_option(self, section: str, option: str) -> bool:
         """Remove `option` from `section`."""
-        res = super(UserConfig, self).remove_option(section, option)
-        self.save()
+        with self._lock:
+            res = super(UserConfig, self).remove_option(section, option)
+            self._value_cache.pop((section, option), None)
+            self.save()
         return res
 
     def cleanup(self) -> None:
         """Remove files associated with config and reset to defaults."""
 
+        with self._lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._dirty = False
+
         self.reset_to_defaults(save=False)
 
         fpath = self.get_config_fpath()
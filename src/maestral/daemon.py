@@ -408,6 +408,8 @@ def start_maestral_daemon(
     :raises RuntimeError: if a daemon for the given ``config_name`` is already running.
     """
 
+    t0 = time.perf_counter()
+
     import asyncio
     from . import notify
     from .main import Maestral
@@ -509,7 +511,10 @@ def start_maestral_daemon(
     ExposedMaestral.stop_sync = oneway(ExposedMaestral.stop_sync)
     ExposedMaestral.shutdown_daemon = oneway(ExposedMaestral.shutdown_daemon)
 
-    maestral_daemon = ExposedMaestral(config_name, log_to_stdout=log_to_stdout)
+    # load credentials in parallel to the remaining setup if we need them right away
+    maestral_daemon = ExposedMaestral(
+        config_name, log_to_stdout=log_to_stdout, load_credentials=start_sync
+    )
 
     if start_sync:
 
@@ -536,6 +541,10 @@ def start_maestral_daemon(
             for socket in daemon.sockets:
                 loop.add_reader(socket.fileno(), daemon.events, daemon.sockets)
 
+            logger.debug(
+                "Daemon ready after %.0f ms", (time.perf_counter() - t0) * 1000
+            )
+
             # handle sigterm gracefully
             signals = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
             for s in signals:
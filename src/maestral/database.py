@@ -9,7 +9,7 @@ import os
 import time
 import enum
 from datetime import timezone
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, Dict, TYPE_CHECKING
 
 # external imports
 import sqlalchemy.types as sqltypes  # type: ignore
@@ -28,7 +28,10 @@ from watchdog.events import (
     EVENT_TYPE_MODIFIED,
 )
 
+from .utils.trie import PathTrie
+
 if TYPE_CHECKING:
+    from sqlalchemy.orm import Session as SessionType  # type: ignore
     from .sync import SyncEngine
 
 
@@ -38,8 +41,12 @@ __all__ = [
     "ItemType",
     "ChangeType",
     "SyncEvent",
+    "HistoryEntry",
     "IndexEntry",
+    "IndexRecord",
+    "IndexMirror",
     "HashCacheEntry",
+    "PathSetEntry",
     "Session",
     "Base",
     "db_naming_convention",
@@ -113,18 +120,69 @@ class StringPath(sqltypes.TypeDecorator):
         return value
 
 
-class SyncEvent(Base):  # type: ignore
-    """Represents a file or folder change in the sync queue
+class _SyncEventProperties:
+    """Properties shared by :class:`SyncEvent` and :class:`HistoryEntry`"""
 
-    This class is used to represent both local and remote file system changes and track
-    their sync progress. Some instance attributes will depend on the state of the sync
-    session, e.g., :attr:`local_path` will depend on the current path of the local
-    Dropbox folder. They may therefore become invalid between sync sessions.
+    __slots__ = ()
 
-    The class methods :meth:`from_dbx_metadata` and :meth:`from_file_system_event`
-    should be used to properly construct a :class:`SyncEvent` from a
-    :class:`dropbox.files.Metadata` instance or a
-    :class:`watchdog.events.FileSystemEvent` instance, respectively.
+    direction: SyncDirection
+    item_type: ItemType
+    change_type: ChangeType
+    dbx_path: str
+
+    @property
+    def is_file(self) -> bool:
+        """Returns True for file changes"""
+        return self.item_type == ItemType.File
+
+    @property
+    def is_directory(self) -> bool:
+        """Returns True for folder changes"""
+        return self.item_type == ItemType.Folder
+
+    @property
+    def is_added(self) -> bool:
+        """Returns True for added items"""
+        return self.change_type == ChangeType.Added
+
+    @property
+    def is_moved(self) -> bool:
+        """Returns True for moved items"""
+        return self.change_type == ChangeType.Moved
+
+    @property
+    def is_changed(self) -> bool:
+        """Returns True for changed file contents"""
+        return self.change_type == ChangeType.Modified
+
+    @property
+    def is_deleted(self) -> bool:
+        """Returns True for deleted items"""
+        return self.change_type == ChangeType.Removed
+
+    @property
+    def is_upload(self) -> bool:
+        """Returns True for changes to upload"""
+        return self.direction == SyncDirection.Up
+
+    @property
+    def is_download(self) -> bool:
+        """Returns True for changes to download"""
+        return self.direction == SyncDirection.Down
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}(direction={self.direction.name}, "
+            f"change_type={self.change_type.name}, item_type={self.item_type}, "
+            f"dbx_path='{self.dbx_path}')>"
+        )
+
+
+class HistoryEntry(_SyncEventProperties, Base):  # type: ignore
+    """Represents a completed sync event in our sync history
+
+    Instances are created from a :class:`SyncEvent` with
+    :meth:`SyncEvent.to_history_entry` once the event has been successfully synced.
     """
 
     __tablename__ = "history"
@@ -237,60 +295,114 @@ class SyncEvent(Base):  # type: ignore
             else_=cls.sync_time,
         )
 
-    @property
-    def is_file(self) -> bool:
-        """Returns True for file changes"""
-        return self.item_type == ItemType.File
 
-    @property
-    def is_directory(self) -> bool:
-        """Returns True for folder changes"""
-        return self.item_type == ItemType.Folder
+class SyncEvent(_SyncEventProperties):
+    """Represents a file or folder change in the sync queue
 
-    @property
-    def is_added(self) -> bool:
-        """Returns True for added items"""
-        return self.change_type == ChangeType.Added
+    This class is used to represent both local and remote file system changes and track
+    their sync progress. Some instance attributes will depend on the state of the sync
+    session, e.g., :attr:`local_path` will depend on the current path of the local
+    Dropbox folder. They may therefore become invalid between sync sessions.
 
-    @property
-    def is_moved(self) -> bool:
-        """Returns True for moved items"""
-        return self.change_type == ChangeType.Moved
+    The class methods :meth:`from_dbx_metadata` and :meth:`from_file_system_event`
+    should be used to properly construct a :class:`SyncEvent` from a
+    :class:`dropbox.files.Metadata` instance or a
+    :class:`watchdog.events.FileSystemEvent` instance, respectively.
 
-    @property
-    def is_changed(self) -> bool:
-        """Returns True for changed file contents"""
-        return self.change_type == ChangeType.Modified
+    Instances are plain objects with slots instead of database models, since a large
+    number of them may be created when syncing many items. Use
+    :meth:`to_history_entry` to create an entry for the sync history database. See
+    :class:`HistoryEntry` for a detailed description of all attributes.
+    """
+
+    __slots__ = {
+        "direction": "The :class:`SyncDirection`.",
+        "item_type": "The :class:`ItemType`. May be undetermined for remote deletions.",
+        "sync_time": "The time the SyncEvent was registered.",
+        "dbx_id": "A unique dropbox ID for the file or folder.",
+        "dbx_path": "Dropbox path of the item to sync.",
+        "local_path": "Local path of the item to sync.",
+        "dbx_path_from": "Dropbox path that this item was moved from.",
+        "local_path_from": "Local path that this item was moved from.",
+        "rev": "The file revision.",
+        "content_hash": "A hash representing the file content.",
+        "change_type": "The :class:`ChangeType`.",
+        "change_time": "Local ctime or remote ``client_modified`` time for files.",
+        "change_dbid": "The Dropbox ID of the account which performed the changes.",
+        "change_user_name": "The user name corresponding to :attr:`change_dbid`.",
+        "status": "The :class:`SyncStatus`.",
+        "size": "Size of the item in bytes. Always zero for folders.",
+        "completed": "File size in bytes which has already been transferred.",
+    }
+
+    def __init__(
+        self,
+        direction: SyncDirection,
+        item_type: ItemType,
+        sync_time: float,
+        dbx_path: str,
+        local_path: str,
+        change_type: ChangeType,
+        status: SyncStatus,
+        size: int,
+        dbx_id: Optional[str] = None,
+        dbx_path_from: Optional[str] = None,
+        local_path_from: Optional[str] = None,
+        rev: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        change_time: Optional[float] = None,
+        change_dbid: Optional[str] = None,
+        change_user_name: Optional[str] = None,
+        completed: int = 0,
+    ) -> None:
+        self.direction = direction
+        self.item_type = item_type
+        self.sync_time = sync_time
+        self.dbx_id = dbx_id
+        self.dbx_path = dbx_path
+        self.local_path = local_path
+        self.dbx_path_from = dbx_path_from
+        self.local_path_from = local_path_from
+        self.rev = rev
+        self.content_hash = content_hash
+        self.change_type = change_type
+        self.change_time = change_time
+        self.change_dbid = change_dbid
+        self.change_user_name = change_user_name
+        self.status = status
+        self.size = size
+        self.completed = completed
 
     @property
-    def is_deleted(self) -> bool:
-        """Returns True for deleted items"""
-        return self.change_type == ChangeType.Removed
-
-    @property
-    def is_upload(self) -> bool:
-        """Returns True for changes to upload"""
-        return self.direction == SyncDirection.Up
+    def change_time_or_sync_time(self) -> float:
+        """
+        Change time when available, otherwise sync time. This can be used for sorting or
+        user information purposes.
+        """
+        return self.change_time or self.sync_time
 
-    @property
-    def is_download(self) -> bool:
-        """Returns True for changes to download"""
-        return self.direction == SyncDirection.Down
+    def to_history_entry(self) -> HistoryEntry:
+        """
+        Creates an entry for our sync history database from this event.
 
-    def __repr__(self):
-        return (
-            f"<{self.__class__.__name__}(direction={self.direction.name}, "
-            f"change_type={self.change_type.name}, item_type={self.item_type}, "
-            f"dbx_path='{self.dbx_path}')>"
-        )
+        :returns: History entry with the same attribute values.
+        """
+        return HistoryEntry(**{name: getattr(self, name) for name in self.__slots__})
 
     @classmethod
-    def from_dbx_metadata(cls, md: Metadata, sync_engine: "SyncEngine") -> "SyncEvent":
+    def from_dbx_metadata(
+        cls,
+        md: Metadata,
+        sync_engine: "SyncEngine",
+        dbx_path_cased: Optional[str] = None,
+    ) -> "SyncEvent":
         """
         Initializes a SyncEvent from the given Dropbox metadata.
 
         :param md: Dropbox Metadata.
         :param sync_engine: SyncEngine instance.
+        :param dbx_path_cased: Correctly cased Dropbox path, if already known. If not
+            given, it will be determined with :meth:`SyncEngine.correct_case`.
         :returns: An instance of this class with attributes populated from the given
             Dropbox Metadata.
         """
@@ -343,7 +455,8 @@ class SyncEvent(Base):  # type: ignore
         else:
             raise RuntimeError(f"Cannot convert {md} to SyncEvent")
 
-        dbx_path_cased = sync_engine.correct_case(md.path_display)
+        if dbx_path_cased is None:
+            dbx_path_cased = sync_engine.correct_case(md.path_display)
 
         return cls(
             direction=SyncDirection.Down,
@@ -486,6 +599,150 @@ class IndexEntry(Base):  # type: ignore
         )
 
 
+class IndexRecord:
+    """
+    A lightweight and read-only copy of an :class:`IndexEntry` which is not attached to
+    any database session. Provides the same attributes and properties.
+    """
+
+    __slots__ = (
+        "dbx_path_lower",
+        "dbx_path_cased",
+        "dbx_id",
+        "item_type",
+        "last_sync",
+        "rev",
+        "content_hash",
+    )
+
+    def __init__(
+        self,
+        dbx_path_lower: str,
+        dbx_path_cased: str,
+        dbx_id: str,
+        item_type: ItemType,
+        last_sync: Optional[float],
+        rev: str,
+        content_hash: Optional[str],
+    ) -> None:
+        self.dbx_path_lower = dbx_path_lower
+        self.dbx_path_cased = dbx_path_cased
+        self.dbx_id = dbx_id
+        self.item_type = item_type
+        self.last_sync = last_sync
+        self.rev = rev
+        self.content_hash = content_hash
+
+    @classmethod
+    def from_index_entry(cls, entry: IndexEntry) -> "IndexRecord":
+        """
+        Creates a record from an index entry.
+
+        :param entry: Index entry.
+        :returns: A copy of the entry.
+        """
+        return cls(
+            entry.dbx_path_lower,
+            entry.dbx_path_cased,
+            entry.dbx_id,
+            entry.item_type,
+            entry.last_sync,
+            entry.rev,
+            entry.content_hash,
+        )
+
+    @property
+    def is_file(self) -> bool:
+        """Returns True for file changes"""
+        return self.item_type == ItemType.File
+
+    @property
+    def is_directory(self) -> bool:
+        """Returns True for folder changes"""
+        return self.item_type == ItemType.Folder
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}(item_type={self.item_type.name}, "
+            f"dbx_path='{self.dbx_path_cased}')>"
+        )
+
+
+class IndexMirror:
+    """
+    An in-memory copy of our index table, keyed by the lower case Dropbox path.
+
+    Lookups are plain dictionary reads and do not require any locking. Writes must be
+    serialized by the caller, typically by performing them together with the
+    corresponding database transaction. Every write replaces the entire record for a
+    path, readers will therefore never see a partially updated record. Paths are also
+    kept in a :class:`maestral.utils.trie.PathTrie` so that removing a folder only
+    visits the records of its children.
+    """
+
+    def __init__(self) -> None:
+        self._records: Dict[str, IndexRecord] = dict()
+        self._tree = PathTrie()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def load(self, session: "SessionType") -> None:
+        """
+        Replaces the content of the mirror with all entries from the index table.
+
+        :param session: Database session to use.
+        """
+        records = dict()
+        tree = PathTrie()
+
+        for entry in session.query(IndexEntry).yield_per(1000):
+            records[entry.dbx_path_lower] = IndexRecord.from_index_entry(entry)
+            tree[entry.dbx_path_lower] = None
+
+        self._records = records
+        self._tree = tree
+
+    def get(self, dbx_path_lower: str) -> Optional[IndexRecord]:
+        """
+        Gets the record for the given path.
+
+        :param dbx_path_lower: Lower case Dropbox path.
+        :returns: Record or ``None`` if there is no entry for the path.
+        """
+        return self._records.get(dbx_path_lower)
+
+    def update(self, entry: IndexEntry) -> None:
+        """
+        Adds or replaces the record for an index entry.
+
+        :param entry: Index entry which has been written to the database.
+        """
+        self._records[entry.dbx_path_lower] = IndexRecord.from_index_entry(entry)
+        self._tree[entry.dbx_path_lower] = None
+
+    def remove(self, dbx_path_lower: str, recursive: bool = False) -> None:
+        """
+        Removes the record for a path.
+
+        :param dbx_path_lower: Lower case Dropbox path.
+        :param recursive: If ``True``, also remove all records of children.
+        """
+
+        if recursive:
+            for path, _ in self._tree.pop_tree(dbx_path_lower):
+                self._records.pop(path, None)
+        else:
+            self._tree.pop(dbx_path_lower, None)
+
+        self._records.pop(dbx_path_lower, None)
+
+    def clear(self) -> None:
+        """Removes all records."""
+        self._records = dict()
+        self._tree = PathTrie()
+
+
 class HashCacheEntry(Base):  # type: ignore
     """Represents an entry in our cache of content hashes"""
 
@@ -502,3 +759,25 @@ class HashCacheEntry(Base):  # type: ignore
     The mtime of the item just before the hash was computed. When the current ctime is
     newer, the hash will need to be recalculated.
     """
+
+
+class PathSetEntry(Base):  # type: ignore
+    """
+    Represents an entry in a persistent set of paths, for instance of items which
+    failed to upload or download. The composite primary key of the set name and the
+    path allows membership tests and range queries for all paths under a given path.
+    """
+
+    __tablename__ = "path_sets"
+
+    set_name = Column(sqltypes.String, nullable=False, primary_key=True)
+    """The name of the set."""
+
+    path = Column(StringPath, nullable=False, primary_key=True)
+    """The lower-case Dropbox path of the item."""
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}(set_name='{self.set_name}', "
+            f"path='{self.path}')>"
+        )
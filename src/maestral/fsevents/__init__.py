@@ -6,11 +6,21 @@ to reproduce the new state from the old state. This is only required for the pol
 emitter which uses period directory snapshots and compares them with a
 :class:`watchdog.utils.dirsnapshot.DirectorySnapshotDiff` to generate file system
 events.
+
+On Linux, it also provides an inotify observer which is tuned for large directory
+trees and a fanotify observer which watches entire file systems. Use
+:func:`create_observer` to select an observer by name.
 """
 
+import logging
+from typing import Optional, Callable
+
+from watchdog.observers.api import BaseObserver  # type: ignore
 from watchdog.utils import platform  # type: ignore
 from watchdog.utils import UnsupportedLibc
 
+from .polling import OrderedPollingObserver, IncrementalPollingObserver
+
 
 if platform.is_linux():
     try:
@@ -20,4 +30,67 @@ if platform.is_linux():
 else:
     from watchdog.observers import Observer  # type: ignore
 
-__all__ = ["Observer"]
+__all__ = ["Observer", "OBSERVER_NAMES", "create_observer"]
+
+
+logger = logging.getLogger(__name__)
+
+
+OBSERVER_NAMES = ("auto", "fanotify", "inotify", "polling", "incremental_polling")
+
+
+def create_observer(
+    name: str = "auto",
+    timeout: float = 1,
+    overflow_callback: Optional[Callable[[], None]] = None,
+    path: Optional[str] = None,
+) -> BaseObserver:
+    """
+    Creates a file system observer.
+
+    :param name: Name of the observer: "auto" for the default observer of the
+        platform, "fanotify" for Maestral's fanotify observer on Linux, "inotify" for
+        Maestral's inotify observer on Linux, "polling" for the polling observer or
+        "incremental_polling" for a polling observer which only lists changed folders.
+        If the requested observer is not available, the fanotify observer falls back
+        to the inotify observer and all others fall back to the default observer.
+    :param timeout: Timeout in seconds between successive attempts at reading events.
+    :param overflow_callback: Callable without arguments which is called when the
+        observer has lost events. Not all observers support this.
+    :param path: Directory which will be watched. Required to check if the fanotify
+        observer can be used.
+    :returns: Observer instance.
+    """
+
+    if name == "fanotify":
+        try:
+            from .fanotify import FanotifyObserver, check_available
+
+            if path:
+                check_available(path)
+
+            return FanotifyObserver(
+                timeout=timeout, overflow_callback=overflow_callback
+            )
+        except (ImportError, UnsupportedLibc, OSError) as exc:
+            logger.info("Fanotify observer not available: %s", exc)
+            name = "inotify"
+
+    if name == "inotify":
+        try:
+            from .inotify import InotifyObserver
+
+            return InotifyObserver(timeout=timeout, overflow_callback=overflow_callback)
+        except (ImportError, UnsupportedLibc):
+            logger.warning("Inotify observer not available, using default observer")
+
+    elif name == "polling":
+        return OrderedPollingObserver(timeout=timeout)
+
+    elif name == "incremental_polling":
+        return IncrementalPollingObserver(timeout=timeout)
+
+    elif name != "auto":
+        logger.warning("Unknown observer '%s', using default observer", name)
+
+    return Observer(timeout=timeout)
@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides a fanotify based file system event emitter for Linux. Instead of
+adding one watch per directory like inotify, it marks the entire file system which
+contains the watched folder and reports directory entry events with the file handle of
+the parent directory and the name of the item (``FAN_REPORT_DFID_NAME``). Events
+outside of the watched folder are filtered out. Setting up the observer and detecting
+changes therefore costs O(changes) instead of O(tree), independent of the number of
+folders.
+
+fanotify requires the ``CAP_SYS_ADMIN`` capability to mark a file system and
+``CAP_DAC_READ_SEARCH`` to resolve file handles to paths. Use :func:`check_available`
+to check if the observer can be used before starting it. Moves are reported as moved
+events if the kernel supports ``FAN_RENAME`` (Linux 5.17 and higher) and as pairs of
+deleted and created events otherwise.
+"""
+
+import os
+import os.path as osp
+import ctypes
+import ctypes.util
+import errno
+import functools
+import logging
+import select
+import struct
+import threading
+from typing import Optional, Dict, Callable, Tuple, List
+
+from watchdog.events import (  # type: ignore
+    FileSystemEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+)
+from watchdog.observers.api import (  # type: ignore
+    EventEmitter,
+    BaseObserver,
+    DEFAULT_OBSERVER_TIMEOUT,
+)
+from watchdog.utils import UnsupportedLibc  # type: ignore
+
+from ..utils.caches import LRUCache
+
+
+__all__ = ["FanotifyEmitter", "FanotifyObserver", "check_available"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==== fanotify bindings ===============================================================
+
+FAN_MODIFY = 0x00000002
+FAN_ATTRIB = 0x00000004
+FAN_MOVED_FROM = 0x00000040
+FAN_MOVED_TO = 0x00000080
+FAN_CREATE = 0x00000100
+FAN_DELETE = 0x00000200
+FAN_DELETE_SELF = 0x00000400
+FAN_MOVE_SELF = 0x00000800
+FAN_Q_OVERFLOW = 0x00004000
+FAN_RENAME = 0x10000000
+FAN_ONDIR = 0x40000000
+
+FAN_CLOEXEC = 0x00000001
+FAN_NONBLOCK = 0x00000002
+FAN_CLASS_NOTIF = 0x00000000
+FAN_REPORT_DIR_FID = 0x00000400
+FAN_REPORT_NAME = 0x00000800
+FAN_REPORT_DFID_NAME = FAN_REPORT_DIR_FID | FAN_REPORT_NAME
+
+FAN_MARK_ADD = 0x00000001
+FAN_MARK_FILESYSTEM = 0x00000100
+
+FAN_EVENT_INFO_TYPE_DFID_NAME = 2
+FAN_EVENT_INFO_TYPE_OLD_DFID_NAME = 10
+FAN_EVENT_INFO_TYPE_NEW_DFID_NAME = 12
+
+AT_FDCWD = -100
+O_PATH = 0o10000000
+MAX_HANDLE_SZ = 128
+
+BASE_MASK = (
+    FAN_MODIFY
+    | FAN_ATTRIB
+    | FAN_CREATE
+    | FAN_DELETE
+    | FAN_DELETE_SELF
+    | FAN_MOVE_SELF
+    | FAN_ONDIR
+)
+
+EVENT_METADATA = struct.Struct("=IBBHQii")
+INFO_HEADER = struct.Struct("=BBH")
+FSID_SIZE = 8
+FILE_HANDLE_HEADER = struct.Struct("=Ii")
+READ_BUFFER_SIZE = 256 * 1024
+
+
+def _load_libc() -> ctypes.CDLL:
+
+    libc_name = ctypes.util.find_library("c") or "libc.so.6"
+
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+    except OSError:
+        raise UnsupportedLibc(f"Could not load {libc_name}")
+
+    if not all(
+        hasattr(libc, name)
+        for name in (
+            "fanotify_init",
+            "fanotify_mark",
+            "open_by_handle_at",
+            "name_to_handle_at",
+        )
+    ):
+        raise UnsupportedLibc(f"{libc_name} does not support fanotify")
+
+    libc.fanotify_init.argtypes = [ctypes.c_uint, ctypes.c_uint]
+    libc.fanotify_mark.argtypes = [
+        ctypes.c_int,
+        ctypes.c_uint,
+        ctypes.c_uint64,
+        ctypes.c_int,
+        ctypes.c_char_p,
+    ]
+    libc.open_by_handle_at.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+    libc.name_to_handle_at.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_int),
+        ctypes.c_int,
+    ]
+
+    return libc
+
+
+libc = _load_libc()
+
+
+def _raise_errno(path: Optional[str] = None) -> None:
+    err = ctypes.get_errno()
+    raise OSError(err, os.strerror(err), path)
+
+
+def _fanotify_init() -> int:
+    flags = FAN_CLASS_NOTIF | FAN_CLOEXEC | FAN_NONBLOCK | FAN_REPORT_DFID_NAME
+    fd = libc.fanotify_init(flags, os.O_RDONLY)
+    if fd < 0:
+        _raise_errno()
+    return fd
+
+
+def _fanotify_mark(fd: int, path: str) -> bool:
+    """
+    Marks the file system which contains the given path.
+
+    :returns: Whether rename events are supported.
+    """
+
+    path_bytes = os.fsencode(path)
+    flags = FAN_MARK_ADD | FAN_MARK_FILESYSTEM
+
+    if libc.fanotify_mark(fd, flags, BASE_MASK | FAN_RENAME, AT_FDCWD, path_bytes) == 0:
+        return True
+
+    if ctypes.get_errno() != errno.EINVAL:
+        _raise_errno(path)
+
+    # FAN_RENAME is not supported, fall back to separate move events
+    mask = BASE_MASK | FAN_MOVED_FROM | FAN_MOVED_TO
+
+    if libc.fanotify_mark(fd, flags, mask, AT_FDCWD, path_bytes) != 0:
+        _raise_errno(path)
+
+    return False
+
+
+def _open_by_handle(mount_fd: int, handle: bytes) -> str:
+    """
+    Resolves a file handle to a path.
+
+    :param mount_fd: File descriptor of any item on the same file system.
+    :param handle: File handle as a packed ``struct file_handle``.
+    :returns: Current path of the item.
+    """
+
+    fd = libc.open_by_handle_at(mount_fd, handle, O_PATH)
+
+    if fd < 0:
+        _raise_errno()
+
+    try:
+        return os.readlink(f"/proc/self/fd/{fd}")
+    finally:
+        os.close(fd)
+
+
+def _name_to_handle(path: str) -> bytes:
+    """Returns the file handle for a path as a packed ``struct file_handle``."""
+
+    buffer = ctypes.create_string_buffer(
+        FILE_HANDLE_HEADER.pack(MAX_HANDLE_SZ, 0),
+        FILE_HANDLE_HEADER.size + MAX_HANDLE_SZ,
+    )
+    mount_id = ctypes.c_int()
+
+    if libc.name_to_handle_at(
+        AT_FDCWD, os.fsencode(path), buffer, ctypes.byref(mount_id), 0
+    ):
+        _raise_errno(path)
+
+    handle_bytes, _ = FILE_HANDLE_HEADER.unpack_from(buffer.raw)
+
+    return buffer.raw[: FILE_HANDLE_HEADER.size + handle_bytes]
+
+
+def check_available(path: str) -> None:
+    """
+    Checks if fanotify can be used to watch the given directory. This requires
+    privileges to mark the file system and to resolve file handles.
+
+    :param path: Directory to watch.
+    :raises OSError: if fanotify is not available, for instance due to missing
+        privileges.
+    """
+
+    fd = _fanotify_init()
+
+    try:
+        _fanotify_mark(fd, path)
+    finally:
+        os.close(fd)
+
+    mount_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+
+    try:
+        _open_by_handle(mount_fd, _name_to_handle(path))
+    finally:
+        os.close(mount_fd)
+
+
+# ==== emitter and observer ============================================================
+
+
+class FanotifyEmitter(EventEmitter):
+    """
+    Fanotify based file system event emitter. Only recursive watches are supported.
+
+    :param event_queue: The event queue to populate with generated events.
+    :param watch: The watch to observe and produce events for.
+    :param timeout: Timeout in seconds between successive attempts at reading events.
+    :param overflow_callback: Callable without arguments which is called from a
+        separate thread when the kernel's event queue has overflown and events have
+        been lost.
+    """
+
+    def __init__(
+        self,
+        event_queue,
+        watch,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+        overflow_callback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        super().__init__(event_queue, watch, timeout)
+
+        self._overflow_callback = overflow_callback
+
+        self._root = osp.realpath(watch.path)
+        self._fd = -1
+        self._mount_fd = -1
+        self._wakeup_r = -1
+        self._wakeup_w = -1
+        self._supports_rename = False
+
+        # maps directory handles to paths, cleared when directories are moved
+        self._dir_cache = LRUCache(capacity=10000)
+
+        self._n_events = 0
+        self._n_filtered = 0
+        self._n_batches = 0
+        self._n_overflows = 0
+        self._n_stale = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Number of read batches, raw fanotify events, events outside of the watched
+        folder, events whose directory could no longer be resolved and queue
+        overflows.
+        """
+        return dict(
+            batches=self._n_batches,
+            events=self._n_events,
+            filtered=self._n_filtered,
+            stale=self._n_stale,
+            overflows=self._n_overflows,
+        )
+
+    # ---- thread lifecycle ------------------------------------------------------------
+
+    def on_thread_start(self) -> None:
+
+        self._fd = _fanotify_init()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+        try:
+            self._supports_rename = _fanotify_mark(self._fd, self._root)
+            self._mount_fd = os.open(self._root, os.O_RDONLY | os.O_DIRECTORY)
+        except Exception:
+            self._close()
+            raise
+
+    def on_thread_stop(self) -> None:
+        if self._wakeup_w >= 0:
+            try:
+                os.write(self._wakeup_w, b"\0")
+            except OSError:
+                pass
+
+    def run(self) -> None:
+        try:
+            super().run()
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+
+        for fd in (self._fd, self._mount_fd, self._wakeup_r, self._wakeup_w):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+        self._fd = self._mount_fd = self._wakeup_r = self._wakeup_w = -1
+
+    # ---- reading events --------------------------------------------------------------
+
+    def queue_events(self, timeout: float) -> None:
+
+        readable, _, _ = select.select([self._fd, self._wakeup_r], [], [], timeout)
+
+        if self._fd not in readable or not self.should_keep_running():
+            return
+
+        try:
+            data = os.read(self._fd, READ_BUFFER_SIZE)
+        except BlockingIOError:
+            return
+
+        self._n_batches += 1
+        self._process(data)
+
+    def _process(self, data: bytes) -> None:
+
+        offset = 0
+
+        while offset + EVENT_METADATA.size <= len(data):
+            event_len, _, _, metadata_len, mask, fd, _ = EVENT_METADATA.unpack_from(
+                data, offset
+            )
+
+            if fd >= 0:
+                os.close(fd)
+
+            infos = self._parse_infos(data, offset + metadata_len, offset + event_len)
+            offset += event_len
+
+            self._n_events += 1
+            self._handle_event(mask, infos)
+
+    @staticmethod
+    def _parse_infos(data: bytes, start: int, end: int) -> Dict[int, Tuple[bytes, str]]:
+        """
+        Parses the info records of an event.
+
+        :returns: Mapping of info type to the directory handle and item name.
+        """
+
+        infos = dict()
+
+        while start + INFO_HEADER.size <= end:
+            info_type, _, length = INFO_HEADER.unpack_from(data, start)
+
+            if length == 0:
+                break
+
+            handle_start = start + INFO_HEADER.size + FSID_SIZE
+            handle_bytes, _ = FILE_HANDLE_HEADER.unpack_from(data, handle_start)
+            handle_end = handle_start + FILE_HANDLE_HEADER.size + handle_bytes
+
+            handle = data[handle_start:handle_end]
+            name = data[handle_end : start + length].split(b"\0", 1)[0]
+
+            infos[info_type] = (handle, os.fsdecode(name))
+            start += length
+
+        return infos
+
+    def _resolve(self, info: Tuple[bytes, str]) -> Optional[str]:
+        """
+        Returns the path of an item from its directory handle and name or None if the
+        item is outside of the watched folder or its directory no longer exists.
+        """
+
+        handle, name = info
+        dirname = self._dir_cache.get(handle)
+
+        if dirname is None:
+            try:
+                dirname = _open_by_handle(self._mount_fd, handle)
+            except OSError:
+                self._n_stale += 1
+                return None
+            self._dir_cache.put(handle, dirname)
+
+        if dirname != self._root and not dirname.startswith(self._root + "/"):
+            self._n_filtered += 1
+            return None
+
+        return osp.join(dirname, name) if name and name != "." else dirname
+
+    def _handle_event(self, mask: int, infos: Dict[int, Tuple[bytes, str]]) -> None:
+
+        if mask & FAN_Q_OVERFLOW:
+            self._on_overflow()
+            return
+
+        is_dir = bool(mask & FAN_ONDIR)
+
+        if mask & FAN_RENAME:
+            self._on_rename(infos, is_dir)
+            return
+
+        try:
+            path = self._resolve(infos[FAN_EVENT_INFO_TYPE_DFID_NAME])
+        except KeyError:
+            return
+
+        if path is None:
+            return
+
+        if mask & (FAN_DELETE_SELF | FAN_MOVE_SELF):
+            if path == self._root:
+                self.queue_event(DirDeletedEvent(path))
+                self.stop()
+            return
+
+        if path == self._root:
+            # change to the watched directory itself
+            return
+
+        created = mask & (FAN_CREATE | FAN_MOVED_TO)
+        deleted = mask & (FAN_DELETE | FAN_MOVED_FROM)
+
+        if created and deleted:
+            # Events for the same item may be merged by the kernel. Order them based
+            # on whether the item still exists.
+            if osp.lexists(path):
+                self._on_deleted(path, is_dir)
+                self._on_created(path, is_dir)
+            else:
+                self._on_created(path, is_dir)
+                self._on_deleted(path, is_dir)
+        elif created:
+            self._on_created(path, is_dir)
+        elif deleted:
+            self._on_deleted(path, is_dir)
+
+        if mask & (FAN_MODIFY | FAN_ATTRIB):
+            if is_dir:
+                self.queue_event(DirModifiedEvent(path))
+            else:
+                self.queue_event(FileModifiedEvent(path))
+
+    def _on_rename(self, infos: Dict[int, Tuple[bytes, str]], is_dir: bool) -> None:
+
+        src_path = dest_path = None
+
+        if FAN_EVENT_INFO_TYPE_OLD_DFID_NAME in infos:
+            src_path = self._resolve(infos[FAN_EVENT_INFO_TYPE_OLD_DFID_NAME])
+        if FAN_EVENT_INFO_TYPE_NEW_DFID_NAME in infos:
+            dest_path = self._resolve(infos[FAN_EVENT_INFO_TYPE_NEW_DFID_NAME])
+
+        if is_dir:
+            # cached paths of the moved folder and its children are outdated
+            self._dir_cache.clear()
+
+        if src_path and dest_path:
+            if is_dir:
+                self.queue_event(DirMovedEvent(src_path, dest_path))
+            else:
+                self.queue_event(FileMovedEvent(src_path, dest_path))
+        elif src_path:
+            self._on_deleted(src_path, is_dir)
+        elif dest_path:
+            self._on_created(dest_path, is_dir)
+
+    def _on_created(self, path: str, is_dir: bool) -> None:
+
+        if not is_dir:
+            self.queue_event(FileCreatedEvent(path))
+            return
+
+        self.queue_event(DirCreatedEvent(path))
+
+        # a folder which is moved in from outside may have content
+        for event in _walk_created_events(path):
+            self.queue_event(event)
+
+    def _on_deleted(self, path: str, is_dir: bool) -> None:
+
+        if is_dir:
+            self._dir_cache.clear()
+            self.queue_event(DirDeletedEvent(path))
+        else:
+            self.queue_event(FileDeletedEvent(path))
+
+    def _on_overflow(self) -> None:
+
+        self._n_overflows += 1
+        logger.warning("Fanotify event queue overflow, events may have been lost")
+
+        if self._overflow_callback:
+            thread = threading.Thread(
+                target=self._overflow_callback,
+                name="maestral-fanotify-overflow",
+                daemon=True,
+            )
+            thread.start()
+
+
+def _walk_created_events(path: str) -> List[FileSystemEvent]:
+    """Returns created events for all items inside of a folder."""
+
+    events = []
+    stack = [path]
+
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_dir:
+                events.append(DirCreatedEvent(entry.path))
+                stack.append(entry.path)
+            else:
+                events.append(FileCreatedEvent(entry.path))
+
+    return events
+
+
+class FanotifyObserver(BaseObserver):
+    """
+    Observer which uses :class:`FanotifyEmitter`.
+
+    :param timeout: Timeout in seconds between successive attempts at reading events.
+    :param overflow_callback: Callable without arguments which is called when events
+        have been lost due to a queue overflow.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+        overflow_callback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        emitter_class = functools.partial(
+            FanotifyEmitter, overflow_callback=overflow_callback
+        )
+        super().__init__(emitter_class=emitter_class, timeout=timeout)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Statistics of all emitters, see :attr:`FanotifyEmitter.stats`."""
+
+        stats: Dict[str, int] = dict()
+
+        for emitter in self.emitters:
+            for key, value in emitter.stats.items():
+                stats[key] = stats.get(key, 0) + value
+
+        return stats
@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides an inotify based file system event emitter for Linux which is
+tuned for large directory trees. In contrast to watchdog's inotify emitter, it
+
+* reads events from the inotify file descriptor in large batches,
+* stores watches as a tree so that moving a folder only updates a single node instead
+  of the paths of all watched subfolders,
+* adds watches for new subtrees in parallel on worker threads while events continue
+  to be read, emitting created events for items which appeared before the watch was
+  added,
+* pairs ``IN_MOVED_FROM`` and ``IN_MOVED_TO`` events by their cookie and emits moved
+  events directly, and
+* calls an overflow callback, for instance to trigger a rescan, instead of silently
+  losing events when the kernel queue overflows.
+
+Statistics about the number of watches, read batches and queue overflows are available
+from :attr:`InotifyObserver.stats`.
+"""
+
+import os
+import os.path as osp
+import ctypes
+import ctypes.util
+import errno
+import functools
+import logging
+import select
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import Optional, Dict, List, Tuple, Callable, Set
+
+from watchdog.events import (  # type: ignore
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+)
+from watchdog.observers.api import (  # type: ignore
+    EventEmitter,
+    BaseObserver,
+    DEFAULT_OBSERVER_TIMEOUT,
+)
+from watchdog.utils import UnsupportedLibc  # type: ignore
+
+
+__all__ = ["InotifyEmitter", "InotifyObserver"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==== inotify bindings ================================================================
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o0004000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+READ_BUFFER_SIZE = 256 * 1024
+MOVE_PAIRING_TIMEOUT = 0.05
+
+
+def _load_libc() -> ctypes.CDLL:
+
+    libc_name = ctypes.util.find_library("c") or "libc.so.6"
+
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+    except OSError:
+        raise UnsupportedLibc(f"Could not load {libc_name}")
+
+    if not all(
+        hasattr(libc, name)
+        for name in ("inotify_init1", "inotify_add_watch", "inotify_rm_watch")
+    ):
+        raise UnsupportedLibc(f"{libc_name} does not support inotify")
+
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+    return libc
+
+
+libc = _load_libc()
+
+
+def _raise_errno(path: Optional[str] = None) -> None:
+    err = ctypes.get_errno()
+    raise OSError(err, os.strerror(err), path)
+
+
+# ==== watch tree ======================================================================
+
+
+class _Watch:
+    """
+    A watched directory. Watches form a tree which mirrors the watched directory tree.
+    The path of a watch is determined from its ancestors, such that moving a directory
+    only requires updating the parent and name of a single watch.
+    """
+
+    __slots__ = ("wd", "name", "parent", "children")
+
+    def __init__(self, wd: int, name: str, parent: Optional["_Watch"]) -> None:
+        self.wd = wd
+        self.name = name
+        self.parent = parent
+        self.children: Dict[str, "_Watch"] = dict()
+
+    @property
+    def path(self) -> str:
+        names = []
+        watch: Optional[_Watch] = self
+
+        while watch is not None:
+            names.append(watch.name)
+            watch = watch.parent
+
+        return osp.join(*reversed(names))
+
+    def walk(self) -> List["_Watch"]:
+        """Returns this watch and all its descendants."""
+
+        watches = []
+        stack = [self]
+
+        while stack:
+            watch = stack.pop()
+            watches.append(watch)
+            stack.extend(watch.children.values())
+
+        return watches
+
+
+# ==== emitter and observer ============================================================
+
+
+class InotifyEmitter(EventEmitter):
+    """
+    Inotify based file system event emitter. Only recursive watches are supported.
+
+    :param event_queue: The event queue to populate with generated events.
+    :param watch: The watch to observe and produce events for.
+    :param timeout: Timeout in seconds between successive attempts at reading events.
+    :param overflow_callback: Callable without arguments which is called from a
+        separate thread when the kernel's event queue has overflown and events have
+        been lost.
+    :param max_workers: Number of threads used to list new directory trees.
+    """
+
+    def __init__(
+        self,
+        event_queue,
+        watch,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+        overflow_callback: Optional[Callable[[], None]] = None,
+        max_workers: int = 4,
+    ) -> None:
+        super().__init__(event_queue, watch, timeout)
+
+        self._overflow_callback = overflow_callback
+        self._max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._fd = -1
+        self._wakeup_r = -1
+        self._wakeup_w = -1
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._root: Optional[_Watch] = None
+        self._watches: Dict[int, _Watch] = dict()
+        self._moved_from: Dict[int, Tuple[_Watch, str, str, bool]] = dict()
+
+        self._n_events = 0
+        self._n_batches = 0
+        self._n_overflows = 0
+        self._n_failed_watches = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Number of active watches, watches which could not be added, read batches, raw
+        inotify events and queue overflows.
+        """
+        return dict(
+            watches=len(self._watches),
+            failed_watches=self._n_failed_watches,
+            batches=self._n_batches,
+            events=self._n_events,
+            overflows=self._n_overflows,
+        )
+
+    # ---- thread lifecycle ------------------------------------------------------------
+
+    def on_thread_start(self) -> None:
+        # Runs in the thread which starts the emitter. Errors, for instance from
+        # reaching the inotify watch limit, are therefore raised from Observer.start().
+
+        self._fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+
+        if self._fd < 0:
+            _raise_errno()
+
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="maestral-inotify"
+        )
+
+        try:
+            path = self.watch.path
+            self._root = self._add_watch(path, parent=None, name=path)
+            self._add_watches_recursive(self._root, emit=False, strict=True)
+        except Exception:
+            self._close()
+            raise
+
+    def on_thread_stop(self) -> None:
+        if self._wakeup_w >= 0:
+            try:
+                os.write(self._wakeup_w, b"\0")
+            except OSError:
+                pass
+
+    def run(self) -> None:
+        try:
+            super().run()
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        for fd in (self._fd, self._wakeup_r, self._wakeup_w):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+        self._fd = self._wakeup_r = self._wakeup_w = -1
+
+    # ---- reading events --------------------------------------------------------------
+
+    def _read(self, timeout: float) -> Optional[bytes]:
+        """
+        Waits for events and reads all available events in a single batch.
+
+        :param timeout: Maximum time to wait in seconds.
+        :returns: Raw event data or None if no events are available.
+        """
+
+        readable, _, _ = select.select([self._fd, self._wakeup_r], [], [], timeout)
+
+        if self._fd not in readable:
+            return None
+
+        try:
+            data = os.read(self._fd, READ_BUFFER_SIZE)
+        except BlockingIOError:
+            return None
+
+        self._n_batches += 1
+
+        return data
+
+    def queue_events(self, timeout: float) -> None:
+
+        data = self._read(timeout)
+
+        if not self.should_keep_running():
+            return
+
+        if data:
+            self._process(data)
+
+        # the matching IN_MOVED_TO may be part of the next batch
+        while self._moved_from and self.should_keep_running():
+            data = self._read(MOVE_PAIRING_TIMEOUT)
+            if not data:
+                break
+            self._process(data)
+
+        self._flush_moved_from()
+
+    def _process(self, data: bytes) -> None:
+
+        offset = 0
+
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            self._n_events += 1
+            self._handle_event(wd, mask, cookie, name)
+
+    def _handle_event(self, wd: int, mask: int, cookie: int, name: str) -> None:
+
+        if mask & IN_Q_OVERFLOW:
+            self._on_overflow()
+            return
+
+        watch = self._watches.get(wd)
+
+        if watch is None:
+            # watch has already been removed
+            return
+
+        if mask & IN_IGNORED:
+            self._forget(watch)
+            return
+
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            # children are reported by their parent, only handle the root
+            if watch is self._root:
+                self.queue_event(DirDeletedEvent(watch.path))
+                self.stop()
+            return
+
+        if not name:
+            # change to the watched directory itself, reported by its parent
+            return
+
+        is_dir = bool(mask & IN_ISDIR)
+        path = osp.join(watch.path, name)
+
+        if mask & IN_MOVED_FROM:
+            self._moved_from[cookie] = (watch, name, path, is_dir)
+
+        elif mask & IN_MOVED_TO:
+            try:
+                src_watch, src_name, src_path, _ = self._moved_from.pop(cookie)
+            except KeyError:
+                # moved in from outside of the watched tree
+                self._on_created(watch, name, path, is_dir)
+            else:
+                if is_dir:
+                    with self._lock:
+                        child = src_watch.children.pop(src_name, None)
+                        if child:
+                            child.parent = watch
+                            child.name = name
+                            watch.children[name] = child
+                    self.queue_event(DirMovedEvent(src_path, path))
+                else:
+                    self.queue_event(FileMovedEvent(src_path, path))
+
+        elif mask & IN_CREATE:
+            self._on_created(watch, name, path, is_dir)
+
+        elif mask & IN_DELETE:
+            if is_dir:
+                self.queue_event(DirDeletedEvent(path))
+            else:
+                self.queue_event(FileDeletedEvent(path))
+
+        elif mask & (IN_MODIFY | IN_ATTRIB):
+            if is_dir:
+                self.queue_event(DirModifiedEvent(path))
+            else:
+                self.queue_event(FileModifiedEvent(path))
+
+    def _on_created(self, parent: _Watch, name: str, path: str, is_dir: bool) -> None:
+
+        if not is_dir:
+            self.queue_event(FileCreatedEvent(path))
+            return
+
+        self.queue_event(DirCreatedEvent(path))
+
+        try:
+            watch = self._add_watch(path, parent, name)
+        except OSError as exc:
+            self._on_watch_error(exc)
+        else:
+            # items may have been created before the watch was added
+            self._add_watches_async(watch, emit=True)
+
+    def _flush_moved_from(self) -> None:
+        """Emits deleted events for items which were moved out of the watched tree."""
+
+        for watch, name, path, is_dir in self._moved_from.values():
+            if is_dir:
+                with self._lock:
+                    child = watch.children.pop(name, None)
+                if child:
+                    self._remove_watches(child)
+                self.queue_event(DirDeletedEvent(path))
+            else:
+                self.queue_event(FileDeletedEvent(path))
+
+        self._moved_from.clear()
+
+    def _on_overflow(self) -> None:
+
+        self._n_overflows += 1
+        logger.warning("Inotify event queue overflow, events may have been lost")
+
+        # we may have missed new directories, make sure that they are watched
+        self._moved_from.clear()
+
+        if self._root:
+            self._add_watches_async(self._root, emit=False)
+
+        if self._overflow_callback:
+            thread = threading.Thread(
+                target=self._overflow_callback,
+                name="maestral-inotify-overflow",
+                daemon=True,
+            )
+            thread.start()
+
+    # ---- watch management ------------------------------------------------------------
+
+    def _add_watch(self, path: str, parent: Optional[_Watch], name: str) -> _Watch:
+
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+
+        if wd < 0:
+            _raise_errno(path)
+
+        with self._lock:
+            try:
+                watch = self._watches[wd]
+            except KeyError:
+                watch = _Watch(wd, name, parent)
+                self._watches[wd] = watch
+
+            if parent:
+                watch.parent = parent
+                watch.name = name
+                parent.children[name] = watch
+
+        return watch
+
+    def _on_watch_error(self, exc: OSError) -> None:
+
+        if exc.errno in (errno.ENOENT, errno.ENOTDIR):
+            # directory was already deleted or replaced
+            return
+
+        self._n_failed_watches += 1
+
+        if self._n_failed_watches == 1:
+            logger.error("Could not watch %s: %s", exc.filename, exc.strerror)
+
+    def _scan(self, watch: _Watch, emit: bool, strict: bool) -> List[_Watch]:
+        """
+        Adds watches for all subdirectories of a watched directory.
+
+        :param watch: Watch of the directory to scan.
+        :param emit: Whether to emit created events for all items found.
+        :param strict: Whether to raise errors when watches cannot be added.
+        :returns: Watches of all subdirectories.
+        """
+
+        path = watch.path
+        child_watches = []
+
+        try:
+            entries = list(os.scandir(path))
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        except OSError as exc:
+            if strict:
+                raise
+            self._on_watch_error(exc)
+            return []
+
+        for entry in entries:
+
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if not is_dir:
+                if emit:
+                    self.queue_event(FileCreatedEvent(entry.path))
+                continue
+
+            if emit:
+                self.queue_event(DirCreatedEvent(entry.path))
+
+            try:
+                child_watches.append(self._add_watch(entry.path, watch, entry.name))
+            except OSError as exc:
+                if strict and exc.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    raise
+                self._on_watch_error(exc)
+
+        return child_watches
+
+    def _add_watches_recursive(
+        self, watch: _Watch, emit: bool, strict: bool = False
+    ) -> None:
+        """
+        Adds watches for all subdirectories of a watched directory. Directories are
+        listed in parallel.
+
+        :param watch: Watch of the root of the subtree.
+        :param emit: Whether to emit created events for all items found.
+        :param strict: Whether to raise errors when watches cannot be added.
+        """
+
+        child_watches = self._scan(watch, emit, strict)
+
+        if not child_watches or not self._executor:
+            return
+
+        pending: Set[Future] = {
+            self._executor.submit(self._scan, w, emit, strict) for w in child_watches
+        }
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                for w in future.result():
+                    pending.add(self._executor.submit(self._scan, w, emit, strict))
+
+    def _add_watches_async(self, watch: _Watch, emit: bool) -> None:
+        """
+        Adds watches for all subdirectories of a watched directory on worker threads
+        and returns immediately. This keeps the reader thread free to read events while
+        large subtrees are scanned.
+
+        :param watch: Watch of the root of the subtree.
+        :param emit: Whether to emit created events for all items found.
+        """
+
+        executor = self._executor
+
+        if not executor:
+            return
+
+        try:
+            executor.submit(self._scan_async, watch, emit)
+        except RuntimeError:
+            # executor has been shut down
+            pass
+
+    def _scan_async(self, watch: _Watch, emit: bool) -> None:
+
+        if not self.should_keep_running():
+            return
+
+        try:
+            child_watches = self._scan(watch, emit, strict=False)
+        except Exception:
+            logger.error("Could not scan %s", watch.path, exc_info=True)
+            return
+
+        for w in child_watches:
+            self._add_watches_async(w, emit)
+
+    def _remove_watches(self, watch: _Watch) -> None:
+        """Removes a watch and all watches of its subdirectories."""
+
+        with self._lock:
+            for w in watch.walk():
+                libc.inotify_rm_watch(self._fd, w.wd)
+                self._watches.pop(w.wd, None)
+
+    def _forget(self, watch: _Watch) -> None:
+        """Forgets a watch which has been removed by the kernel."""
+
+        with self._lock:
+            self._watches.pop(watch.wd, None)
+
+            parent = watch.parent
+            if parent and parent.children.get(watch.name) is watch:
+                del parent.children[watch.name]
+
+
+class InotifyObserver(BaseObserver):
+    """
+    Observer which uses :class:`InotifyEmitter`.
+
+    :param timeout: Timeout in seconds between successive attempts at reading events.
+    :param overflow_callback: Callable without arguments which is called when events
+        have been lost due to a queue overflow.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+        overflow_callback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        emitter_class = functools.partial(
+            InotifyEmitter, overflow_callback=overflow_callback
+        )
+        super().__init__(emitter_class=emitter_class, timeout=timeout)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Statistics of all emitters, see :attr:`InotifyEmitter.stats`."""
+
+        stats: Dict[str, int] = dict()
+
+        for emitter in self.emitters:
+            for key, value in emitter.stats.items():
+                stats[key] = stats.get(key, 0) + value
+
+        return stats
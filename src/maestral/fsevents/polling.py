@@ -60,6 +60,15 @@ into Deleted and Created events by Maestral.
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import os.path as osp
+import sys
+import time
+import threading
+import functools
+from typing import Dict, List, Tuple, Optional
+
+from watchdog.observers.api import EventEmitter, DEFAULT_EMITTER_TIMEOUT  # type: ignore
 from watchdog.observers.polling import (  # type: ignore
     PollingEmitter,
     PollingObserver,
@@ -133,3 +142,343 @@ class OrderedPollingObserver(PollingObserver):
         BaseObserver.__init__(
             self, emitter_class=OrderedPollingEmitter, timeout=timeout
         )
+
+
+# ==== incremental polling =============================================================
+
+_DIR = -1
+"""Size which marks a directory entry in the snapshot."""
+
+_MTIME_GRANULARITY_NS = 2_000_000_000
+"""Coarsest mtime resolution that we expect, e.g., on FAT or SMB file systems."""
+
+_Entry = Tuple[int, int, int]
+"""Snapshot entry of an item: inode, mtime in ns and size or :data:`_DIR`."""
+
+
+class IncrementalPollingEmitter(EventEmitter):
+    """Incremental polling file system event emitter
+
+    Platform-independent emitter that polls a directory to detect file system changes.
+    Instead of taking a full snapshot on every poll, it only stats the known
+    directories and lists those whose mtime changed. Adding, removing or renaming an
+    item always changes the mtime of its parent directory. Modifying the content of a
+    file does not, such changes are therefore only detected by a full scan of all
+    directories every ``full_scan_interval`` polls.
+
+    The snapshot stores the interned names of the items in each directory, together with
+    their inode, mtime and size, instead of full paths and stat results for every item.
+    Events are emitted in the same order as by :class:`OrderedPollingEmitter`. Moved or
+    deleted directories result in a single event for the directory itself.
+
+    :param event_queue: Queue to which events are added.
+    :param watch: Watch to emit events for.
+    :param timeout: Interval between polls in seconds.
+    :param full_scan_interval: Number of polls between full scans. Set to zero to
+        disable full scans.
+    """
+
+    def __init__(
+        self,
+        event_queue,
+        watch,
+        timeout: float = DEFAULT_EMITTER_TIMEOUT,
+        full_scan_interval: int = 10,
+    ) -> None:
+        super().__init__(event_queue, watch, timeout)
+        self.full_scan_interval = full_scan_interval
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, Tuple[int, int]] = dict()
+        self._entries: Dict[str, Dict[str, _Entry]] = dict()
+        self._n_polls = 0
+        self._stats = {"polls": 0, "dirs": 0, "dirs_listed": 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistics of the emitter: the number of polls, the number of directories in the
+        snapshot and the number of directories listed since the initial scan.
+        """
+        stats = self._stats.copy()
+        stats["dirs"] = len(self._dirs)
+        return stats
+
+    def on_thread_start(self) -> None:
+        with self._lock:
+            self._add_tree(self.watch.path)
+            self._stats["dirs_listed"] = 0
+
+    def queue_events(self, timeout: float) -> None:
+        # timeout behaves like an interval for polling emitters
+        if self.stopped_event.wait(timeout):
+            return
+
+        with self._lock:
+            if not self.should_keep_running():
+                return
+
+            try:
+                os.stat(self.watch.path)
+            except OSError:
+                self.queue_event(DirDeletedEvent(self.watch.path))
+                self.stop()
+                return
+
+            self._n_polls += 1
+            self._stats["polls"] += 1
+
+            full_scan = (
+                self.full_scan_interval > 0
+                and self._n_polls % self.full_scan_interval == 0
+            )
+
+            if full_scan:
+                changed = list(self._dirs)
+            else:
+                changed = []
+                for path, (_, mtime) in self._dirs.items():
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        # Deletion or move will be detected from the parent.
+                        continue
+                    if stat.st_mtime_ns != mtime:
+                        changed.append(path)
+
+            self._process_changes(changed)
+
+    # ---- snapshot ------------------------------------------------------------------
+
+    def _list_dir(self, path: str) -> Tuple[os.stat_result, Dict[str, _Entry]]:
+        # Stat before listing so that changes during listing are picked up by the
+        # next poll.
+        stat = os.stat(path)
+        entries: Dict[str, _Entry] = dict()
+
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries[sys.intern(entry.name)] = (entry.inode(), 0, _DIR)
+                    else:
+                        s = entry.stat(follow_symlinks=False)
+                        entries[sys.intern(entry.name)] = (
+                            s.st_ino,
+                            s.st_mtime_ns,
+                            s.st_size,
+                        )
+                except OSError:
+                    # Item was removed during listing.
+                    continue
+
+        self._stats["dirs_listed"] += 1
+
+        return stat, entries
+
+    def _store_listing(
+        self, path: str, stat: os.stat_result, entries: Dict[str, _Entry]
+    ) -> None:
+        mtime = stat.st_mtime_ns
+
+        # time.time_ns() requires Python 3.7
+        if abs(int(time.time() * 1e9) - mtime) < _MTIME_GRANULARITY_NS:
+            # Further changes within the mtime resolution would go unnoticed, list
+            # the directory again on the next poll.
+            mtime = -1
+
+        self._dirs[path] = (stat.st_ino, mtime)
+        self._entries[path] = entries
+
+    def _add_tree(self, path: str, created: Optional[List[Tuple[str, bool]]] = None):
+        stack = [path]
+
+        while stack:
+            dir_path = stack.pop()
+
+            try:
+                stat, entries = self._list_dir(dir_path)
+            except OSError:
+                continue
+
+            self._store_listing(dir_path, stat, entries)
+
+            for name, (_, _, size) in entries.items():
+                child_path = osp.join(dir_path, name)
+                if size == _DIR:
+                    stack.append(child_path)
+                if created is not None:
+                    created.append((child_path, size == _DIR))
+
+    def _pop_tree(self, path: str) -> Dict[str, Tuple[Tuple[int, int], dict]]:
+        """Removes a directory tree from the snapshot and returns it by relative path."""
+
+        tree = dict()
+        stack = [path]
+
+        while stack:
+            dir_path = stack.pop()
+
+            try:
+                dir_info = self._dirs.pop(dir_path)
+                entries = self._entries.pop(dir_path)
+            except KeyError:
+                continue
+
+            tree[dir_path[len(path) :]] = (dir_info, entries)
+
+            for name, (_, _, size) in entries.items():
+                if size == _DIR:
+                    stack.append(osp.join(dir_path, name))
+
+        return tree
+
+    # ---- diff ----------------------------------------------------------------------
+
+    def _process_changes(self, changed: List[str]) -> None:
+
+        deleted: List[Tuple[str, _Entry]] = []
+        created: List[Tuple[str, _Entry]] = []
+        files_modified: List[str] = []
+        dirs_modified: List[str] = []
+
+        for dir_path in changed:
+            try:
+                old_ino, _ = self._dirs[dir_path]
+                old_entries = self._entries[dir_path]
+                stat, new_entries = self._list_dir(dir_path)
+            except (KeyError, OSError):
+                continue
+
+            if stat.st_ino != old_ino:
+                # Directory was replaced, this will be detected from the parent.
+                continue
+
+            self._store_listing(dir_path, stat, new_entries)
+
+            if new_entries == old_entries:
+                continue
+
+            n_changed = len(deleted) + len(created)
+
+            for name, old in old_entries.items():
+                new = new_entries.get(name)
+                if not _same_item(old, new):
+                    deleted.append((osp.join(dir_path, name), old))
+                elif old != new and old[2] != _DIR:
+                    files_modified.append(osp.join(dir_path, name))
+
+            for name, new in new_entries.items():
+                if not _same_item(old_entries.get(name), new):
+                    created.append((osp.join(dir_path, name), new))
+
+            if len(deleted) + len(created) > n_changed:
+                dirs_modified.append(dir_path)
+
+        files_deleted: List[str] = []
+        files_moved: List[Tuple[str, str]] = []
+        dirs_deleted: List[str] = []
+        dirs_moved: List[Tuple[str, str]] = []
+
+        # Pair deleted and created items by inode. Hard links share an inode, only
+        # one created item per inode is paired.
+        created_by_inode = {new[0]: i for i, (_, new) in enumerate(created)}
+        paired = set()
+
+        for path, old in deleted:
+            i = created_by_inode.get(old[0])
+            match = created[i] if i is not None else None
+
+            if match and _same_item(old, match[1]):
+                del created_by_inode[old[0]]
+                paired.add(i)
+                if old[2] == _DIR:
+                    dirs_moved.append((path, match[0]))
+                else:
+                    if match[1] != old:
+                        files_modified.append(path)
+                    files_moved.append((path, match[0]))
+            elif old[2] == _DIR:
+                dirs_deleted.append(path)
+            else:
+                files_deleted.append(path)
+
+        # Update the snapshot: remove deleted trees, then move trees in two steps to
+        # support swapping items, and finally list created trees.
+
+        for path in dirs_deleted:
+            self._pop_tree(path)
+
+        moved_trees = [(dest, self._pop_tree(src)) for src, dest in dirs_moved]
+
+        for dest, tree in moved_trees:
+            for rel_path, (dir_info, entries) in tree.items():
+                self._dirs[dest + rel_path] = dir_info
+                self._entries[dest + rel_path] = entries
+
+        created_items: List[Tuple[str, bool]] = []
+
+        for i, (path, new) in enumerate(created):
+            if i in paired:
+                continue
+            created_items.append((path, new[2] == _DIR))
+            if new[2] == _DIR:
+                self._add_tree(path, created_items)
+
+        for path in files_deleted:
+            self.queue_event(FileDeletedEvent(path))
+        for path in files_modified:
+            self.queue_event(FileModifiedEvent(path))
+        for src_path, dest_path in files_moved:
+            self.queue_event(FileMovedEvent(src_path, dest_path))
+        for path, is_dir in created_items:
+            if not is_dir:
+                self.queue_event(FileCreatedEvent(path))
+
+        for path in dirs_deleted:
+            self.queue_event(DirDeletedEvent(path))
+        for path in dirs_modified:
+            self.queue_event(DirModifiedEvent(path))
+        for src_path, dest_path in dirs_moved:
+            self.queue_event(DirMovedEvent(src_path, dest_path))
+        for path, is_dir in created_items:
+            if is_dir:
+                self.queue_event(DirCreatedEvent(path))
+
+
+def _same_item(old: Optional[_Entry], new: Optional[_Entry]) -> bool:
+    """Checks if two snapshot entries refer to the same file or folder."""
+    return (
+        old is not None
+        and new is not None
+        and old[0] == new[0]
+        and (old[2] == _DIR) == (new[2] == _DIR)
+    )
+
+
+class IncrementalPollingObserver(BaseObserver):
+    """
+    Observer which uses :class:`IncrementalPollingEmitter`.
+
+    :param timeout: Interval between polls in seconds.
+    :param full_scan_interval: Number of polls between full scans.
+    """
+
+    def __init__(
+        self, timeout: float = DEFAULT_OBSERVER_TIMEOUT, full_scan_interval: int = 10
+    ) -> None:
+        emitter_class = functools.partial(
+            IncrementalPollingEmitter, full_scan_interval=full_scan_interval
+        )
+        super().__init__(emitter_class=emitter_class, timeout=timeout)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Statistics of all emitters, see :attr:`IncrementalPollingEmitter.stats`."""
+
+        stats: Dict[str, int] = dict()
+
+        for emitter in self.emitters:
+            for key, value in emitter.stats.items():
+                stats[key] = stats.get(key, 0) + value
+
+        return stats
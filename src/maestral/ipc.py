@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides a status snapshot which is published by the sync daemon in a
+memory-mapped file. Clients such as the CLI, GUIs or file manager integrations can read
+the current status, sync errors and sync activity from the snapshot without a round
+trip to the daemon.
+
+The file starts with a fixed size header, followed by the JSON encoded snapshot:
+
+* magic bytes ``b"MSTS"``
+* format version, uint32
+* sequence number, uint64: odd while the publisher is writing
+* payload length, uint32
+* flags, uint32: :data:`FLAG_CLOSED` once the publisher has shut down
+
+Readers use the sequence number as a seqlock: a snapshot is only accepted if the
+sequence number was even and unchanged before and after copying the payload. The
+publisher never shrinks the file, mapped regions therefore always remain valid. A
+restarted publisher creates a new file and replaces the previous one.
+
+In addition, the daemon pushes incremental events to clients which are connected to
+its event socket, see :class:`EventSubscriber`. Each event is sent as a line of JSON
+with a "type" key:
+
+* "status": the keys "status", "running", "paused" and "connected" as returned by the
+  corresponding :class:`maestral.main.Maestral` properties.
+* "sync_errors": the current list of sync errors under the key "sync_errors".
+* "activity": changes to the items which are queued for or currently syncing. New
+  items are listed under "added", identified by their "id". The IDs of items which
+  finished syncing are listed under "removed" and "progress" contains pairs of IDs and
+  the number of bytes transferred so far.
+* "history": entries which were appended to the sync history under "entries".
+
+A subscriber first receives the current status, sync errors and activity. Subscribers
+can also call a small number of read-only methods of the daemon with
+:meth:`EventSubscriber.request`, for instance ``get_file_status_batch``.
+
+This module is imported by clients and must not import any heavy dependencies.
+"""
+
+import os
+import json
+import mmap
+import socket
+import struct
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Iterator, Deque
+
+from .utils.appdirs import get_runtime_path
+
+
+__all__ = [
+    "StatusPublisher",
+    "StatusReader",
+    "EventSubscriber",
+    "get_status_path",
+    "get_events_socket_path",
+    "read_status",
+    "FLAG_CLOSED",
+]
+
+
+MAGIC = b"MSTS"
+FORMAT_VERSION = 1
+FLAG_CLOSED = 1
+
+_header = struct.Struct("=4sIQII")
+_seq = struct.Struct("=Q")
+_length_flags = struct.Struct("=II")
+
+_SEQ_OFFSET = 8
+_LENGTH_OFFSET = 16
+_HEADER_SIZE = _header.size
+
+_INITIAL_CAPACITY = 64 * 1024
+
+
+def get_status_path(config_name: str) -> str:
+    """
+    Returns the path of the status snapshot for the given config. This is located in
+    the apps runtime directory + 'CONFIG_NAME.status'.
+
+    :param config_name: The config name.
+    :returns: Path of the status snapshot.
+    """
+    return get_runtime_path("maestral", f"{config_name}.status")
+
+
+def get_events_socket_path(config_name: str) -> str:
+    """
+    Returns the path of the socket for event subscriptions for the given config. This
+    is located in the apps runtime directory + 'CONFIG_NAME.events.sock'.
+
+    :param config_name: The config name.
+    :returns: Path of the events socket.
+    """
+    return get_runtime_path("maestral", f"{config_name}.events.sock")
+
+
+# ==== publisher =======================================================================
+
+
+class StatusPublisher:
+    """
+    Publishes status snapshots to a memory-mapped file. Only a single publisher may
+    write to a file at a time.
+
+    :param path: Path of the status file. Any existing file is replaced.
+    :param capacity: Initial capacity for the payload in bytes. The file grows as
+        required.
+    """
+
+    def __init__(self, path: str, capacity: int = _INITIAL_CAPACITY) -> None:
+
+        self.path = path
+        self._seq = 0
+        self._last_payload = b""
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+
+        try:
+            os.ftruncate(fd, _HEADER_SIZE + capacity)
+            self._mmap = mmap.mmap(fd, _HEADER_SIZE + capacity)
+        except BaseException:
+            os.close(fd)
+            os.unlink(tmp_path)
+            raise
+
+        self._fd = fd
+
+        _header.pack_into(self._mmap, 0, MAGIC, FORMAT_VERSION, 0, 0, 0)
+        os.replace(tmp_path, path)
+
+    @property
+    def seq(self) -> int:
+        """The sequence number of the last published snapshot."""
+        return self._seq
+
+    def publish(self, data: Dict[str, Any]) -> bool:
+        """
+        Publishes a new snapshot. Snapshots which are identical to the previous one are
+        not written. Snapshots should contain the PID of the publisher under the key
+        "pid" so that readers can detect snapshots of a publisher that has crashed.
+
+        :param data: JSON serializable snapshot.
+        :returns: Whether a new snapshot was written.
+        """
+
+        payload = json.dumps(data, separators=(",", ":")).encode()
+
+        if payload == self._last_payload:
+            return False
+
+        size = _HEADER_SIZE + len(payload)
+
+        if size > len(self._mmap):
+            self._grow(size)
+
+        self._write(payload, flags=0)
+        self._last_payload = payload
+
+        return True
+
+    def close(self, unlink: bool = True) -> None:
+        """
+        Marks the snapshot as closed so that readers stop using it.
+
+        :param unlink: Whether to remove the file.
+        """
+
+        if self._mmap.closed:
+            return
+
+        self._write(self._last_payload, flags=FLAG_CLOSED)
+
+        if unlink:
+            try:
+                # Only remove the file if it was not replaced by another publisher.
+                if os.stat(self.path).st_ino == os.fstat(self._fd).st_ino:
+                    os.unlink(self.path)
+            except OSError:
+                pass
+
+        self._mmap.close()
+        os.close(self._fd)
+
+    def _write(self, payload: bytes, flags: int) -> None:
+
+        self._seq += 1
+        _seq.pack_into(self._mmap, _SEQ_OFFSET, self._seq)
+
+        self._mmap[_HEADER_SIZE : _HEADER_SIZE + len(payload)] = payload
+        _length_flags.pack_into(self._mmap, _LENGTH_OFFSET, len(payload), flags)
+
+        self._seq += 1
+        _seq.pack_into(self._mmap, _SEQ_OFFSET, self._seq)
+
+    def _grow(self, size: int) -> None:
+
+        capacity = len(self._mmap)
+
+        while capacity < size:
+            capacity *= 2
+
+        self._mmap.close()
+        os.ftruncate(self._fd, capacity)
+        self._mmap = mmap.mmap(self._fd, capacity)
+
+
+# ==== reader ==========================================================================
+
+
+class StatusReader:
+    """
+    Reads status snapshots from a memory-mapped file. Reading does not block the
+    publisher and does not require any communication with the daemon.
+
+    :param path: Path of the status file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._ino = 0
+
+    @property
+    def seq(self) -> int:
+        """
+        The sequence number of the current snapshot or zero if there is none. This can
+        be used to check for changes before parsing the snapshot.
+        """
+        mm = self._map()
+
+        if mm is None:
+            return 0
+
+        return _seq.unpack_from(mm, _SEQ_OFFSET)[0]
+
+    def read(self, retries: int = 100) -> Optional[Dict[str, Any]]:
+        """
+        Reads the current snapshot.
+
+        :param retries: Number of attempts to read a consistent snapshot while the
+            publisher is writing.
+        :returns: The snapshot or ``None`` if no publisher is running.
+        """
+
+        try:
+            if os.stat(self.path).st_ino != self._ino:
+                # The publisher was restarted with a new file.
+                self.close()
+        except OSError:
+            self.close()
+            return None
+
+        reopened = False
+
+        for _ in range(retries):
+
+            mm = self._map()
+
+            if mm is None:
+                return None
+
+            seq1 = _seq.unpack_from(mm, _SEQ_OFFSET)[0]
+
+            if seq1 % 2 == 1:
+                time.sleep(0)
+                continue
+
+            length, flags = _length_flags.unpack_from(mm, _LENGTH_OFFSET)
+
+            if flags & FLAG_CLOSED:
+                # The publisher may have been restarted with a new file.
+                self.close()
+                if reopened:
+                    return None
+                reopened = True
+                continue
+
+            if _HEADER_SIZE + length > len(mm):
+                # The file has grown since we mapped it.
+                self.close()
+                continue
+
+            payload = mm[_HEADER_SIZE : _HEADER_SIZE + length]
+            seq2 = _seq.unpack_from(mm, _SEQ_OFFSET)[0]
+
+            if seq1 != seq2:
+                continue
+
+            if length == 0:
+                # Nothing published yet.
+                return None
+
+            try:
+                data = json.loads(payload)
+            except ValueError:
+                # Torn read which was not caught by the sequence number.
+                continue
+
+            if not _is_running(data.get("pid")):
+                # The publisher exited without closing the snapshot.
+                return None
+
+            return data
+
+        return None
+
+    def close(self) -> None:
+        """Unmaps the status file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _map(self) -> Optional[mmap.mmap]:
+
+        if self._mmap is not None:
+            return self._mmap
+
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._ino = os.fstat(f.fileno()).st_ino
+        except (OSError, ValueError):
+            # File does not exist or is empty.
+            return None
+
+        if len(mm) < _HEADER_SIZE or mm[:4] != MAGIC:
+            mm.close()
+            return None
+
+        if _header.unpack_from(mm, 0)[1] != FORMAT_VERSION:
+            mm.close()
+            return None
+
+        self._mmap = mm
+
+        return mm
+
+    def __enter__(self) -> "StatusReader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _is_running(pid: Optional[int]) -> bool:
+    """Checks if a process with the given PID exists."""
+
+    if not pid:
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    else:
+        return True
+
+
+def read_status(config_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the status snapshot which is published by the daemon for the given config.
+
+    :param config_name: The config name.
+    :returns: The snapshot or ``None`` if the daemon is not running.
+    """
+    with StatusReader(get_status_path(config_name)) as reader:
+        return reader.read()
+
+
+# ==== event subscriptions =============================================================
+
+
+class EventSubscriber:
+    """
+    Receives events which are pushed by the daemon over its event socket.
+
+    :param config_name: The config name.
+    :param timeout: Timeout in seconds for connecting and for receiving each event. If
+        ``None``, block until the next event arrives.
+    :raises OSError: if the daemon is not running.
+    """
+
+    def __init__(self, config_name: str, timeout: Optional[float] = None) -> None:
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+
+        try:
+            self._sock.connect(get_events_socket_path(config_name))
+        except OSError:
+            self._sock.close()
+            raise
+
+        self._file = self._sock.makefile("rb")
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._request_id = 0
+
+    def receive(self) -> Optional[Dict[str, Any]]:
+        """
+        Receives the next event.
+
+        :returns: The event or ``None`` if the daemon has closed the connection.
+        :raises socket.timeout: if no event was received before the timeout.
+        """
+        if self._pending:
+            return self._pending.popleft()
+
+        return self._receive()
+
+    def request(self, method: str, *params: Any) -> Any:
+        """
+        Calls a read-only method of the daemon. Events which are received while waiting
+        for the response are kept and returned by :meth:`receive`.
+
+        :param method: Name of the method.
+        :param params: Positional arguments for the method.
+        :returns: The method's return value.
+        :raises RuntimeError: if the method raised an error or is not available.
+        :raises ConnectionError: if the daemon has closed the connection.
+        :raises socket.timeout: if no response was received before the timeout.
+        """
+
+        self._request_id += 1
+        request = dict(id=self._request_id, method=method, params=params)
+        self._sock.sendall(json.dumps(request).encode() + b"\n")
+
+        while True:
+            event = self._receive()
+
+            if event is None:
+                raise ConnectionError("Connection closed by daemon")
+
+            if event["type"] == "response" and event["id"] == self._request_id:
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                return event["result"]
+
+            self._pending.append(event)
+
+    def _receive(self) -> Optional[Dict[str, Any]]:
+
+        line = self._file.readline()
+
+        if not line:
+            return None
+
+        return json.loads(line)
+
+    def close(self) -> None:
+        """Closes the connection to the daemon."""
+        self._file.close()
+        self._sock.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+
+        while True:
+            event = self.receive()
+
+            if event is None:
+                return
+
+            yield event
+
+    def __enter__(self) -> "EventSubscriber":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
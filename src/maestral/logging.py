@@ -5,7 +5,7 @@ import logging
 from collections import deque
 import concurrent.futures
 from concurrent.futures import Future
-from typing import Deque, Optional, List
+from typing import Deque, Optional, List, Callable
 
 try:
     from concurrent.futures import InvalidStateError  # type: ignore
@@ -26,6 +26,7 @@ from .utils import sanitize_string
 __all__ = [
     "EncodingSafeLogRecord",
     "CachedHandler",
+    "CallbackHandler",
     "SdNotificationHandler",
     "safe_journal_sender",
 ]
@@ -43,7 +44,6 @@ if journal:
 
         journal.send(MESSAGE, **kwargs)
 
-
 else:
 
     def safe_journal_sender(MESSAGE: str, **kwargs) -> None:
@@ -143,6 +143,33 @@ class CachedHandler(logging.Handler):
         self.cached_records.clear()
 
 
+class CallbackHandler(logging.Handler):
+    """Handler which calls a function for every record
+
+    This is used to notify subscribers of status changes. The callback is called from
+    the thread which emits the record and should return quickly.
+
+    :param callback: Callable which takes the log record as its only argument.
+    :param level: Initial log level. Defaults to NOTSET.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[logging.LogRecord], None],
+        level: int = logging.NOTSET,
+    ) -> None:
+        super().__init__(level=level)
+        self.callback = callback
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Calls the callback with the log record.
+
+        :param record: Log record.
+        """
+        self.callback(record)
+
+
 class SdNotificationHandler(logging.Handler):
     """Handler which emits messages as systemd notifications
 
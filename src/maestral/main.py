@@ -11,6 +11,8 @@ import warnings
 import logging.handlers
 import asyncio
 import random
+import json
+from threading import Thread
 from concurrent.futures import ThreadPoolExecutor
 from typing import (
     Union,
@@ -43,7 +45,7 @@ except ImportError:
 # local imports
 from . import __version__
 from .client import CONNECTION_ERRORS, DropboxClient, convert_api_errors
-from .sync import SyncMonitor, SyncDirection
+from .sync import SyncMonitor, SyncDirection, SyncEvent
 from .errors import (
     MaestralApiError,
     NotLinkedError,
@@ -54,8 +56,13 @@ from .errors import (
     UnsupportedFileTypeForDiff,
 )
 from .config import MaestralConfig, MaestralState, validate_config_name
-from .logging import CachedHandler, SdNotificationHandler, safe_journal_sender
-from .utils import get_newer_version
+from .logging import (
+    CachedHandler,
+    CallbackHandler,
+    SdNotificationHandler,
+    safe_journal_sender,
+)
+from .utils import get_newer_version, timed
 from .utils.path import (
     is_child,
     is_equal_or_child,
@@ -71,6 +78,8 @@ from .utils.serializer import (
 )
 from .utils.appdirs import get_log_path, get_cache_path, get_data_path
 from .utils.integration import get_ac_state, ACState
+from .ipc import StatusPublisher, get_status_path, get_events_socket_path
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
 from .constants import IDLE, PAUSED, CONNECTING, FileStatus, GITHUB_RELEASES_API
 
 
@@ -79,6 +88,27 @@ __all__ = ["Maestral"]
 
 logger = logging.getLogger(__name__)
 
+# Interval in seconds between status snapshots while items are syncing and the delay
+# to coalesce changes before a snapshot is published, see :mod:`maestral.ipc`.
+STATUS_PROGRESS_INTERVAL = 1.0
+STATUS_COALESCE_DELAY = 0.1
+
+# Interval in seconds between progress updates for event subscribers and the delay to
+# coalesce changes before they are sent.
+EVENT_PROGRESS_INTERVAL = 0.5
+EVENT_COALESCE_DELAY = 0.1
+
+# Maximum number of unsent events before a subscriber which does not keep up is
+# disconnected.
+EVENT_QUEUE_SIZE = 1000
+
+# Read-only methods which clients of the event socket may call.
+EVENT_SOCKET_METHODS = ("get_file_status_batch", "get_metrics")
+
+# Interface for the metrics endpoint and timeout in seconds to receive a request.
+METRICS_HOST = "127.0.0.1"
+METRICS_REQUEST_TIMEOUT = 10
+
 
 # ======================================================================================
 # Main API
@@ -118,29 +148,52 @@ class Maestral:
     :param log_to_stdout: If ``True``, Maestral will print log messages to stdout.
         When started as a systemd services, this can result in duplicate log messages.
         Defaults to ``False``.
+    :param load_credentials: If ``True``, load the auth token from the system keyring
+        in a background thread while the sync engine is set up. Otherwise, the keyring
+        is only accessed once the token is required. Defaults to ``False``.
     """
 
     log_handler_sd: Optional[SdNotificationHandler]
     log_handler_journal: Optional["journal.JournalHandler"]
 
     def __init__(
-        self, config_name: str = "maestral", log_to_stdout: bool = False
+        self,
+        config_name: str = "maestral",
+        log_to_stdout: bool = False,
+        load_credentials: bool = False,
     ) -> None:
 
-        self._config_name = validate_config_name(config_name)
-        self._conf = MaestralConfig(self._config_name)
-        self._state = MaestralState(self._config_name)
+        t0 = time.perf_counter()
+        self._startup_timings: Dict[str, float] = {}
+
+        with timed(self._startup_timings, "config"):
+            self._config_name = validate_config_name(config_name)
+            self._conf = MaestralConfig(self._config_name)
+            self._state = MaestralState(self._config_name)
 
         # set up logging
         self._log_to_stdout = log_to_stdout
-        self._setup_logging()
+
+        with timed(self._startup_timings, "logging"):
+            self._setup_logging()
 
         # set up sync infrastructure
         self.client = DropboxClient(config_name=self.config_name)
-        self.monitor = SyncMonitor(self.client)
-        self.sync = self.monitor.sync
 
-        self._check_and_run_post_update_scripts()
+        if load_credentials:
+            # keyring access may block until the keyring is unlocked
+            Thread(
+                target=self._load_credentials,
+                name="maestral-credential-loader",
+                daemon=True,
+            ).start()
+
+        with timed(self._startup_timings, "sync_engine"):
+            self.monitor = SyncMonitor(self.client)
+            self.sync = self.monitor.sync
+
+        with timed(self._startup_timings, "post_update"):
+            self._check_and_run_post_update_scripts()
 
         # schedule background tasks
         self._loop = asyncio.get_event_loop()
@@ -154,15 +207,81 @@ class Maestral:
         self._schedule_task(self._period_update_check())
         self._schedule_task(self._period_reindexing())
 
+        # publish status snapshots and push changes to event subscribers
+        self._status_changed = asyncio.Event()
+        self._status_change_pending = False
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._state_changed = asyncio.Event()
+        self._state_change_pending = False
+        self._events_lock = asyncio.Lock()
+        self._published_status: Dict[str, Any] = {}
+        self._published_errors: List[ErrorType] = []
+        self._published_activity: Dict[int, Tuple[SyncEvent, int]] = {}
+        self._published_history_id = -1
+
+        self._log_handler_events = CallbackHandler(self._on_state_change)
+        self._log_handler_events.setLevel(logging.INFO)
+        self._logger.addHandler(self._log_handler_events)
+        self.sync.add_change_callback(self._on_state_change)
+
+        self._schedule_task(self._publish_status())
+        self._schedule_task(self._serve_events())
+
         # create a future which will return once `shutdown_daemon` is called
         # can be used by an event loop wait until maestral has been stopped
         self.shutdown_complete = self._loop.create_future()
 
+        if self._conf.get("app", "metrics_port") > 0:
+            self._schedule_task(self._serve_metrics())
+
+        self._startup_timings["total"] = time.perf_counter() - t0
+
+        logger.debug(
+            "Startup timings: %s",
+            ", ".join(
+                f"{name} {duration * 1000:.0f} ms"
+                for name, duration in self.startup_timings.items()
+            ),
+        )
+
     @property
     def version(self) -> str:
         """Returns the current Maestral version."""
         return __version__
 
+    @property
+    def startup_timings(self) -> Dict[str, float]:
+        """
+        Durations of the startup phases in seconds (read only). Phases of the sync
+        engine are prefixed with "sync_engine.". Loading credentials from the keyring
+        only appears as "keyring" when requested on startup and once completed.
+
+        .. versionadded:: 1.4.3
+        """
+
+        timings = dict(self._startup_timings)
+
+        for name, duration in self.sync.startup_timings.items():
+            timings[f"sync_engine.{name}"] = duration
+
+        return timings
+
+    def _load_credentials(self) -> None:
+        """Loads the auth token from the keyring and records the duration."""
+
+        try:
+            with timed(self._startup_timings, "keyring"):
+                linked = self.client.auth.linked
+        except KeyringAccessError:
+            # already logged by the auth session
+            return
+
+        logger.debug(
+            "Loaded credentials in %.0f ms, linked: %s",
+            self._startup_timings["keyring"] * 1000,
+            linked,
+        )
+
     def get_auth_url(self) -> str:
         """
         Returns a URL to authorize access to a Dropbox account. To link a Dropbox
@@ -577,6 +696,28 @@ class Maestral:
         """
         self._log_handler_error_cache.clear()
 
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Statistics of the internal caches of the sync engine (read only). Maps cache
+        names to dicts with the keys "hits", "misses", "evictions", "entries" and
+        "size".
+        """
+        return self.sync.cache_stats
+
+    def get_metrics(self) -> str:
+        """
+        Returns metrics for requests to the Dropbox API and for the sync engine, such
+        as request latencies, transferred bytes, queue sizes and lock wait times. If the
+        config option "metrics_port" is set, the daemon also serves them over HTTP on
+        this port of localhost.
+
+        .. versionadded:: 1.4.3
+
+        :returns: Metrics in the Prometheus text format.
+        """
+        return self.client.metrics.expose()
+
     @property
     def account_profile_pic_path(self) -> str:
         """
@@ -594,32 +735,59 @@ class Maestral:
             current working directory.
         :returns: String indicating the sync status. Can be 'uploading', 'downloading',
             'up to date', 'error', or 'unwatched' (for files outside of the Dropbox
-            directory). This will always be 'unwatched' if syncing is paused.
+            directory). This will always be 'unwatched' if syncing is paused. Folders
+            are 'uploading' or 'downloading' while any of their children are.
+        """
+        return self.get_file_status_batch([local_path])[0]
+
+    def get_file_status_batch(self, local_paths: List[str]) -> List[str]:
+        """
+        Returns the sync status of multiple files. This is considerably faster than
+        calling :meth:`get_file_status` for each file, especially from another process.
+
+        :param local_paths: Paths to files on the local drive. May be relative to the
+            current working directory.
+        :returns: Sync status for each path, in the same order as the given paths. See
+            :meth:`get_file_status` for possible values.
+
+        .. versionadded:: 1.4.3
         """
         if not self.running:
-            return FileStatus.Unwatched.value
+            return [FileStatus.Unwatched.value] * len(local_paths)
 
-        local_path = osp.realpath(local_path)
+        dbx_paths: List[Optional[str]] = []
 
-        try:
-            dbx_path = self.sync.to_dbx_path(local_path)
-        except ValueError:
-            return FileStatus.Unwatched.value
+        for local_path in local_paths:
+            try:
+                dbx_paths.append(self.sync.to_dbx_path(osp.realpath(local_path)))
+            except ValueError:
+                dbx_paths.append(None)
 
-        sync_event = next(
-            iter(e for e in self.monitor.activity if e.local_path == local_path), None
-        )
+        entries = self.sync.get_index_entries(p for p in dbx_paths if p)
 
-        if sync_event and sync_event.direction == SyncDirection.Up:
-            return FileStatus.Uploading.value
-        elif sync_event and sync_event.direction == SyncDirection.Down:
-            return FileStatus.Downloading.value
-        elif any(dbx_path == err["dbx_path"] for err in self.sync_errors):
-            return FileStatus.Error.value
-        elif self.sync.get_local_rev(dbx_path):
-            return FileStatus.Synced.value
-        else:
-            return FileStatus.Unwatched.value
+        results: List[str] = []
+
+        for dbx_path in dbx_paths:
+
+            if not dbx_path:
+                results.append(FileStatus.Unwatched.value)
+                continue
+
+            direction = self.sync.syncing.get_direction(dbx_path)
+            entry = entries[dbx_path.lower()]
+
+            if direction == SyncDirection.Up:
+                results.append(FileStatus.Uploading.value)
+            elif direction == SyncDirection.Down:
+                results.append(FileStatus.Downloading.value)
+            elif self.sync.sync_errors.get(dbx_path):
+                results.append(FileStatus.Error.value)
+            elif entry and entry.rev:
+                results.append(FileStatus.Synced.value)
+            else:
+                results.append(FileStatus.Unwatched.value)
+
+        return results
 
     def get_activity(self, limit: Optional[int] = 100) -> List[StoneType]:
         """
@@ -1179,17 +1347,32 @@ class Maestral:
         :returns: Excluded status.
         :raises NotLinkedError: if no Dropbox account is linked.
         """
+        return self.excluded_status_batch([dbx_path])[0]
+
+    def excluded_status_batch(self, dbx_paths: List[str]) -> List[str]:
+        """
+        Returns the excluded status of multiple items, see :meth:`excluded_status`.
+
+        :param dbx_paths: Paths to items on Dropbox.
+        :returns: Excluded status for each path, in the same order as the given paths.
+        :raises NotLinkedError: if no Dropbox account is linked.
+
+        .. versionadded:: 1.4.3
+        """
 
         self._check_linked()
 
-        dbx_path = dbx_path.lower().rstrip("/")
+        results: List[str] = []
 
-        if any(is_equal_or_child(dbx_path, f) for f in self.sync.excluded_items):
-            return "excluded"
-        elif any(is_child(f, dbx_path) for f in self.sync.excluded_items):
-            return "partially excluded"
-        else:
-            return "included"
+        for dbx_path in dbx_paths:
+            if self.sync.is_excluded_by_user(dbx_path):
+                results.append("excluded")
+            elif self.sync.is_partially_excluded_by_user(dbx_path):
+                results.append("partially excluded")
+            else:
+                results.append("included")
+
+        return results
 
     def move_dropbox_directory(self, new_path: str) -> None:
         """
@@ -1438,7 +1621,11 @@ class Maestral:
         for task in self._tasks:
             task.cancel()
 
+        self.sync.remove_change_callback(self._on_state_change)
+        self._logger.removeHandler(self._log_handler_events)
+
         self._pool.shutdown(wait=False)
+        self._state.flush()
 
         if self._loop.is_running():
             self._loop.call_soon_threadsafe(self.shutdown_complete.set_result, True)
@@ -1560,6 +1747,8 @@ class Maestral:
                     await self._loop.run_in_executor(self._pool, self.get_profile_pic)
                 except (ConnectionError, MaestralApiError):
                     pass
+                else:
+                    self._on_state_change()
 
             await sleep_rand(60 * 45)
 
@@ -1573,6 +1762,7 @@ class Maestral:
 
             if not res["error"]:
                 self._state.set("app", "latest_release", res["latest_release"])
+                self._on_state_change()
 
             await sleep_rand(60 * 60)
 
@@ -1597,6 +1787,411 @@ class Maestral:
 
             await sleep_rand(60 * 5)
 
+    def _get_status_snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the status, sync errors and sync activity for publishing in a
+        :class:`maestral.ipc.StatusPublisher`.
+        """
+
+        return dict(
+            pid=os.getpid(),
+            config_name=self._config_name,
+            dropbox_path=self.sync.dropbox_path,
+            status=self.status,
+            running=self.running,
+            paused=self.paused,
+            connected=self.connected,
+            sync_errors=self.sync_errors,
+            fatal_errors=self.fatal_errors,
+            activity=[sync_event_to_dict(e) for e in self.monitor.activity[:100]],
+            account=dict(
+                email=self._state.get("account", "email"),
+                type=self._state.get("account", "type"),
+                usage=self._state.get("account", "usage"),
+            ),
+            update_available=Version(__version__)
+            < Version(self._state.get("app", "latest_release")),
+        )
+
+    async def _publish_status(self) -> None:
+        """
+        Publishes a status snapshot in a memory-mapped file whenever the status, sync
+        errors or sync activity change. While items are syncing, their progress is
+        published periodically. Clients can read this with
+        :class:`maestral.ipc.StatusReader` without calls to the daemon.
+        """
+
+        try:
+            publisher = StatusPublisher(get_status_path(self._config_name))
+        except OSError:
+            logger.warning("Could not create status snapshot", exc_info=True)
+            return
+
+        try:
+            while True:
+                try:
+                    snapshot = await self._loop.run_in_executor(
+                        self._pool, self._get_status_snapshot
+                    )
+                    publisher.publish(snapshot)
+                except Exception:
+                    logger.debug("Could not publish status snapshot", exc_info=True)
+
+                timeout = STATUS_PROGRESS_INTERVAL if self.sync.syncing else None
+
+                try:
+                    await asyncio.wait_for(self._status_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                await asyncio.sleep(STATUS_COALESCE_DELAY)
+
+                self._status_changed.clear()
+                self._status_change_pending = False
+        finally:
+            publisher.close()
+
+    # ==== event subscriptions =========================================================
+
+    def _on_state_change(self, *args) -> None:
+        """
+        Wakes up :meth:`_publish_status` and, when there are subscribers,
+        :meth:`_serve_events`. This is called from sync threads and from log handlers
+        and must return quickly.
+        """
+
+        if not self._status_change_pending:
+            self._status_change_pending = True
+            try:
+                self._loop.call_soon_threadsafe(self._status_changed.set)
+            except RuntimeError:
+                # Event loop is closed.
+                pass
+
+        if self._subscribers and not self._state_change_pending:
+            self._state_change_pending = True
+            try:
+                self._loop.call_soon_threadsafe(self._state_changed.set)
+            except RuntimeError:
+                # Event loop is closed.
+                pass
+
+    def _get_state_changes(self) -> List[Dict[str, Any]]:
+        """
+        Compares the current status, sync errors, activity and history with the last
+        published state and returns events for all changes.
+        """
+
+        events: List[Dict[str, Any]] = []
+
+        status = dict(
+            status=self.status,
+            running=self.running,
+            paused=self.paused,
+            connected=self.connected,
+        )
+
+        if status != self._published_status:
+            self._published_status = status
+            events.append(dict(type="status", **status))
+
+        sync_errors = self.sync_errors
+
+        if sync_errors != self._published_errors:
+            self._published_errors = sync_errors
+            events.append(dict(type="sync_errors", sync_errors=sync_errors))
+
+        activity = {id(e): e for e in list(self.sync.syncing)}
+        published = self._published_activity
+
+        added = [
+            _activity_to_dict(e) for i, e in activity.items() if i not in published
+        ]
+        removed = [i for i in published if i not in activity]
+        progress = [
+            (i, e.completed)
+            for i, e in activity.items()
+            if i in published and e.completed != published[i][1]
+        ]
+
+        self._published_activity = {i: (e, e.completed) for i, e in activity.items()}
+
+        if added or removed or progress:
+            events.append(
+                dict(type="activity", added=added, removed=removed, progress=progress)
+            )
+
+        last_history_id = self.sync.last_history_id
+
+        if last_history_id < self._published_history_id:
+            # The history was cleared.
+            self._published_history_id = 0
+
+        if self._published_history_id == -1:
+            self._published_history_id = last_history_id
+        elif last_history_id > self._published_history_id:
+            history = self.sync.get_history_after(self._published_history_id)
+            self._published_history_id = last_history_id
+            entries = [sync_event_to_dict(e) for e in history]
+            events.append(dict(type="history", entries=entries))
+
+        return events
+
+    def _get_initial_events(self) -> List[Dict[str, Any]]:
+        """Returns events with the last published state for a new subscriber."""
+
+        activity = [_activity_to_dict(e) for e, _ in self._published_activity.values()]
+
+        return [
+            dict(type="status", **self._published_status),
+            dict(type="sync_errors", sync_errors=self._published_errors),
+            dict(type="activity", added=activity, removed=[], progress=[]),
+        ]
+
+    async def _publish_state_changes(self) -> None:
+        """Sends all state changes to subscribers."""
+
+        async with self._events_lock:
+            events = await self._loop.run_in_executor(
+                self._pool, self._get_state_changes
+            )
+
+            for event in events:
+                self._broadcast(event)
+
+    def _broadcast(self, event: Optional[Dict[str, Any]]) -> None:
+        """
+        Queues an event for all subscribers. Subscribers which do not keep up are
+        disconnected instead of buffering events without bounds.
+
+        :param event: Event to send or ``None`` to disconnect all subscribers.
+        """
+
+        for queue in list(self._subscribers):
+            if event is not None:
+                try:
+                    queue.put_nowait(event)
+                    continue
+                except asyncio.QueueFull:
+                    logger.debug("Disconnecting event subscriber which is too slow")
+
+            self._subscribers.discard(queue)
+
+            while not queue.empty():
+                queue.get_nowait()
+
+            queue.put_nowait(None)
+
+    async def _handle_subscriber(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Sends events to a client which is connected to the event socket."""
+
+        queue: asyncio.Queue = asyncio.Queue(EVENT_QUEUE_SIZE)
+
+        try:
+            await self._publish_state_changes()
+        except Exception:
+            logger.debug("Could not get state changes", exc_info=True)
+
+        async with self._events_lock:
+            for event in self._get_initial_events():
+                queue.put_nowait(event)
+            self._subscribers.add(queue)
+
+        # Reading requests only returns once the client disconnects.
+        disconnected = self._loop.create_task(self._handle_requests(reader, queue))
+
+        try:
+            while True:
+                get_event = self._loop.create_task(queue.get())
+
+                await asyncio.wait(
+                    {get_event, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not get_event.done():
+                    get_event.cancel()
+                    break
+
+                event = get_event.result()
+
+                if event is None:
+                    break
+
+                writer.write(json.dumps(event).encode() + b"\n")
+                await writer.drain()
+
+        except OSError:
+            pass
+        finally:
+            self._subscribers.discard(queue)
+            disconnected.cancel()
+            writer.close()
+
+    async def _handle_requests(
+        self, reader: asyncio.StreamReader, queue: asyncio.Queue
+    ) -> None:
+        """
+        Answers requests from a client which is connected to the event socket. Requests
+        are JSON lines with the keys "id", "method" and "params". Responses are queued
+        as events of type "response" with the request's "id" and either a "result" or
+        an "error".
+        """
+
+        while True:
+            line = await reader.readline()
+
+            if not line:
+                return
+
+            request_id = None
+
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                method = request["method"]
+
+                if method not in EVENT_SOCKET_METHODS:
+                    raise ValueError(f"Unknown method '{method}'")
+
+                func = getattr(self, method)
+                params = request.get("params", [])
+                result = await self._loop.run_in_executor(self._pool, func, *params)
+                response = dict(type="response", id=request_id, result=result)
+            except Exception as exc:
+                response = dict(type="response", id=request_id, error=str(exc))
+
+            try:
+                queue.put_nowait(response)
+            except asyncio.QueueFull:
+                return
+
+    async def _serve_events(self) -> None:
+        """
+        Serves event subscriptions on a unix domain socket. Changes to the status, sync
+        errors, activity and history are pushed to subscribers when they occur. While
+        items are syncing, their progress is sent periodically. Nothing is done while
+        there are no subscribers.
+        """
+
+        path = get_events_socket_path(self._config_name)
+
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            server = await asyncio.start_unix_server(self._handle_subscriber, path=path)
+        except (OSError, NotImplementedError):
+            logger.warning("Could not create event socket", exc_info=True)
+            return
+
+        try:
+            while True:
+
+                timeout = EVENT_PROGRESS_INTERVAL if self.sync.syncing else None
+
+                try:
+                    await asyncio.wait_for(self._state_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                await asyncio.sleep(EVENT_COALESCE_DELAY)
+
+                self._state_changed.clear()
+                self._state_change_pending = False
+
+                if not self._subscribers:
+                    continue
+
+                try:
+                    await self._publish_state_changes()
+                except Exception:
+                    logger.debug("Could not get state changes", exc_info=True)
+
+        finally:
+            self._broadcast(None)
+            server.close()
+
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    # ==== metrics endpoint ============================================================
+
+    async def _serve_metrics(self) -> None:
+        """
+        Serves metrics in the Prometheus text format over HTTP on localhost. Requests to
+        "/metrics" or "/" return the metrics, all other paths return 404.
+        """
+
+        port = self._conf.get("app", "metrics_port")
+
+        try:
+            server = await asyncio.start_server(
+                self._handle_metrics_request, host=METRICS_HOST, port=port
+            )
+        except OSError:
+            logger.warning("Could not serve metrics on port %s", port, exc_info=True)
+            return
+
+        logger.debug("Serving metrics on http://%s:%s/metrics", METRICS_HOST, port)
+
+        try:
+            # the task is cancelled on shutdown, shield the future from cancellation
+            await asyncio.shield(self.shutdown_complete)
+        finally:
+            server.close()
+
+    async def _handle_metrics_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answers a single HTTP request and closes the connection."""
+
+        try:
+            request_line = await asyncio.wait_for(
+                reader.readline(), METRICS_REQUEST_TIMEOUT
+            )
+
+            # skip headers
+            while True:
+                line = await asyncio.wait_for(
+                    reader.readline(), METRICS_REQUEST_TIMEOUT
+                )
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            method, target, _ = request_line.decode("latin-1").split()
+            path = target.split("?", 1)[0]
+
+            if method != "GET":
+                status = "405 Method Not Allowed"
+                body = b""
+            elif path not in ("/", "/metrics"):
+                status = "404 Not Found"
+                body = b""
+            else:
+                status = "200 OK"
+                body = self.get_metrics().encode()
+
+            header = (
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {METRICS_CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+
+            writer.write(header.encode() + body)
+            await writer.drain()
+        except (ValueError, ConnectionError, asyncio.TimeoutError):
+            # Malformed request or client has disconnected.
+            pass
+        finally:
+            writer.close()
+
     def __repr__(self) -> str:
 
         email = self._state.get("account", "email")
@@ -1610,3 +2205,10 @@ class Maestral:
 
 async def sleep_rand(target: float, jitter: float = 60):
     await asyncio.sleep(target + random.random() * jitter)
+
+
+def _activity_to_dict(event: SyncEvent) -> StoneType:
+    """Serializes a SyncEvent for event subscribers, including its ID."""
+    serialized = sync_event_to_dict(event)
+    serialized["id"] = id(event)
+    return serialized
@@ -0,0 +1,597 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides a minimal registry of counters, gauges and histograms which are
+exposed in the Prometheus text format, version 0.0.4. The daemon collects metrics for
+calls to the Dropbox API and for the sync engine, see
+:meth:`maestral.main.Maestral.get_metrics`, and optionally serves them over HTTP on a
+local port for scraping by Prometheus.
+
+Metrics can have labels. Values for the labels are given to :meth:`Metric.labels`
+which returns the time series for this combination of values:
+
+    >>> registry = Registry()
+    >>> requests = registry.counter("requests_total", "Requests.", ["endpoint"])
+    >>> requests.labels("files/upload").inc()
+    >>> print(registry.expose())
+    # HELP requests_total Requests.
+    # TYPE requests_total counter
+    requests_total{endpoint="files/upload"} 1.0
+
+Metrics without labels can be updated directly.
+
+This module is imported by clients and must not import any heavy dependencies.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from threading import Lock
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Generic,
+    Union,
+)
+
+
+__all__ = [
+    "Metric",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "InstrumentedLock",
+    "CONTENT_TYPE",
+    "DEFAULT_BUCKETS",
+    "LOCK_WAIT_BUCKETS",
+]
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    math.inf,
+)
+
+LOCK_WAIT_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, math.inf)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+# ==== time series =====================================================================
+
+
+class _CounterValue:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increments the counter.
+
+        :param amount: Amount to increment by, must not be negative.
+        :raises ValueError: if the amount is negative.
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        """The current value."""
+        return self._value
+
+    def samples(self, name: str) -> Iterator[Sample]:
+        yield name, {}, self._value
+
+
+class _GaugeValue:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        """Sets the gauge to a value."""
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        """Increments the gauge."""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrements the gauge."""
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Computes the value with a function whenever it is read.
+
+        :param function: Callable without arguments which returns the current value.
+        """
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        """The current value."""
+        if self._function:
+            return self._function()
+        return self._value
+
+    def samples(self, name: str) -> Iterator[Sample]:
+        yield name, {}, self.value
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self._lock = Lock()
+        self._upper_bounds = buckets
+        self._bucket_counts = [0] * len(buckets)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Records an observation.
+
+        :param value: Observed value, for instance a duration in seconds.
+        """
+        i = bisect_left(self._upper_bounds, value)
+
+        with self._lock:
+            self._bucket_counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Records the wall time spent in a with-block in seconds."""
+
+        t0 = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+    @property
+    def count(self) -> int:
+        """The number of observations."""
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """The sum of all observations."""
+        return self._sum
+
+    def samples(self, name: str) -> Iterator[Sample]:
+
+        with self._lock:
+            bucket_counts = list(self._bucket_counts)
+            total = self._sum
+            count = self._count
+
+        cumulative = 0
+
+        for upper_bound, bucket_count in zip(self._upper_bounds, bucket_counts):
+            cumulative += bucket_count
+            yield f"{name}_bucket", {"le": _format_value(upper_bound)}, cumulative
+
+        yield f"{name}_sum", {}, total
+        yield f"{name}_count", {}, count
+
+
+# ==== metrics =========================================================================
+
+_V = TypeVar("_V", _CounterValue, _GaugeValue, _HistogramValue)
+
+
+class Metric(Generic[_V]):
+    """
+    Base class for metrics. A metric has one time series for each combination of label
+    values.
+
+    :param name: Name of the metric.
+    :param documentation: Help text.
+    :param labelnames: Names of the labels.
+    """
+
+    type_name = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._lock = Lock()
+        self._children: Dict[Tuple[str, ...], _V] = {}
+
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values: Any) -> _V:
+        """
+        Returns the time series for the given label values. The time series is created
+        on first use.
+
+        :param values: Label values, in the order of :attr:`labelnames`.
+        :returns: Time series.
+        :raises ValueError: if the number of values does not match the labels.
+        """
+
+        key = tuple(str(v) for v in values)
+
+        try:
+            return self._children[key]
+        except KeyError:
+            pass
+
+        if len(key) != len(self.labelnames):
+            raise ValueError(
+                f"Expected {len(self.labelnames)} label values, got {len(key)}"
+            )
+
+        with self._lock:
+            return self._children.setdefault(key, self._new_child())
+
+    def samples(self) -> Iterator[Sample]:
+        """
+        Returns all samples of the metric.
+
+        :returns: Iterator over the sample name, labels and value.
+        """
+
+        with self._lock:
+            children = list(self._children.items())
+
+        for label_values, child in children:
+            labels = dict(zip(self.labelnames, label_values))
+            for name, extra_labels, value in child.samples(self.name):
+                yield name, {**labels, **extra_labels}, value
+
+    def _new_child(self) -> _V:
+        raise NotImplementedError()
+
+    def _default(self) -> _V:
+        try:
+            return self._children[()]
+        except KeyError:
+            raise ValueError(f"Metric {self.name} requires label values") from None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(name={self.name!r})>"
+
+
+class Counter(Metric[_CounterValue]):
+    """A value which only increases, for instance the number of requests."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increments a counter without labels."""
+        self._default().inc(amount)
+
+    @property
+    def value(self) -> float:
+        """The value of a counter without labels."""
+        return self._default().value
+
+
+class Gauge(Metric[_GaugeValue]):
+    """A value which can increase and decrease, for instance a queue size."""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        """Sets a gauge without labels."""
+        self._default().set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        """Increments a gauge without labels."""
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrements a gauge without labels."""
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Computes the value of a gauge without labels when it is read."""
+        self._default().set_function(function)
+
+    @property
+    def value(self) -> float:
+        """The value of a gauge without labels."""
+        return self._default().value
+
+
+class Histogram(Metric[_HistogramValue]):
+    """
+    Counts observations in buckets, for instance of request durations.
+
+    :param name: Name of the metric.
+    :param documentation: Help text.
+    :param labelnames: Names of the labels.
+    :param buckets: Upper bounds of the buckets in increasing order. A bucket for
+        infinity is added if missing.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+
+        if list(buckets) != sorted(buckets):
+            raise ValueError("Buckets must be sorted")
+
+        if not buckets or buckets[-1] != math.inf:
+            buckets = tuple(buckets) + (math.inf,)
+
+        self.buckets = tuple(buckets)
+
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Records an observation for a histogram without labels."""
+        self._default().observe(value)
+
+    def time(self) -> ContextManager[None]:
+        """Records the duration of a with-block for a histogram without labels."""
+        return self._default().time()
+
+
+# ==== registry ========================================================================
+
+_M = TypeVar("_M", bound=Metric)
+
+
+class Registry:
+    """A collection of metrics which can be exposed together."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: _M) -> _M:
+        """
+        Adds a metric to the registry.
+
+        :param metric: The metric.
+        :returns: The metric.
+        :raises ValueError: if a metric with the same name is already registered.
+        """
+
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+
+            self._metrics[metric.name] = metric
+
+        return metric
+
+    def get(self, name: str) -> Metric:
+        """
+        Returns a registered metric.
+
+        :param name: Name of the metric.
+        :returns: The metric.
+        :raises KeyError: if no metric with the name is registered.
+        """
+        return self._metrics[name]
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """
+        Returns the counter with the given name, creating it if necessary.
+
+        :param name: Name of the metric, should end with "_total".
+        :param documentation: Help text.
+        :param labelnames: Names of the labels.
+        :returns: The counter.
+        :raises ValueError: if a different type of metric has the same name.
+        """
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """
+        Returns the gauge with the given name, creating it if necessary.
+
+        :param name: Name of the metric.
+        :param documentation: Help text.
+        :param labelnames: Names of the labels.
+        :returns: The gauge.
+        :raises ValueError: if a different type of metric has the same name.
+        """
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """
+        Returns the histogram with the given name, creating it if necessary.
+
+        :param name: Name of the metric.
+        :param documentation: Help text.
+        :param labelnames: Names of the labels.
+        :param buckets: Upper bounds of the buckets.
+        :returns: The histogram.
+        :raises ValueError: if a different type of metric has the same name.
+        """
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def _get_or_create(
+        self,
+        cls: Callable[..., _M],
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        **kwargs,
+    ) -> _M:
+
+        with self._lock:
+            metric = self._metrics.get(name)
+
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered")
+
+        return metric
+
+    def expose(self) -> str:
+        """
+        Returns all metrics in the Prometheus text format.
+
+        :returns: Text for the Prometheus text format, version 0.0.4.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines: List[str] = []
+
+        for metric in metrics:
+            documentation = metric.documentation.replace("\\", r"\\").replace(
+                "\n", r"\n"
+            )
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def __iter__(self) -> Iterator[Metric]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return iter(metrics)
+
+    def __len__(self) -> int:
+        return len(self._metrics)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+
+    if not labels:
+        return ""
+
+    pairs = []
+
+    for name, value in labels.items():
+        value = value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: Union[int, float]) -> str:
+
+    if value == math.inf:
+        return "+Inf"
+    elif value == -math.inf:
+        return "-Inf"
+    elif math.isnan(value):
+        return "NaN"
+    else:
+        return repr(float(value))
+
+
+# ==== instrumented locks ==============================================================
+
+
+class InstrumentedLock:
+    """
+    Wraps a lock or reentrant lock and records the time which threads spend waiting to
+    acquire it. Non-blocking attempts to acquire the lock are not recorded.
+
+    :param lock: The lock to wrap.
+    :param wait_time: Histogram for the wait time in seconds.
+    """
+
+    def __init__(self, lock: Any, wait_time: _HistogramValue) -> None:
+        self._lock = lock
+        self._wait_time = wait_time
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """
+        Acquires the lock, see :meth:`threading.Lock.acquire`.
+
+        :param blocking: Whether to wait for the lock to become available.
+        :param timeout: Maximum time to wait in seconds, -1 to wait indefinitely.
+        :returns: Whether the lock was acquired.
+        """
+
+        if not blocking:
+            return self._lock.acquire(False)
+
+        t0 = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        self._wait_time.observe(time.perf_counter() - t0)
+
+        return acquired
+
+    def release(self) -> None:
+        """Releases the lock."""
+        self._lock.release()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self._lock!r})>"
@@ -361,6 +361,7 @@ class OAuth2Session:
 
             self._conf.set("account", "account_id", self._account_id)
             self._state.set("account", "token_access_type", self._token_access_type)
+            self._state.flush()
 
             if self._token_access_type == "offline":
                 token = self.refresh_token
@@ -405,6 +406,7 @@ class OAuth2Session:
 
             self._conf.set("account", "account_id", "")
             self._state.set("account", "token_access_type", "")
+            self._state.flush()
             self._conf.set("app", "keyring", "automatic")
 
             self._account_id = None
@@ -9,13 +9,14 @@ import errno
 from stat import S_ISDIR
 import logging
 import time
-import random
 import uuid
 import urllib.parse
 import enum
 import pprint
 import gc
-from threading import Thread, Event, Condition, RLock, current_thread
+import heapq
+import itertools
+from threading import Thread, Event, Condition, Lock, RLock, current_thread
 from concurrent.futures import ThreadPoolExecutor
 from queue import Queue, Empty
 from collections import abc
@@ -25,12 +26,14 @@ from tempfile import NamedTemporaryFile
 from typing import (
     Optional,
     Any,
+    ContextManager,
     Set,
     List,
     Dict,
     Tuple,
     Union,
     Iterator,
+    Iterable,
     Callable,
     Hashable,
     Type,
@@ -44,7 +47,7 @@ import click
 import sqlalchemy.exc  # type: ignore
 import sqlalchemy.engine.url  # type: ignore
 from sqlalchemy.sql import func  # type: ignore
-from sqlalchemy import create_engine  # type: ignore
+from sqlalchemy import create_engine, or_, and_  # type: ignore
 import pathspec  # type: ignore
 import dropbox  # type: ignore
 from dropbox.files import Metadata, DeletedMetadata, FileMetadata, FolderMetadata  # type: ignore
@@ -106,19 +109,26 @@ from .database import (
     Base,
     Session,
     SyncEvent,
+    HistoryEntry,
     HashCacheEntry,
+    PathSetEntry,
     IndexEntry,
+    IndexRecord,
+    IndexMirror,
     SyncDirection,
     SyncStatus,
     ItemType,
     ChangeType,
 )
-from .fsevents import Observer
-from .utils import removeprefix, sanitize_string
-from .utils.caches import LRUCache
+from .fsevents import Observer, create_observer
+from .metrics import InstrumentedLock, LOCK_WAIT_BUCKETS
+from .utils import removeprefix, sanitize_string, chunks, timed
+from .utils.caches import LRUCache, StripedLRUCache
+from .utils.trie import PathTrie
+from .utils.mignore import MignoreMatcher
 from .utils.integration import (
     get_inotify_limits,
-    cpu_usage_percent,
+    CPUGovernor,
     check_connection,
     CPU_COUNT,
 )
@@ -128,7 +138,6 @@ from .utils.path import (
     is_fs_case_sensitive,
     move,
     delete,
-    is_child,
     is_equal_or_child,
     content_hash,
 )
@@ -144,6 +153,7 @@ __all__ = [
     "FSEventHandler",
     "PersistentStateMutableSet",
     "SyncEvent",
+    "HistoryEntry",
     "IndexEntry",
     "HashCacheEntry",
     "SyncEngine",
@@ -160,10 +170,16 @@ logger = logging.getLogger(__name__)
 umask = os.umask(0o22)
 os.umask(umask)
 
+# Common suffix of all excluded dir names, used to skip the set lookup for most paths.
+# This is empty and the lookup is always performed if the names have no common suffix.
+_EXCLUDED_DIR_SUFFIX = osp.commonprefix([n[::-1] for n in EXCLUDED_DIR_NAMES])[::-1]
+
 # type definitions
 ExecInfoType = Tuple[Type[BaseException], BaseException, Optional[TracebackType]]
 FT = TypeVar("FT", bound=Callable[..., Any])
 
+_missing = object()
+
 
 # ======================================================================================
 # Syncing functionality
@@ -199,6 +215,179 @@ class _Ignore:
         )
 
 
+class _IgnoreRegistry:
+    """
+    A registry of ignored events which is indexed for fast lookups. Non-recursive
+    ignores are stored in a hash table by event key and recursive ignores are stored in
+    a trie by their source path. Ignores are expired in the order of their TTL, using a
+    heap.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._exact: Dict[Hashable, List[_Ignore]] = dict()
+        self._recursive = PathTrie()
+        self._expiry_heap: List[Tuple[float, int, _Ignore]] = []
+        self._counter = itertools.count()
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, ignore: _Ignore) -> None:
+        """
+        Adds an ignore to the registry.
+
+        :param ignore: Ignore to add.
+        """
+        with self._lock:
+            if ignore.recursive:
+                ignores = self._recursive.get(ignore.event.src_path)
+                if ignores is None:
+                    self._recursive[ignore.event.src_path] = [ignore]
+                else:
+                    ignores.append(ignore)
+            else:
+                add_to_bin(self._exact, ignore.event.key, ignore)
+
+            self._len += 1
+
+    def set_ttl(self, ignore: _Ignore, ttl: float) -> None:
+        """
+        Sets the time when an ignore should expire.
+
+        :param ignore: Ignore which has been added to the registry.
+        :param ttl: Expiry time.
+        """
+        with self._lock:
+            ignore.ttl = ttl
+            heapq.heappush(self._expiry_heap, (ttl, next(self._counter), ignore))
+
+    def expire(self) -> None:
+        """Removes all expired ignores."""
+        now = time.time()
+
+        with self._lock:
+            while len(self._expiry_heap) > 0 and self._expiry_heap[0][0] < now:
+                _, _, ignore = heapq.heappop(self._expiry_heap)
+                self._remove(ignore)
+
+    def match(self, event: FileSystemEvent) -> bool:
+        """
+        Checks if an event matches any ignore. Matching non-recursive ignores will be
+        removed from the registry.
+
+        :param event: Local file system event.
+        :returns: Whether the event should be ignored.
+        """
+
+        with self._lock:
+
+            ignores = self._exact.get(event.key)
+
+            if ignores:
+                self._remove(ignores[0])
+                return True
+
+            if len(self._recursive) == 0:
+                return False
+
+            dest_path = get_dest_path(event)
+
+            for _, ignores in self._recursive.parents(event.src_path):
+                for ignore in ignores:
+                    type_match = event.event_type == ignore.event.event_type
+                    dest_match = is_equal_or_child(
+                        dest_path, get_dest_path(ignore.event)
+                    )
+
+                    if type_match and dest_match:
+                        return True
+
+        return False
+
+    def _remove(self, ignore: _Ignore) -> None:
+
+        if ignore.recursive:
+            ignores = self._recursive.get(ignore.event.src_path, [])
+        else:
+            ignores = self._exact.get(ignore.event.key, [])
+
+        try:
+            ignores.remove(ignore)
+        except ValueError:
+            # already removed
+            return
+
+        self._len -= 1
+
+        if len(ignores) == 0:
+            if ignore.recursive:
+                self._recursive.pop(ignore.event.src_path, None)
+            else:
+                del self._exact[ignore.event.key]
+
+
+class _PathHistory:
+    """
+    A summary of all file system events for a single path. Events are merged into the
+    summary as they arrive, keeping only the information which is required to later
+    reduce them to a single event per path. Moved events must be split into deleted and
+    created events before being added, see :func:`split_moved_event`.
+
+    :param event: First event for the path.
+    :param timestamp: Time when the event was registered.
+    """
+
+    __slots__ = (
+        "first_event",
+        "last_is_directory",
+        "n_events",
+        "n_created",
+        "n_deleted",
+        "deleted_first",
+        "first_time",
+        "last_time",
+    )
+
+    def __init__(self, event: FileSystemEvent, timestamp: float) -> None:
+        self.first_event = event
+        self.n_events = 0
+        self.n_created = 0
+        self.n_deleted = 0
+        self.deleted_first: Optional[bool] = None
+        self.first_time = timestamp
+        self.add(event, timestamp)
+
+    def add(self, event: FileSystemEvent, timestamp: float) -> None:
+        """
+        Merges a new event into the history.
+
+        :param event: Event for the same path. Must not be a moved event.
+        :param timestamp: Time when the event was registered.
+        """
+
+        self.n_events += 1
+        self.last_is_directory = event.is_directory
+        self.last_time = timestamp
+
+        if event.event_type == EVENT_TYPE_CREATED:
+            self.n_created += 1
+            if self.deleted_first is None:
+                self.deleted_first = False
+        elif event.event_type == EVENT_TYPE_DELETED:
+            self.n_deleted += 1
+            if self.deleted_first is None:
+                self.deleted_first = True
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}(first_event={self.first_event}, "
+            f"n_events={self.n_events}, n_created={self.n_created}, "
+            f"n_deleted={self.n_deleted})>"
+        )
+
+
 class FSEventHandler(FileSystemEventHandler):
     """A local file event handler
 
@@ -217,8 +406,8 @@ class FSEventHandler(FileSystemEventHandler):
         discarded.
     """
 
-    _ignored_events: List[_Ignore]
-    local_file_event_queue: "Queue[FileSystemEvent]"
+    _ignored_events: _IgnoreRegistry
+    _histories: Dict[str, _PathHistory]
 
     def __init__(
         self,
@@ -244,15 +433,22 @@ class FSEventHandler(FileSystemEventHandler):
         self.file_event_types = file_event_types
         self.dir_event_types = dir_event_types
 
-        self._ignored_events = []
+        self._ignored_events = _IgnoreRegistry()
         self.ignore_timeout = 2.0
-        self.local_file_event_queue = Queue()
+
+        self._histories = dict()
+        self._last_event_time = 0.0
 
     @property
     def enabled(self) -> bool:
         """Whether queuing of events is enabled."""
         return self._enabled
 
+    @property
+    def pending_paths(self) -> int:
+        """The number of paths with queued events."""
+        return len(self._histories)
+
     def enable(self) -> None:
         """Turn on queueing of events."""
         self._enabled = True
@@ -261,11 +457,9 @@ class FSEventHandler(FileSystemEventHandler):
         """Turn off queueing of new events and remove all events from queue."""
         self._enabled = False
 
-        while True:
-            try:
-                self.local_file_event_queue.get_nowait()
-            except Empty:
-                break
+        with self.has_events:
+            self._histories.clear()
+            self.has_events.notify_all()
 
     @contextmanager
     def ignore(
@@ -290,36 +484,28 @@ class FSEventHandler(FileSystemEventHandler):
         now = time.time()
         new_ignores = []
         for e in events:
-            new_ignores.append(
-                _Ignore(
-                    event=e,
-                    start_time=now,
-                    ttl=None,
-                    recursive=recursive and e.is_directory,
-                )
+            ignore = _Ignore(
+                event=e,
+                start_time=now,
+                ttl=None,
+                recursive=recursive and e.is_directory,
             )
-        self._ignored_events.extend(new_ignores)  # this is atomic
+            self._ignored_events.add(ignore)
+            new_ignores.append(ignore)
 
         try:
             yield
         finally:
+            ttl = time.time() + self.ignore_timeout
+
             for ignore in new_ignores:
-                ignore.ttl = time.time() + self.ignore_timeout
+                self._ignored_events.set_ttl(ignore, ttl)
 
             self.expire_ignored_events()
 
     def expire_ignored_events(self) -> None:
         """Removes all expired ignore entries."""
-
-        now = time.time()
-        for ignore in self._ignored_events.copy():
-            ttl = ignore.ttl
-            if ttl and ttl < now:
-                try:
-                    self._ignored_events.remove(ignore)
-                except ValueError:
-                    # someone else removed it in the meantime
-                    pass
+        self._ignored_events.expire()
 
     def _is_ignored(self, event: FileSystemEvent) -> bool:
         """
@@ -330,32 +516,7 @@ class FSEventHandler(FileSystemEventHandler):
         :returns: Whether the event should be ignored.
         """
 
-        for ignore in self._ignored_events.copy():
-            ignore_event = ignore.event
-            recursive = ignore.recursive
-
-            if event == ignore_event:
-
-                if not recursive:
-                    try:
-                        self._ignored_events.remove(ignore)
-                    except ValueError:
-                        pass
-
-                return True
-
-            elif recursive:
-
-                type_match = event.event_type == ignore_event.event_type
-                src_match = is_equal_or_child(event.src_path, ignore_event.src_path)
-                dest_match = is_equal_or_child(
-                    get_dest_path(event), get_dest_path(ignore_event)
-                )
-
-                if type_match and src_match and dest_match:
-                    return True
-
-        return False
+        return self._ignored_events.match(event)
 
     def on_any_event(self, event: FileSystemEvent) -> None:
         """
@@ -389,12 +550,133 @@ class FSEventHandler(FileSystemEventHandler):
         Queues an individual file system event. Notifies / wakes up all threads that are
         waiting with :meth:`wait_for_event`.
 
+        Events are merged on arrival with previous events for the same path. Memory
+        usage therefore scales with the number of changed paths and not with the number
+        of events.
+
         :param event: File system event to queue.
         """
         with self.has_events:
-            self.local_file_event_queue.put(event)
+            now = time.time()
+            add_to_histories(self._histories, event, now)
+            self._last_event_time = now
             self.has_events.notify_all()
 
+    def pop_histories(self, delay: float = 0) -> Tuple[Dict[str, _PathHistory], float]:
+        """
+        Waits until no new events have been queued for ``delay`` seconds and then
+        removes all queued events.
+
+        :param delay: Time in seconds for which the queue must be idle before returning.
+        :returns: Tuple of event histories per path and the time when the last event
+            was queued, or the current time if there are no events.
+        """
+
+        with self.has_events:
+            while True:
+                idle_time = time.time() - self._last_event_time
+                if idle_time >= delay:
+                    break
+                self.has_events.wait(delay - idle_time)
+
+            histories = self._histories
+            self._histories = dict()
+
+            timestamp = self._last_event_time if histories else time.time()
+
+        return histories, timestamp
+
+    def pop_quiet_histories(
+        self, delay: float
+    ) -> Tuple[Dict[str, _PathHistory], float]:
+        """
+        Removes and returns the events of all paths which have not changed for at least
+        ``delay`` seconds, while paths with more recent events keep accumulating them.
+        Blocks until at least one path is quiet or the queue is cleared.
+
+        Paths with a parent or child which is still changing are held back until the
+        entire subtree is quiet. This keeps events of moved or deleted folders and their
+        children together. The source and destination of a move are held back together
+        so that the move can be recombined from its deleted and created halves.
+
+        :param delay: Time in seconds without new events after which a path is
+            considered quiet.
+        :returns: Tuple of event histories per path and a timestamp before which all
+            events have been returned.
+        """
+
+        with self.has_events:
+
+            histories: Dict[str, _PathHistory] = dict()
+
+            while self._histories:
+
+                quiet_before = time.time() - delay
+                busy = PathTrie()
+                moves: Dict[uuid.UUID, List[str]] = dict()
+
+                for path, history in self._histories.items():
+                    if history.last_time > quiet_before:
+                        busy[path] = history
+
+                    if hasattr(history.first_event, "move_id"):
+                        add_to_bin(moves, history.first_event.move_id, path)
+
+                # least recent change of a busy path, before holding back moves
+                last_busy_time = min(
+                    (h.last_time for _, h in busy.items()), default=quiet_before
+                )
+
+                # hold back both halves of a move if either half is held back
+                found_busy_move = True
+
+                while found_busy_move:
+                    found_busy_move = False
+
+                    for move_id, paths in list(moves.items()):
+                        if any(
+                            busy.has_equal_or_parent(p) or busy.has_equal_or_child(p)
+                            for p in paths
+                        ):
+                            for p in paths:
+                                busy[p] = self._histories[p]
+                            del moves[move_id]
+                            found_busy_move = True
+
+                for path, history in self._histories.items():
+                    if (
+                        history.last_time <= quiet_before
+                        and not busy.has_equal_or_parent(path)
+                        and not busy.has_equal_or_child(path)
+                    ):
+                        histories[path] = history
+
+                if histories:
+                    break
+
+                # Wait until the least recently changed busy path becomes quiet. New
+                # events cannot make any path quiet earlier, notifications are
+                # therefore ignored unless the queue has been cleared.
+                quiet_time = last_busy_time + delay
+
+                while self._histories:
+                    remaining = quiet_time - time.time()
+                    if remaining <= 0:
+                        break
+                    self.has_events.wait(remaining)
+
+            for path in histories:
+                del self._histories[path]
+
+            if self._histories:
+                timestamp = min(h.first_time for h in self._histories.values())
+            elif histories:
+                timestamp = self._last_event_time
+            else:
+                timestamp = time.time()
+
+        return histories, timestamp
+
     def wait_for_event(self, timeout: float = 40) -> bool:
         """
         Blocks until an event is available in the queue or a timeout occurs, whichever
@@ -402,8 +684,8 @@ class FSEventHandler(FileSystemEventHandler):
         thread.
 
         .. note:: If there are multiple threads waiting for events, all of them will be
-            notified. If one of those threads starts getting events from
-            :attr:`local_file_event_queue`, other threads may find that queue empty. You
+            notified. If one of those threads starts getting events with
+            :meth:`pop_histories`, other threads may find that queue empty. You
             should therefore always be prepared to handle an empty queue, if if this
             method returns ``True``.
 
@@ -413,78 +695,335 @@ class FSEventHandler(FileSystemEventHandler):
         """
 
         with self.has_events:
-            if self.local_file_event_queue.qsize() > 0:
+            if len(self._histories) > 0:
                 return True
             self.has_events.wait(timeout)
-            return self.local_file_event_queue.qsize() > 0
+            return len(self._histories) > 0
 
 
 class PersistentStateMutableSet(abc.MutableSet):
-    """Wraps a list in our state file as a MutableSet
+    """A set of lower-case Dropbox paths which is persisted in our database
 
-    :param config_name: Name of config (determines name of state file).
-    :param section: Section name in state file.
-    :param option: Option name in state file.
+    Entries are stored in the :class:`maestral.database.PathSetEntry` table, indexed by
+    the name of the set and the path. Membership tests and checks for entries under a
+    given path are single index lookups instead of scans over all entries.
+
+    :param get_session: Callable which returns the current database session. The
+        session may be replaced during the lifetime of the set.
+    :param database_access: Callable which returns a context manager that synchronises
+        access to the database session.
+    :param name: Name of the set.
     """
 
-    def __init__(self, config_name: str, section: str, option: str) -> None:
+    def __init__(
+        self,
+        get_session: Callable[[], Any],
+        database_access: Callable[[], ContextManager[None]],
+        name: str,
+    ) -> None:
         super().__init__()
-        self.config_name = config_name
-        self.section = section
-        self.option = option
-        self._state = MaestralState(config_name)
-        self._lock = RLock()
+        self.name = name
+        self._get_session = get_session
+        self._database_access = database_access
 
-    def __iter__(self) -> Iterator[Any]:
-        with self._lock:
-            return iter(self._state.get(self.section, self.option))
+    @property
+    def _session(self) -> Any:
+        return self._get_session()
+
+    def _query(self):
+        return self._session.query(PathSetEntry).filter(
+            PathSetEntry.set_name == self.name
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        with self._database_access():
+            paths = [entry.path for entry in self._query()]
+        return iter(paths)
 
     def __contains__(self, entry: Any) -> bool:
+        with self._database_access():
+            return self._session.query(PathSetEntry).get((self.name, entry)) is not None
+
+    def __len__(self) -> int:
+        with self._database_access():
+            return self._query().count()
+
+    def has_equal_or_child(self, path: str) -> bool:
+        """
+        Checks if the set contains the given path or any of its children.
+
+        :param path: Lower-case Dropbox path.
+        :returns: Whether the path or one of its children is in the set.
+        """
+
+        path = path.rstrip("/")
+
+        # Children sort between "path/" and "path0" since "0" follows "/".
+        query = self._query().filter(
+            or_(
+                PathSetEntry.path == path,
+                and_(PathSetEntry.path >= f"{path}/", PathSetEntry.path < f"{path}0"),
+            )
+        )
+
+        with self._database_access():
+            return query.first() is not None
+
+    def add(self, entry: str) -> None:
+        with self._database_access():
+            self._session.merge(PathSetEntry(set_name=self.name, path=entry))
+            self._session.commit()
+
+    def discard(self, entry: str) -> None:
+        with self._database_access():
+            self._query().filter(PathSetEntry.path == entry).delete(
+                synchronize_session="fetch"
+            )
+            self._session.commit()
+
+    def update(self, *others: Iterable[str]) -> None:
+        with self._database_access():
+            for other in others:
+                for entry in other:
+                    self._session.merge(PathSetEntry(set_name=self.name, path=entry))
+            self._session.commit()
+
+    def difference_update(self, *others: Iterable[str]) -> None:
+        with self._database_access():
+            for other in others:
+                paths = list(other)
+                if paths:
+                    self._query().filter(PathSetEntry.path.in_(paths)).delete(
+                        synchronize_session="fetch"
+                    )
+            self._session.commit()
+
+    def clear(self) -> None:
+        """Clears all elements."""
+        with self._database_access():
+            self._query().delete(synchronize_session="fetch")
+            self._session.commit()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(name='{self.name}', entries={list(self)})>"
+
+
+class SyncActivity:
+    """A queue of sync events which are waiting for or currently syncing
+
+    Events are kept in the order in which they were added. They are also indexed by
+    their lower-case Dropbox path and sync direction, so that the sync status of an
+    item or of a folder with syncing children can be looked up with a cost which is
+    proportional to the depth of the path instead of the number of events.
+
+    This class is thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._events: Dict[int, SyncEvent] = {}
+        self._by_path: Dict[str, List[SyncEvent]] = {}
+        self._tries = {SyncDirection.Up: PathTrie(), SyncDirection.Down: PathTrie()}
+        self._counts = {SyncDirection.Up: 0, SyncDirection.Down: 0}
+
+    def append(self, event: SyncEvent) -> None:
+        """
+        Adds an event to the end of the queue.
+
+        :param event: Sync event.
+        """
+
+        dbx_path_lower = event.dbx_path.lower()
+
+        with self._lock:
+            self._events[id(event)] = event
+            self._by_path.setdefault(dbx_path_lower, []).append(event)
+
+            trie = self._tries[event.direction]
+            trie[dbx_path_lower] = trie.get(dbx_path_lower, 0) + 1
+            self._counts[event.direction] += 1
+
+    def remove(self, event: SyncEvent) -> None:
+        """
+        Removes an event from the queue.
+
+        :param event: Sync event.
+        :raises ValueError: if the event is not queued.
+        """
+
+        dbx_path_lower = event.dbx_path.lower()
+
         with self._lock:
-            return entry in self._state.get(self.section, self.option)
+            if self._events.pop(id(event), None) is None:
+                raise ValueError(f"{event} is not queued")
+
+            events = self._by_path[dbx_path_lower]
+            events.remove(event)
+
+            if not events:
+                del self._by_path[dbx_path_lower]
+
+            trie = self._tries[event.direction]
+            count = trie[dbx_path_lower] - 1
+
+            if count > 0:
+                trie[dbx_path_lower] = count
+            else:
+                del trie[dbx_path_lower]
 
-    def __len__(self):
+            self._counts[event.direction] -= 1
+
+    def clear(self) -> None:
+        """Removes all events."""
         with self._lock:
-            return len(self._state.get(self.section, self.option))
+            self._events.clear()
+            self._by_path.clear()
+            for trie in self._tries.values():
+                trie.clear()
+            for direction in self._counts:
+                self._counts[direction] = 0
 
-    def add(self, entry: Any) -> None:
+    def count(self, direction: SyncDirection) -> int:
+        """
+        Returns the number of events in a sync direction.
+
+        :param direction: Sync direction.
+        :returns: Number of queued events.
+        """
+        return self._counts[direction]
+
+    def get_direction(self, dbx_path: str) -> Optional[SyncDirection]:
+        """
+        Returns the sync direction of an item. For items with several queued events,
+        the first event determines the direction. Folders without own events are
+        uploading if any of their children is uploading and downloading if any of their
+        children is downloading.
+
+        :param dbx_path: Dropbox path of the item.
+        :returns: Sync direction or ``None`` if neither the item nor any of its
+            children are syncing.
+        """
+
+        dbx_path_lower = dbx_path.lower()
+
+        with self._lock:
+            events = self._by_path.get(dbx_path_lower)
+
+            if events:
+                return events[0].direction
+
+            for direction, trie in self._tries.items():
+                if trie.has_equal_or_child(dbx_path_lower):
+                    return direction
+
+        return None
+
+    def __contains__(self, event: Any) -> bool:
+        return id(event) in self._events
+
+    def __iter__(self) -> Iterator[SyncEvent]:
         with self._lock:
-            state_list = self._state.get(self.section, self.option)
-            state_list = set(state_list)
-            state_list.add(entry)
-            self._state.set(self.section, self.option, list(state_list))
+            events = list(self._events.values())
+        return iter(events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(len={len(self)})>"
+
+
+class SyncErrorSet(abc.MutableSet):
+    """A set of sync errors which is indexed by their lower-case Dropbox path
+
+    Errors without a Dropbox path are not supported. Looking up errors for a path and
+    removing all errors for a path and its children has a cost which is proportional
+    to the depth of the path instead of the number of errors.
+
+    This class is thread-safe.
+    """
 
-    def discard(self, entry: Any) -> None:
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = Lock()
+        self._errors: Set[SyncError] = set()
+        self._trie = PathTrie()
+
+    def __contains__(self, error: Any) -> bool:
+        return error in self._errors
+
+    def __iter__(self) -> Iterator[SyncError]:
         with self._lock:
-            state_list = self._state.get(self.section, self.option)
-            state_list = set(state_list)
-            state_list.discard(entry)
-            self._state.set(self.section, self.option, list(state_list))
+            errors = list(self._errors)
+        return iter(errors)
+
+    def __len__(self) -> int:
+        return len(self._errors)
+
+    def add(self, error: SyncError) -> None:
+        if not error.dbx_path:
+            raise ValueError("Sync error must have a Dropbox path")
+
+        dbx_path_lower = error.dbx_path.lower()
 
-    def update(self, *others: Any) -> None:
         with self._lock:
-            state_list = self._state.get(self.section, self.option)
-            state_list = set(state_list)
-            state_list.update(*others)
-            self._state.set(self.section, self.option, list(state_list))
+            if error not in self._errors:
+                self._errors.add(error)
+                errors = self._trie.get(dbx_path_lower)
+
+                if errors is None:
+                    errors = []
+                    self._trie[dbx_path_lower] = errors
 
-    def difference_update(self, *others: Any) -> None:
+                errors.append(error)
+
+    def discard(self, error: SyncError) -> None:
         with self._lock:
-            state_list = self._state.get(self.section, self.option)
-            state_list = set(state_list)
-            state_list.difference_update(*others)
-            self._state.set(self.section, self.option, list(state_list))
+            if error in self._errors:
+                self._errors.discard(error)
+                self._remove_from_trie(error)
 
     def clear(self) -> None:
-        """Clears all elements."""
         with self._lock:
-            self._state.set(self.section, self.option, [])
+            self._errors.clear()
+            self._trie.clear()
+
+    def get(self, dbx_path: str) -> List[SyncError]:
+        """
+        Returns the errors for a path.
+
+        :param dbx_path: Dropbox path.
+        :returns: Errors for the path, may be empty.
+        """
+        with self._lock:
+            return list(self._trie.get(dbx_path.lower(), []))
+
+    def discard_equal_or_children(self, dbx_path: str) -> int:
+        """
+        Removes all errors for a path and its children.
+
+        :param dbx_path: Dropbox path.
+        :returns: Number of removed errors.
+        """
+
+        with self._lock:
+            errors = [e for _, es in self._trie.items(dbx_path.lower()) for e in es]
+
+            for error in errors:
+                self._errors.discard(error)
+                self._remove_from_trie(error)
+
+        return len(errors)
+
+    def _remove_from_trie(self, error: SyncError) -> None:
+        dbx_path_lower = cast(str, error.dbx_path).lower()
+        errors = self._trie[dbx_path_lower]
+        errors.remove(error)
+        if not errors:
+            del self._trie[dbx_path_lower]
 
     def __repr__(self) -> str:
-        return (
-            f"<{self.__class__.__name__}(section='{self.section}',"
-            f"option='{self.option}', entries={list(self)})>"
-        )
+        return f"<{self.__class__.__name__}(len={len(self)})>"
 
 
 class SyncEngine:
@@ -496,9 +1035,12 @@ class SyncEngine:
     :param client: Dropbox API client instance.
     """
 
-    sync_errors: Set[SyncError]
-    syncing: List[SyncEvent]
+    sync_errors: SyncErrorSet
+    syncing: SyncActivity
     _case_conversion_cache: LRUCache
+    _index_cache: StripedLRUCache
+    _index_mirror: Optional[IndexMirror]
+    _mignore_cache: LRUCache
 
     _max_history = 1000
     _num_threads = min(32, CPU_COUNT * 3)
@@ -509,73 +1051,158 @@ class SyncEngine:
         self.config_name = self.client.config_name
         self.fs_events = FSEventHandler()
 
-        self.sync_lock = RLock()
-        self._db_lock = RLock()
+        # metrics are collected in the client's registry
+        self.metrics = self.client.metrics
+        self._init_metrics()
+
+        self.sync_lock = InstrumentedLock(RLock(), self._lock_wait.labels("sync_lock"))
+        self._db_lock = InstrumentedLock(RLock(), self._lock_wait.labels("db_lock"))
 
         self._conf = MaestralConfig(self.config_name)
         self._state = MaestralState(self.config_name)
 
         self.notifier = notify.MaestralDesktopNotifier(self.config_name)
 
+        # data structures for internal communication
+        self.sync_errors = SyncErrorSet()
+        self._cancel_requested = Event()
+
+        # data structures for user information
+        self.syncing = SyncActivity()
+        self._change_callbacks: List[Callable[[], None]] = []
+
+        # durations of startup phases
+        self.startup_timings: Dict[str, float] = {}
+
+        # determine file paths
+        self._dropbox_path = self._conf.get("main", "path")
+        self._mignore_path = osp.join(self._dropbox_path, MIGNORE_FILE)
+        self._file_cache_path = osp.join(self._dropbox_path, FILE_CACHE)
+        self._db_path = get_data_path("maestral", f"{self.config_name}.db")
+
+        # clean our file cache while the database is loaded
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="maestral-cache-cleaner"
+        ) as executor:
+            cache_cleaned = executor.submit(self._clean_cache_dir_timed)
+            self._init_database()
+
+        # raise any errors from cleaning the cache
+        cache_cleaned.result()
+
         # upload_errors / download_errors: contains failed uploads / downloads
         # (from sync errors) to retry later
         self.upload_errors = PersistentStateMutableSet(
-            self.config_name, section="sync", option="upload_errors"
+            self._get_db_session, self._database_access, "upload_errors"
+        )
+        self.download_errors = PersistentStateMutableSet(
+            self._get_db_session, self._database_access, "download_errors"
+        )
+        # pending_uploads / pending_downloads: contains interrupted uploads / downloads
+        # to retry later. Running uploads / downloads can be stored in these lists to be
+        # resumed if Maestral quits unexpectedly. This used for downloads which are not
+        # part of the regular sync cycle and are therefore not restarted automatically.
+        self.pending_downloads = PersistentStateMutableSet(
+            self._get_db_session, self._database_access, "pending_downloads"
+        )
+        self.pending_uploads = PersistentStateMutableSet(
+            self._get_db_session, self._database_access, "pending_uploads"
+        )
+
+        try:
+            self._migrate_path_sets()
+        except DatabaseError as exc:
+            logger.error(exc.title, exc_info=exc_info_tuple(exc))
+
+        # load cached properties
+        self._is_case_sensitive = is_fs_case_sensitive(get_home_dir())
+        self._mignore_rules = self._load_mignore_rules_form_file()
+        self._mignore_matcher = MignoreMatcher(self._mignore_rules)
+        self._excluded_items = self._conf.get("main", "excluded_items")
+        self._excluded_items_trie = self._build_excluded_items_trie(
+            self._excluded_items
+        )
+        self._max_cpu_percent = self._conf.get("sync", "max_cpu_percent") * CPU_COUNT
+        self._cpu_governor = CPUGovernor(self._max_cpu_percent)
+
+        # caches
+        self._case_conversion_cache = LRUCache(capacity=5000)
+        self._index_cache = StripedLRUCache(capacity=20000)
+        self._mignore_cache = LRUCache(capacity=5000)
+
+    def _init_metrics(self) -> None:
+        """Registers the metrics of the sync engine."""
+
+        self._lock_wait = self.metrics.histogram(
+            "maestral_lock_wait_seconds",
+            "Time spent waiting to acquire locks of the sync engine.",
+            ["lock"],
+            buckets=LOCK_WAIT_BUCKETS,
+        )
+        self._sync_events = self.metrics.counter(
+            "maestral_sync_events_total",
+            "Sync events which were processed.",
+            ["direction", "status"],
         )
-        self.download_errors = PersistentStateMutableSet(
-            self.config_name, section="sync", option="download_errors"
+        self._hash_duration = self.metrics.histogram(
+            "maestral_hash_duration_seconds",
+            "Time to compute content hashes of local files.",
         )
-        # pending_uploads / pending_downloads: contains interrupted uploads / downloads
-        # to retry later. Running uploads / downloads can be stored in these lists to be
-        # resumed if Maestral quits unexpectedly. This used for downloads which are not
-        # part of the regular sync cycle and are therefore not restarted automatically.
-        self.pending_downloads = PersistentStateMutableSet(
-            self.config_name, section="sync", option="pending_downloads"
+        self._db_access_duration = self.metrics.histogram(
+            "maestral_db_access_duration_seconds",
+            "Time spent accessing the index database while holding its lock.",
+            buckets=LOCK_WAIT_BUCKETS,
         )
-        self.pending_uploads = PersistentStateMutableSet(
-            self.config_name, section="sync", option="pending_uploads"
+
+        queue_size = self.metrics.gauge(
+            "maestral_sync_queue_size",
+            "Sync events which are queued or syncing.",
+            ["direction"],
         )
 
-        # data structures for internal communication
-        self.sync_errors = set()
-        self._cancel_requested = Event()
+        for direction in SyncDirection:
+            queue_size.labels(direction.value).set_function(
+                lambda d=direction: self.syncing.count(d)
+            )
 
-        # data structures for user information
-        self.syncing = []
+        self.metrics.gauge(
+            "maestral_sync_errors", "Number of current sync errors."
+        ).set_function(lambda: len(self.sync_errors))
+        self.metrics.gauge(
+            "maestral_local_events_pending",
+            "Local paths with file system events which are waiting to be synced.",
+        ).set_function(lambda: self.fs_events.pending_paths)
 
-        # determine file paths
-        self._dropbox_path = self._conf.get("main", "path")
-        self._mignore_path = osp.join(self._dropbox_path, MIGNORE_FILE)
-        self._file_cache_path = osp.join(self._dropbox_path, FILE_CACHE)
-        self._db_path = get_data_path("maestral", f"{self.config_name}.db")
+    def _init_database(self) -> None:
+        """
+        Initializes the SQLite database and loads the in-memory copy of the index.
+        """
 
         # reset sync state if DB is missing
         if not osp.exists(self._db_path):
             self.remote_cursor = ""
 
         # initialize SQLite database
-        url = sqlalchemy.engine.url.URL(
-            drivername="sqlite",
-            database=f"file:{self._db_path}",
-            query={"check_same_thread": "false", "uri": "true"},
-        )
-        self._db_engine = create_engine(url)
-        with self._database_access(log_errors=True):
-            Base.metadata.create_all(self._db_engine)
-            Session.configure(bind=self._db_engine)
-        self._db_session = Session()
-
-        # load cached properties
-        self._is_case_sensitive = is_fs_case_sensitive(get_home_dir())
-        self._mignore_rules = self._load_mignore_rules_form_file()
-        self._excluded_items = self._conf.get("main", "excluded_items")
-        self._max_cpu_percent = self._conf.get("sync", "max_cpu_percent") * CPU_COUNT
-
-        # caches
-        self._case_conversion_cache = LRUCache(capacity=5000)
+        with timed(self.startup_timings, "database"):
+            url = sqlalchemy.engine.url.URL(
+                drivername="sqlite",
+                database=f"file:{self._db_path}",
+                query={"check_same_thread": "false", "uri": "true"},
+            )
+            self._db_engine = create_engine(url)
+            with self._database_access(log_errors=True):
+                Base.metadata.create_all(self._db_engine)
+                Session.configure(bind=self._db_engine)
+            self._db_session = Session()
 
-        # clean our file cache
-        self.clean_cache_dir()
+        # load in-memory copy of our index
+        with timed(self.startup_timings, "index_mirror"):
+            if self._conf.get("sync", "index_mirror"):
+                self._index_mirror = IndexMirror()
+                with self._database_access(log_errors=True):
+                    self._index_mirror.load(self._db_session)
+            else:
+                self._index_mirror = None
 
     # ==== config access ===============================================================
 
@@ -630,6 +1257,7 @@ class SyncEngine:
         with self.sync_lock:
             clean_list = self.clean_excluded_items_list(folder_list)
             self._excluded_items = clean_list
+            self._excluded_items_trie = self._build_excluded_items_trie(clean_list)
             self._conf.set("main", "excluded_items", clean_list)
 
     @staticmethod
@@ -645,12 +1273,28 @@ class SyncEngine:
         # remove duplicate entries by creating set, strip trailing '/'
         folder_set = set(f.lower().rstrip("/") for f in folder_list)
 
-        # remove all children of excluded folders
-        clean_list = list(folder_set)
-        for folder in folder_set:
-            clean_list = [f for f in clean_list if not is_child(f, folder)]
+        # remove all children of excluded folders, parents are sorted before children
+        trie = PathTrie()
 
-        return clean_list
+        for folder in sorted(folder_set, key=lambda f: f.count("/")):
+            if not trie.has_equal_or_parent(folder):
+                trie[folder] = None
+
+        return list(trie)
+
+    @staticmethod
+    def _build_excluded_items_trie(excluded_items: List[str]) -> PathTrie:
+        """
+        Creates a trie from a list of excluded items for fast lookups. The trie is
+        replaced instead of mutated on changes so that it can be read without locking.
+
+        :param excluded_items: Lower-cased Dropbox paths of excluded items.
+        :returns: Trie of excluded items.
+        """
+        trie = PathTrie()
+        for path in excluded_items:
+            trie[path.lower().rstrip("/")] = None
+        return trie
 
     @property
     def max_cpu_percent(self) -> float:
@@ -665,6 +1309,7 @@ class SyncEngine:
     def max_cpu_percent(self, percent: float) -> None:
         """Setter: max_cpu_percent."""
         self._max_cpu_percent = percent
+        self._cpu_governor.limit = percent
         self._conf.set("app", "max_cpu_percent", percent // CPU_COUNT)
 
     # ==== sync state ==================================================================
@@ -716,22 +1361,76 @@ class SyncEngine:
         return self._state.get("sync", "last_reindex")
 
     @property
-    def history(self) -> List[SyncEvent]:
+    def history(self) -> List[HistoryEntry]:
         """A list of the last SyncEvents in our history. History will be kept for the
         interval specified by the config value ``keep_history`` (defaults to two weeks)
         but at most 1,000 events will be kept."""
         with self._database_access():
-            query = self._db_session.query(SyncEvent)
-            ordered_query = query.order_by(SyncEvent.change_time_or_sync_time)
+            query = self._db_session.query(HistoryEntry)
+            ordered_query = query.order_by(HistoryEntry.change_time_or_sync_time)
             return ordered_query.limit(self._max_history).all()
 
     def clear_sync_history(self) -> None:
         """Clears the sync history."""
         with self._database_access():
-            SyncEvent.metadata.drop_all(self._db_engine)
-            Base.metadata.create_all(self._db_engine)
+            HistoryEntry.__table__.drop(self._db_engine)
+            HistoryEntry.__table__.create(self._db_engine)
             self._db_session.expunge_all()
 
+        self._notify_change()
+
+    @property
+    def last_history_id(self) -> int:
+        """The ID of the last entry added to the sync history or zero if the history is
+        empty."""
+        with self._database_access():
+            res = self._db_session.query(func.max(HistoryEntry.id)).first()
+
+        if res:
+            return res[0] or 0
+        else:
+            return 0
+
+    def get_history_after(self, entry_id: int) -> List[HistoryEntry]:
+        """
+        Returns all entries which were added to the sync history after the given entry.
+
+        :param entry_id: ID of a history entry.
+        :returns: History entries, ordered by the time they were added.
+        """
+        with self._database_access():
+            query = self._db_session.query(HistoryEntry)
+            query = query.filter(HistoryEntry.id > entry_id)
+            return query.order_by(HistoryEntry.id).limit(self._max_history).all()
+
+    # ==== change notifications ========================================================
+
+    def add_change_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Registers a callback which is called when items are queued for sync or finish
+        syncing, when sync errors are added or removed and when the sync history
+        changes. The callback is called without arguments from sync threads and should
+        return quickly.
+
+        :param callback: Callable without arguments.
+        """
+        self._change_callbacks.append(callback)
+
+    def remove_change_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Removes a callback which was registered with :meth:`add_change_callback`.
+
+        :param callback: Registered callable.
+        """
+        try:
+            self._change_callbacks.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify_change(self) -> None:
+        for callback in self._change_callbacks:
+            callback()
+
     # ==== index management ============================================================
 
     def get_index(self) -> List[IndexEntry]:
@@ -760,6 +1459,9 @@ class SyncEngine:
         :returns: Number of index entries.
         """
 
+        if self._index_mirror is not None:
+            return len(self._index_mirror)
+
         with self._database_access():
             return self._db_session.query(IndexEntry).count()
 
@@ -772,15 +1474,10 @@ class SyncEngine:
             been saved.
         """
 
-        with self._database_access():
-            res = (
-                self._db_session.query(IndexEntry.rev)
-                .filter(IndexEntry.dbx_path_lower == dbx_path.lower())
-                .first()
-            )
+        entry = self.get_index_entry(dbx_path)
 
-        if res:
-            return res[0]
+        if entry:
+            return entry.rev
         else:
             return None
 
@@ -792,8 +1489,7 @@ class SyncEngine:
         :returns: Time of last sync.
         """
 
-        with self._database_access():
-            res = self._db_session.query(IndexEntry).get(dbx_path.lower())
+        res = self.get_index_entry(dbx_path)
 
         if res:
             last_sync = res.last_sync or 0.0
@@ -802,16 +1498,76 @@ class SyncEngine:
 
         return max(last_sync, self.local_cursor)
 
-    def get_index_entry(self, dbx_path: str) -> Optional[IndexEntry]:
+    def get_index_entry(
+        self, dbx_path: str
+    ) -> Optional[Union[IndexEntry, IndexRecord]]:
         """
-        Gets the index entry for the given Dropbox path.
+        Gets the index entry for the given Dropbox path. Results, including missing
+        entries, are cached and the cache is kept up to date when updating the index.
+        If the index is mirrored in memory, a read-only :class:`IndexRecord` is returned
+        from the mirror without accessing the database. In either case, the returned
+        entry must not be modified by the caller.
 
         :param dbx_path: Dropbox path.
         :returns: Index entry or ``None`` if no entry exists for the given path.
         """
 
-        with self._database_access():
-            return self._db_session.query(IndexEntry).get(dbx_path.lower())
+        dbx_path_lower = dbx_path.lower()
+
+        if self._index_mirror is not None:
+            return self._index_mirror.get(dbx_path_lower)
+
+        entry = self._index_cache.get(dbx_path_lower, _missing)
+
+        if entry is _missing:
+            with self._database_access():
+                entry = self._db_session.query(IndexEntry).get(dbx_path_lower)
+                self._index_cache.put(dbx_path_lower, entry)
+
+        return entry
+
+    def get_index_entries(
+        self, dbx_paths: Iterable[str]
+    ) -> Dict[str, Optional[Union[IndexEntry, IndexRecord]]]:
+        """
+        Gets the index entries for multiple Dropbox paths. Entries which are not cached
+        are loaded with a few database queries instead of one query per path. The same
+        restrictions as for :meth:`get_index_entry` apply to the returned entries.
+
+        :param dbx_paths: Dropbox paths.
+        :returns: Mapping of lower case Dropbox paths to index entries or ``None`` if
+            no entry exists for a path.
+        """
+
+        dbx_paths_lower = {p.lower() for p in dbx_paths}
+
+        if self._index_mirror is not None:
+            return {p: self._index_mirror.get(p) for p in dbx_paths_lower}
+
+        entries: Dict[str, Optional[Union[IndexEntry, IndexRecord]]] = {}
+        missing: List[str] = []
+
+        for dbx_path_lower in dbx_paths_lower:
+            entry = self._index_cache.get(dbx_path_lower, _missing)
+            if entry is _missing:
+                missing.append(dbx_path_lower)
+            else:
+                entries[dbx_path_lower] = entry
+
+        if missing:
+            with self._database_access():
+                # Stay below SQLite's limit of host parameters per query.
+                for chunk in chunks(missing, 500):
+                    query = self._db_session.query(IndexEntry)
+                    query = query.filter(IndexEntry.dbx_path_lower.in_(chunk))
+                    found = {e.dbx_path_lower: e for e in query}
+
+                    for dbx_path_lower in chunk:
+                        entry = found.get(dbx_path_lower)
+                        self._index_cache.put(dbx_path_lower, entry)
+                        entries[dbx_path_lower] = entry
+
+        return entries
 
     def get_local_hash(self, local_path: str) -> Optional[str]:
         """
@@ -848,7 +1604,8 @@ class SyncEngine:
                 return cache_entry.hash_str
 
         with convert_api_errors(local_path=local_path):
-            hash_str, mtime = content_hash(local_path)
+            with self._hash_duration.time():
+                hash_str, mtime = content_hash(local_path)
 
         self._save_local_hash(local_path, hash_str, mtime)
 
@@ -892,8 +1649,8 @@ class SyncEngine:
     def clear_hash_cache(self) -> None:
         """Clears the sync history."""
         with self._database_access():
-            HashCacheEntry.metadata.drop_all(self._db_engine)
-            Base.metadata.create_all(self._db_engine)
+            HashCacheEntry.__table__.drop(self._db_engine)
+            HashCacheEntry.__table__.create(self._db_engine)
             self._db_session.expunge_all()
 
     def update_index_from_sync_event(self, event: SyncEvent) -> None:
@@ -921,7 +1678,7 @@ class SyncEngine:
 
             if event.change_type is not ChangeType.Removed:
 
-                entry = self.get_index_entry(dbx_path_lower)
+                entry = self._db_session.query(IndexEntry).get(dbx_path_lower)
 
                 if entry:
                     # update existing entry
@@ -948,6 +1705,9 @@ class SyncEngine:
 
             self._db_session.commit()
 
+            if event.change_type is not ChangeType.Removed:
+                self._update_index_caches(dbx_path_lower, entry)
+
     def update_index_from_dbx_metadata(self, md: Metadata) -> None:
         """
         Updates the local index from Dropbox metadata.
@@ -973,8 +1733,8 @@ class SyncEngine:
 
                 # construct correct display path from ancestors
 
-                entry = self.get_index_entry(md.path_lower)
-                dbx_path_cased = self.correct_case(md.path_display)
+                entry = self._db_session.query(IndexEntry).get(md.path_lower)
+                dbx_path_cased = self.correct_case_batch([md])[md.path_lower]
 
                 if entry:
                     entry.dbx_id = md.id
@@ -999,6 +1759,9 @@ class SyncEngine:
 
             self._db_session.commit()
 
+            if not isinstance(md, DeletedMetadata):
+                self._update_index_caches(md.path_lower, entry)
+
     def remove_node_from_index(self, dbx_path: str) -> None:
         """
         Removes any local index entries for the given path and all its children.
@@ -1014,19 +1777,64 @@ class SyncEngine:
             self._db_session.query(IndexEntry).filter(
                 IndexEntry.dbx_path_lower == dbx_path_lower
             ).delete(synchronize_session="fetch")
-            self._db_session.query(IndexEntry).filter(
-                IndexEntry.dbx_path_lower.ilike(match)
-            ).delete(synchronize_session="fetch")
+            n_children = (
+                self._db_session.query(IndexEntry)
+                .filter(IndexEntry.dbx_path_lower.ilike(match))
+                .delete(synchronize_session="fetch")
+            )
 
             self._db_session.commit()
 
+            if self._index_mirror is not None:
+                self._index_mirror.remove(dbx_path_lower, recursive=n_children > 0)
+            elif n_children > 0:
+                # cached children are stale, this should be rare
+                self._index_cache.clear()
+            else:
+                self._index_cache.put(dbx_path_lower, None)
+
+    def _migrate_path_sets(self) -> None:
+        """
+        Moves entries of sets which were previously stored as lists in the state file
+        to the database.
+        """
+
+        for path_set in (
+            self.upload_errors,
+            self.download_errors,
+            self.pending_downloads,
+            self.pending_uploads,
+        ):
+            entries = self._state.get("sync", path_set.name)
+
+            if entries:
+                path_set.update(entries)
+                self._state.set("sync", path_set.name, [])
+
     def clear_index(self) -> None:
         """Clears the revision index."""
         with self._database_access():
 
-            IndexEntry.metadata.drop_all(self._db_engine)
-            Base.metadata.create_all(self._db_engine)
+            IndexEntry.__table__.drop(self._db_engine)
+            IndexEntry.__table__.create(self._db_engine)
             self._db_session.expunge_all()
+            self._index_cache.clear()
+
+            if self._index_mirror is not None:
+                self._index_mirror.clear()
+
+    def _update_index_caches(self, dbx_path_lower: str, entry: IndexEntry) -> None:
+        """
+        Updates our in-memory mirror or cache after an index entry has been written.
+        Must be called while holding the database lock.
+
+        :param dbx_path_lower: Lower case Dropbox path of the entry.
+        :param entry: Updated entry.
+        """
+        if self._index_mirror is not None:
+            self._index_mirror.update(entry)
+        else:
+            self._index_cache.put(dbx_path_lower, entry)
 
     # ==== mignore management ==========================================================
 
@@ -1038,9 +1846,15 @@ class SyncEngine:
     @property
     def mignore_rules(self) -> pathspec.PathSpec:
         """List of mignore rules following git wildmatch syntax (read only)."""
+        self._reload_mignore_rules_if_changed()
+        return self._mignore_rules
+
+    def _reload_mignore_rules_if_changed(self) -> None:
+        """Reloads the mignore rules if the mignore file has changed."""
         if self._get_ctime(self.mignore_path) != self._mignore_ctime_loaded:
             self._mignore_rules = self._load_mignore_rules_form_file()
-        return self._mignore_rules
+            self._mignore_matcher = MignoreMatcher(self._mignore_rules)
+            self._mignore_cache.clear()
 
     def _load_mignore_rules_form_file(self) -> pathspec.PathSpec:
         """Loads rules from mignore file. No rules are loaded if the file does
@@ -1058,6 +1872,16 @@ class SyncEngine:
 
     # ==== helper functions ============================================================
 
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit, miss and eviction counts and current sizes of our caches (read
+        only)."""
+        return dict(
+            index=self._index_cache.stats,
+            case_conversion=self._case_conversion_cache.stats,
+            mignore=self._mignore_cache.stats,
+        )
+
     @property
     def is_case_sensitive(self) -> bool:
         """Returns ``True`` if the local Dropbox folder is located on a partition with a
@@ -1127,6 +1951,10 @@ class SyncEngine:
                     f"{self._file_cache_path}.",
                 )
 
+    def _clean_cache_dir_timed(self) -> None:
+        with timed(self.startup_timings, "cache_dir"):
+            self.clean_cache_dir()
+
     def _new_tmp_file(self) -> str:
         """Returns a new temporary file name in our cache directory."""
         self._ensure_cache_dir_present()
@@ -1177,41 +2005,96 @@ class SyncEngine:
 
         dirname, basename = osp.split(dbx_path)
 
-        dbx_path_lower = dbx_path.lower()
-        dirname_lower = dirname.lower()
-
         if dirname == "/":
             path_cased = dbx_path
-
         else:
+            parent_path_cased = self._correct_dirname_case(dirname)
+            path_cased = f"{parent_path_cased}/{basename}"
 
-            # check in our conversion cache
-            parent_path_cased = self._case_conversion_cache.get(dirname_lower)
+        # add our result to the cache
+        self._case_conversion_cache.put(dbx_path.lower(), path_cased)
 
-            if not parent_path_cased:
-                # try to get dirname casing from our index, this is slower
-                with self._database_access():
-                    parent_entry = self.get_index_entry(dirname_lower)
+        return path_cased
 
-                if parent_entry:
-                    parent_path_cased = parent_entry.dbx_path_cased
+    def correct_case_batch(self, entries: List[Metadata]) -> Dict[str, str]:
+        """
+        Determines the correctly cased paths for a batch of Dropbox metadata, for
+        instance a page of results from ``files/list_folder``. Parent folders are
+        resolved from a mapping which is built from the entries themselves. Only parent
+        folders which are not part of the batch are looked up with
+        :meth:`correct_case`, i.e., from our cache, our index or Dropbox servers. Each
+        missing parent is looked up only once for the entire batch.
 
-                else:
-                    # fall back to querying from server
-                    md_parent = self.client.get_metadata(dirname_lower)
-                    if md_parent:
-                        # recurse over parent directories
-                        parent_path_cased = self.correct_case(md_parent.path_display)
-                    else:
-                        # give up
-                        parent_path_cased = dirname
+        Entries should be sorted by depth, as returned by the sync engine, such that
+        parent folders are processed before their children.
 
-            path_cased = f"{parent_path_cased}/{basename}"
+        :param entries: Dropbox metadata with correctly cased basenames.
+        :returns: Mapping of lower case paths to correctly cased paths.
+        """
 
-        # add our result to the cache
-        self._case_conversion_cache.put(dbx_path_lower, path_cased)
+        result: Dict[str, str] = dict()
+        parents: Dict[str, str] = dict()
 
-        return path_cased
+        for md in entries:
+
+            dirname, basename = osp.split(md.path_display)
+
+            if dirname == "/":
+                path_cased = md.path_display
+            else:
+                dirname_lower = dirname.lower()
+                parent_path_cased = result.get(dirname_lower)
+
+                if parent_path_cased is None:
+                    parent_path_cased = parents.get(dirname_lower)
+
+                if parent_path_cased is None:
+                    parent_path_cased = self._correct_dirname_case(dirname)
+                    parents[dirname_lower] = parent_path_cased
+
+                path_cased = f"{parent_path_cased}/{basename}"
+
+            result[md.path_lower] = path_cased
+
+            if isinstance(md, FolderMetadata):
+                # keep folders in our cache for the next batch
+                self._case_conversion_cache.put(md.path_lower, path_cased)
+
+        return result
+
+    def _correct_dirname_case(self, dirname: str) -> str:
+        """
+        Returns the correctly cased path of a parent folder, either from our cache, our
+        database or from Dropbox servers. See :meth:`correct_case`.
+
+        :param dirname: Dropbox path of the folder in arbitrary casing.
+        :returns: Correctly cased Dropbox path.
+        """
+
+        dirname_lower = dirname.lower()
+
+        # check in our conversion cache
+        parent_path_cased = self._case_conversion_cache.get(dirname_lower)
+
+        if not parent_path_cased:
+            # try to get dirname casing from our index, this is slower
+            with self._database_access():
+                parent_entry = self.get_index_entry(dirname_lower)
+
+            if parent_entry:
+                parent_path_cased = parent_entry.dbx_path_cased
+
+            else:
+                # fall back to querying from server
+                md_parent = self.client.get_metadata(dirname_lower)
+                if md_parent:
+                    # recurse over parent directories
+                    parent_path_cased = self.correct_case(md_parent.path_display)
+                else:
+                    # give up
+                    parent_path_cased = dirname
+
+        return parent_path_cased
 
     def to_dbx_path(self, local_path: str) -> str:
         """
@@ -1286,14 +2169,8 @@ class SyncEngine:
         dbx_path = cast(str, dbx_path)
         dbx_path_lower = dbx_path.lower()
 
-        if self.has_sync_errors():
-            for error in self.sync_errors.copy():
-                assert isinstance(error.dbx_path, str)
-                if is_equal_or_child(error.dbx_path.lower(), dbx_path_lower):
-                    try:
-                        self.sync_errors.remove(error)
-                    except KeyError:
-                        pass
+        if self.sync_errors.discard_equal_or_children(dbx_path_lower) > 0:
+            self._notify_change()
 
         self.upload_errors.discard(dbx_path_lower)
         self.download_errors.discard(dbx_path_lower)
@@ -1303,6 +2180,7 @@ class SyncEngine:
         self.sync_errors.clear()
         self.upload_errors.clear()
         self.download_errors.clear()
+        self._notify_change()
 
     @staticmethod
     def is_excluded(path) -> bool:
@@ -1331,9 +2209,9 @@ class SyncEngine:
             return True
 
         # in excluded dirs?
-        # TODO: check if this can be optimised
-        dirnames = dirname.split("/")
-        if any(excluded_dirname in dirnames for excluded_dirname in EXCLUDED_DIR_NAMES):
+        if _EXCLUDED_DIR_SUFFIX in dirname and not EXCLUDED_DIR_NAMES.isdisjoint(
+            dirname.split("/")
+        ):
             return True
 
         if "~" in basename:  # is temporary file?
@@ -1355,18 +2233,32 @@ class SyncEngine:
         :param dbx_path: Path relative to Dropbox folder.
         :returns: Whether the path is excluded from download syncing by the user.
         """
-        dbx_path = dbx_path.lower()
+        return self._excluded_items_trie.has_equal_or_parent(dbx_path.lower())
+
+    def is_partially_excluded_by_user(self, dbx_path: str) -> bool:
+        """
+        Check if any children of a folder have been excluded through "selective sync"
+        by the user.
+
+        :param dbx_path: Path relative to Dropbox folder.
+        :returns: Whether any children of the path are excluded by the user.
+        """
+        dbx_path = dbx_path.lower().rstrip("/")
+        trie = self._excluded_items_trie
 
-        return any(is_equal_or_child(dbx_path, path) for path in self.excluded_items)
+        return trie.has_equal_or_child(dbx_path) and dbx_path not in trie
 
     def is_mignore(self, event: SyncEvent) -> bool:
         """
         Check if local file change has been excluded by an mignore pattern.
 
+        This uses the currently loaded mignore rules. Callers should call
+        :meth:`_reload_mignore_rules_if_changed` once per batch of events.
+
         :param event: SyncEvent for local file event.
         :returns: Whether the path is excluded from upload syncing by the user.
         """
-        if len(self.mignore_rules.patterns) == 0:
+        if len(self._mignore_rules.patterns) == 0:
             return False
 
         return self._is_mignore_path(
@@ -1374,26 +2266,39 @@ class SyncEngine:
         ) and not self.get_local_rev(event.dbx_path)
 
     def _is_mignore_path(self, dbx_path: str, is_dir: bool = False) -> bool:
+        """
+        Checks if a path matches the currently loaded mignore rules. This does not
+        check if the mignore file has changed, callers should call
+        :meth:`_reload_mignore_rules_if_changed` first to reload the rules if required.
+
+        :param dbx_path: Dropbox path of the item.
+        :param is_dir: Whether the item is a folder.
+        :returns: Whether the path is ignored.
+        """
 
         relative_path = dbx_path.lstrip("/")
 
         if is_dir:
             relative_path += "/"
 
-        return self.mignore_rules.match_file(relative_path)
+        match = self._mignore_cache.get(relative_path)
+
+        if match is None:
+            match = self._mignore_matcher.match(relative_path)
+            self._mignore_cache.put(relative_path, match)
+
+        return match
 
     def _slow_down(self) -> None:
         """
         Pauses if CPU usage is too high if called from one of our thread pools.
-        """
 
-        if self._max_cpu_percent == 100:
-            return
+        :raises CancelledError: if sync is cancelled while paused.
+        """
 
         if "pool" in current_thread().name:
-            cpu_usage = cpu_usage_percent()
-            while cpu_usage > self._max_cpu_percent:
-                cpu_usage = cpu_usage_percent(0.5 + 2 * random.random())
+            if not self._cpu_governor.acquire(self._cancel_requested):
+                raise CancelledError("Sync cancelled")
 
     def cancel_sync(self) -> None:
         """
@@ -1401,6 +2306,7 @@ class SyncEngine:
         """
 
         self._cancel_requested.set()
+        self._cpu_governor.interrupt()
 
         # Wait until we can acquire the sync lock => we are idle.
         self.sync_lock.acquire()
@@ -1465,6 +2371,7 @@ class SyncEngine:
                 actions={"Show": callback},
             )
             self.sync_errors.add(err)
+            self._notify_change()
 
             # save download errors to retry later
             if direction == SyncDirection.Down:
@@ -1472,6 +2379,10 @@ class SyncEngine:
             elif direction == SyncDirection.Up:
                 self.upload_errors.add(err.dbx_path.lower())
 
+    def _get_db_session(self) -> Any:
+        """Returns the current database session. It is replaced by :meth:`_free_memory`."""
+        return self._db_session
+
     @contextmanager
     def _database_access(self, log_errors: bool = False) -> Iterator[None]:
         """
@@ -1489,7 +2400,8 @@ class SyncEngine:
 
         try:
             with self._db_lock:
-                yield
+                with self._db_access_duration.time():
+                    yield
         except (
             sqlalchemy.exc.DatabaseError,
             sqlalchemy.exc.DataError,
@@ -1521,7 +2433,7 @@ class SyncEngine:
     def _free_memory(self) -> None:
         """
         Frees memory by resetting our database session and the requests session,
-        clearing out case-conversion cache and clearing all expired event ignores and.
+        clearing out our caches and clearing all expired event ignores.
         """
 
         with self._database_access():
@@ -1531,6 +2443,8 @@ class SyncEngine:
 
         self.client.dbx.close()  # resets requests session
         self._case_conversion_cache.clear()
+        self._index_cache.clear()
+        self._mignore_cache.clear()
         self.fs_events.expire_ignored_events()
         gc.collect()
 
@@ -1581,6 +2495,7 @@ class SyncEngine:
 
         changes = []
         snapshot_time = time.time()
+        self._reload_mignore_rules_if_changed()
         snapshot = DirectorySnapshot(
             self.dropbox_path, listdir=self._scandir_with_mignore
         )
@@ -1693,27 +2608,24 @@ class SyncEngine:
     def list_local_changes(self, delay: float = 1) -> Tuple[List[SyncEvent], float]:
         """
         Waits for local file changes. Returns a list of local changes with at most one
-        entry per path.
+        entry per path. If the config option "stream_local_changes" is set, changes to
+        paths which have been quiet for ``delay`` are returned while other paths are
+        still changing.
 
         :param delay: Delay in sec to wait for subsequent changes before returning.
         :returns: (list of sync times events, time_stamp)
         """
 
-        events = []
-        local_cursor = time.time()
-
-        # keep collecting events until idle for `delay`
-        while True:
-            try:
-                event = self.fs_events.local_file_event_queue.get(timeout=delay)
-                events.append(event)
-                local_cursor = time.time()
-            except Empty:
-                break
+        if self._conf.get("sync", "stream_local_changes"):
+            # collect events of paths which are idle for `delay`
+            histories, local_cursor = self.fs_events.pop_quiet_histories(delay)
+        else:
+            # keep collecting events until idle for `delay`
+            histories, local_cursor = self.fs_events.pop_histories(delay)
 
-        logger.debug("Retrieved local file events:\n%s", pprint.pformat(events))
+        logger.debug("Retrieved local file events:\n%s", pprint.pformat(histories))
 
-        events = self._clean_local_events(events)
+        events = self._clean_local_histories(histories)
         sync_events = [SyncEvent.from_file_system_event(e, self) for e in events]
 
         return sync_events, local_cursor
@@ -1747,6 +2659,8 @@ class SyncEngine:
                 # housekeeping
                 self.syncing.append(event)
 
+            self._notify_change()
+
             # apply deleted events first, folder moved events second
             # neither event type requires an actual upload
             if deleted:
@@ -1801,6 +2715,9 @@ class SyncEngine:
         events_filtered = []
         events_excluded = []
 
+        # check for changes to the mignore file once for all events
+        self._reload_mignore_rules_if_changed()
+
         for event in sync_events:
 
             if self.is_excluded(event.dbx_path):
@@ -1822,7 +2739,7 @@ class SyncEngine:
         """
         Takes local file events within and cleans them up so that there is only a single
         event per path. Collapses moved and deleted events of folders with those of
-        their children. Called by :meth:`wait_for_local_changes`.
+        their children. Called by :meth:`upload_local_changes_while_inactive`.
 
         :param events: Iterable of :class:`watchdog.FileSystemEvent`.
         :returns: List of :class:`watchdog.FileSystemEvent`.
@@ -1835,82 +2752,73 @@ class SyncEngine:
         # of the destination path of has other events associated with it or is excluded
         # from sync.
 
-        histories: Dict[str, List[FileSystemEvent]] = dict()
+        histories: Dict[str, _PathHistory] = dict()
+        now = time.time()
+
+        for event in events:
+            add_to_histories(histories, event, now)
+
+        return self._clean_local_histories(histories)
+
+    def _clean_local_histories(
+        self, histories: Dict[str, _PathHistory]
+    ) -> List[FileSystemEvent]:
+        """
+        Reduces the event history of every path to a single event and collapses moved
+        and deleted events of folders with those of their children. Called by
+        :meth:`_clean_local_events` and :meth:`list_local_changes`.
+
+        :param histories: Dictionary of event histories per path, as created by
+            :func:`add_to_histories`.
+        :returns: List of :class:`watchdog.FileSystemEvent`.
+        """
+
         moved_events: Dict[str, List[FileSystemEvent]] = dict()
         unique_events: List[FileSystemEvent] = []
 
-        for event in events:
-            if isinstance(event, (FileMovedEvent, DirMovedEvent)):
-                deleted, created = split_moved_event(event)
-                add_to_bin(histories, deleted.src_path, deleted)
-                add_to_bin(histories, created.src_path, created)
-            else:
-                add_to_bin(histories, event.src_path, event)
+        # check for changes to the mignore file once for all events
+        self._reload_mignore_rules_if_changed()
 
         # for every path, keep only a single event which represents all changes
 
-        for path, events in histories.items():
-            if len(events) == 1:
-                event = events[0]
+        for path, history in histories.items():
+
+            first_is_directory = history.first_event.is_directory
+            last_is_directory = history.last_is_directory
+
+            if history.n_events == 1:
+                event = history.first_event
                 unique_events.append(event)
 
                 if hasattr(event, "move_id"):
                     # add to list "moved_events" to recombine line
                     add_to_bin(moved_events, event.move_id, event)
 
-            else:
-
-                n_created = len(
-                    [e for e in events if e.event_type == EVENT_TYPE_CREATED]
-                )
-                n_deleted = len(
-                    [e for e in events if e.event_type == EVENT_TYPE_DELETED]
-                )
-
-                if n_created > n_deleted:  # item was created
-                    if events[-1].is_directory:
-                        unique_events.append(DirCreatedEvent(path))
-                    else:
-                        unique_events.append(FileCreatedEvent(path))
-                elif n_created < n_deleted:  # item was deleted
-                    if events[0].is_directory:
-                        unique_events.append(DirDeletedEvent(path))
-                    else:
-                        unique_events.append(FileDeletedEvent(path))
+            elif history.n_created > history.n_deleted:  # item was created
+                if last_is_directory:
+                    unique_events.append(DirCreatedEvent(path))
                 else:
-
-                    first_created_index = next(
-                        iter(
-                            i
-                            for i, e in enumerate(events)
-                            if e.event_type == EVENT_TYPE_CREATED
-                        ),
-                        -1,
-                    )
-                    first_deleted_index = next(
-                        iter(
-                            i
-                            for i, e in enumerate(events)
-                            if e.event_type == EVENT_TYPE_DELETED
-                        ),
-                        -1,
-                    )
-
-                    if n_created == 0 or first_deleted_index < first_created_index:
-                        # item was modified
-                        if events[0].is_directory and events[-1].is_directory:
-                            unique_events.append(DirModifiedEvent(path))
-                        elif not events[0].is_directory and not events[-1].is_directory:
-                            unique_events.append(FileModifiedEvent(path))
-                        elif events[0].is_directory:
-                            unique_events.append(DirDeletedEvent(path))
-                            unique_events.append(FileCreatedEvent(path))
-                        elif events[-1].is_directory:
-                            unique_events.append(FileDeletedEvent(path))
-                            unique_events.append(DirCreatedEvent(path))
-                    else:
-                        # item was only temporary
-                        pass
+                    unique_events.append(FileCreatedEvent(path))
+            elif history.n_created < history.n_deleted:  # item was deleted
+                if first_is_directory:
+                    unique_events.append(DirDeletedEvent(path))
+                else:
+                    unique_events.append(FileDeletedEvent(path))
+            elif history.n_created == 0 or history.deleted_first:
+                # item was modified
+                if first_is_directory and last_is_directory:
+                    unique_events.append(DirModifiedEvent(path))
+                elif not first_is_directory and not last_is_directory:
+                    unique_events.append(FileModifiedEvent(path))
+                elif first_is_directory:
+                    unique_events.append(DirDeletedEvent(path))
+                    unique_events.append(FileCreatedEvent(path))
+                else:
+                    unique_events.append(FileDeletedEvent(path))
+                    unique_events.append(DirCreatedEvent(path))
+            else:
+                # item was only temporary
+                pass
 
         # event order does not matter anymore from this point because we have already
         # consolidated events for every path
@@ -2001,7 +2909,6 @@ class SyncEngine:
             "Cleaned up local file events:\n%s", pprint.pformat(cleaned_events)
         )
 
-        del events
         del unique_events
 
         return list(cleaned_events)
@@ -2022,7 +2929,7 @@ class SyncEngine:
         ):
             return True
 
-        elif len(self.mignore_rules.patterns) == 0:
+        elif len(self._mignore_rules.patterns) == 0:
             return False
         else:
             dbx_src_path = self.to_dbx_path(event.src_path)
@@ -2151,10 +3058,14 @@ class SyncEngine:
         finally:
             self.syncing.remove(event)
 
+        self._sync_events.labels(event.direction.value, event.status.value).inc()
+
         # add to history database
         if event.status == SyncStatus.Done:
             with self._database_access():
-                self._db_session.add(event)
+                self._db_session.add(event.to_history_entry())
+
+        self._notify_change()
 
         return event
 
@@ -2557,6 +3468,7 @@ class SyncEngine:
                 success = self._get_remote_folder(dbx_path)
             else:
                 self.syncing.append(event)
+                self._notify_change()
                 e = self._create_local_entry(event)
                 success = e.status in (SyncStatus.Done, SyncStatus.Skipped)
 
@@ -2592,8 +3504,12 @@ class SyncEngine:
                     res.entries.sort(key=lambda x: x.path_lower.count("/"))
 
                     # convert metadata to sync_events
+                    cased_paths = self.correct_case_batch(res.entries)
                     sync_events = [
-                        SyncEvent.from_dbx_metadata(md, self) for md in res.entries
+                        SyncEvent.from_dbx_metadata(
+                            md, self, dbx_path_cased=cased_paths[md.path_lower]
+                        )
+                        for md in res.entries
                     ]
                     download_res = self.apply_remote_changes(sync_events)
 
@@ -2715,6 +3631,13 @@ class SyncEngine:
             logger.debug("Fetching remote changes since cursor: %s", last_cursor)
             changes_iter = self.client.list_remote_changes_iterator(last_cursor)
 
+        batch_size = self._conf.get("sync", "remote_changes_batch_size")
+
+        if batch_size > 0:
+            # Coalesce changes across pages before applying them. This prevents
+            # downloading files which are deleted again on a later page.
+            changes_iter = coalesce_list_folder_results(changes_iter, batch_size)
+
         for changes in changes_iter:
 
             logger.debug("Listed remote changes:\n%s", entries_repr(changes.entries))
@@ -2725,8 +3648,12 @@ class SyncEngine:
             )
 
             clean_changes.entries.sort(key=lambda x: x.path_lower.count("/"))
+            cased_paths = self.correct_case_batch(clean_changes.entries)
             sync_events = [
-                SyncEvent.from_dbx_metadata(md, self) for md in clean_changes.entries
+                SyncEvent.from_dbx_metadata(
+                    md, self, dbx_path_cased=cased_paths[md.path_lower]
+                )
+                for md in clean_changes.entries
             ]
 
             logger.debug("Converted remote changes to SyncEvents")
@@ -2783,6 +3710,8 @@ class SyncEngine:
             # housekeeping
             self.syncing.append(event)
 
+        self._notify_change()
+
         results = []  # local list of all changes
 
         # apply deleted items
@@ -2967,9 +3896,7 @@ class SyncEngine:
             # have a content hash of 'folder'.
             logger.debug('Equal content hashes for "%s": no conflict', event.dbx_path)
             return Conflict.Identical
-        elif any(
-            is_equal_or_child(p, event.dbx_path.lower()) for p in self.upload_errors
-        ):
+        elif self.upload_errors.has_equal_or_child(event.dbx_path.lower()):
             # Local version could not be uploaded due to a sync error. Do not over-
             # write unsynced changes but declare a conflict.
             logger.debug('Unresolved upload error for "%s": conflict', event.dbx_path)
@@ -3089,6 +4016,14 @@ class SyncEngine:
         then gets mounted to the user's Dropbox. Ideally, we want to deal with this
         without re-downloading all its contents.
 
+        Changes to items inside a folder which is deleted later on are dropped since the
+        deletion of the parent folder will remove them anyways. This becomes relevant
+        when coalescing changes across several pages of results. If the folder is
+        recreated afterwards, its deletion is kept before the final entry so that the
+        local versions of the dropped children are removed. Folders which are deleted
+        and recreated without dropping any changes, for instance when sharing them, are
+        reduced to their final entry.
+
         :param changes: Result from Dropbox API call to retrieve remote changes.
         :returns: Cleaned up changes with a single Metadata entry per path.
         """
@@ -3097,8 +4032,29 @@ class SyncEngine:
         # Dropbox only reports DeletedMetadata or FileMetadata / FolderMetadata
 
         histories: Dict[str, List[Metadata]] = dict()
-        for entry in changes.entries:
+        last_seen: Dict[str, int] = dict()
+        deleted_at: Dict[str, int] = dict()
+
+        for i, entry in enumerate(changes.entries):
             add_to_bin(histories, entry.path_lower, entry)
+            last_seen[entry.path_lower] = i
+
+            if isinstance(entry, DeletedMetadata):
+                deleted_at[entry.path_lower] = i
+
+        # Folders whose deletion caused changes to children to be dropped.
+        pruned_parents: Set[str] = set()
+
+        if len(deleted_at) > 0:
+            # Drop paths whose last change precedes the deletion of a parent folder.
+            for path, index in last_seen.items():
+                parent = osp.dirname(path)
+                while parent != "/":
+                    if deleted_at.get(parent, -1) > index:
+                        del histories[path]
+                        pruned_parents.add(parent)
+                        break
+                    parent = osp.dirname(parent)
 
         new_entries = []
 
@@ -3110,14 +4066,22 @@ class SyncEngine:
                 local_entry = self.get_index_entry(last_event.path_lower)
                 was_dir = local_entry and local_entry.is_directory
 
+                # Changes to children of a recreated folder may have been dropped
+                # above. Keep its deletion so that no stale children remain locally.
+                was_pruned = (
+                    isinstance(last_event, FolderMetadata)
+                    and last_event.path_lower in pruned_parents
+                )
+
                 # Dropbox guarantees that applying events in the provided order will
                 # reproduce the state in the cloud. We therefore keep only the last
-                # event, unless there is a change in item type.
+                # event, unless there is a change in item type or children were dropped.
                 if (
                     was_dir
                     and isinstance(last_event, FileMetadata)
                     or not was_dir
                     and isinstance(last_event, FolderMetadata)
+                    or was_pruned
                 ):
                     deleted_event = DeletedMetadata(
                         name=last_event.name,
@@ -3175,10 +4139,14 @@ class SyncEngine:
         finally:
             self.syncing.remove(event)
 
+        self._sync_events.labels(event.direction.value, event.status.value).inc()
+
         # add to history database
         if event.status == SyncStatus.Done:
             with self._database_access():
-                self._db_session.add(event)
+                self._db_session.add(event.to_history_entry())
+
+        self._notify_change()
 
         return event
 
@@ -3388,7 +4356,7 @@ class SyncEngine:
         """
 
         with self._database_access():
-            old_entry = self.get_index_entry(event.dbx_path.lower())
+            old_entry = self._db_session.query(IndexEntry).get(event.dbx_path.lower())
 
         if old_entry and old_entry.dbx_path_cased != event.dbx_path:
 
@@ -3401,6 +4369,7 @@ class SyncEngine:
             with self._database_access():
                 old_entry.dbx_path_cased = event.dbx_path
                 self._db_session.commit()
+                self._update_index_caches(event.dbx_path.lower(), old_entry)
 
             logger.debug('Renamed "%s" to "%s"', local_path_old, event.local_path)
 
@@ -3421,6 +4390,7 @@ class SyncEngine:
 
             # add created and deleted events of children as appropriate
 
+            self._reload_mignore_rules_if_changed()
             snapshot = DirectorySnapshot(local_path, listdir=self._scandir_with_mignore)
             lowercase_snapshot_paths = {x.lower() for x in snapshot.paths}
             local_path_lower = local_path.lower()
@@ -3474,9 +4444,9 @@ class SyncEngine:
             # drop all entries older than keep_history
             now = time.time()
             keep_history = self._conf.get("sync", "keep_history")
-            query = self._db_session.query(SyncEvent)
+            query = self._db_session.query(HistoryEntry)
             subquery = query.filter(
-                SyncEvent.change_time_or_sync_time < now - keep_history
+                HistoryEntry.change_time_or_sync_time < now - keep_history
             )
             subquery.delete(synchronize_session="fetch")
 
@@ -3484,10 +4454,29 @@ class SyncEngine:
             self._db_session.commit()
 
     def _scandir_with_mignore(self, path: str) -> List:
+        """
+        Lists the content of a directory, skipping all items which match the mignore
+        rules. When used to walk a directory tree, ignored folders are not descended
+        into. Results are not cached since every path is only visited once per scan.
+        Callers should call :meth:`_reload_mignore_rules_if_changed` once before
+        starting a scan.
+
+        :param path: Local path of the directory.
+        :returns: List of :class:`os.DirEntry` instances.
+        """
+
+        matcher = self._mignore_matcher
+
+        if len(matcher) == 0:
+            return list(os.scandir(path))
+
+        relative_dirname = self.to_dbx_path(path).strip("/")
+        prefix = relative_dirname + "/" if relative_dirname else ""
+
         return [
             f
             for f in os.scandir(path)
-            if not self._is_mignore_path(self.to_dbx_path(f.path), f.is_dir())
+            if not matcher.match(prefix + f.name + ("/" if f.is_dir() else ""))
         ]
 
 
@@ -3757,7 +4746,7 @@ class SyncMonitor:
         return list(self.sync.syncing)
 
     @property
-    def history(self) -> List[SyncEvent]:
+    def history(self) -> List[HistoryEntry]:
         """A list of the last SyncEvents in our history. History will be kept for the
         interval specified by the config value``keep_history`` (defaults to two weeks)
         but at most 1,000 events will kept."""
@@ -3846,7 +4835,12 @@ class SyncMonitor:
                 name="maestral-upload",
             )
 
-            self.local_observer_thread = Observer(timeout=40)
+            self.local_observer_thread = create_observer(
+                self._conf.get("sync", "observer"),
+                timeout=40,
+                overflow_callback=self._on_local_events_lost,
+                path=self.sync.dropbox_path,
+            )
             self.local_observer_thread.setName("maestral-fsobserver")
             self._watch = self.local_observer_thread.schedule(
                 self.sync.fs_events, self.sync.dropbox_path, recursive=True
@@ -3866,13 +4860,13 @@ class SyncMonitor:
                     try:
                         max_user_watches, max_user_instances, _ = get_inotify_limits()
                     except OSError:
-                        max_user_watches, max_user_instances = 2 ** 18, 2 ** 9
+                        max_user_watches, max_user_instances = 2**18, 2**9
 
                     if exc.errno == errno.ENOSPC:
-                        n_new = max(2 ** 19, 2 * max_user_watches)
+                        n_new = max(2**19, 2 * max_user_watches)
                         new_config = f"fs.inotify.max_user_watches={n_new}"
                     else:
-                        n_new = max(2 ** 10, 2 * max_user_instances)
+                        n_new = max(2**10, 2 * max_user_instances)
                         new_config = f"fs.inotify.max_user_instances={n_new}"
 
                     msg = (
@@ -3912,6 +4906,11 @@ class SyncMonitor:
 
         self._startup_time = time.time()
 
+    def _on_local_events_lost(self) -> None:
+        """Called by the file system observer when local events have been lost."""
+        logger.info("Local file events have been lost, rescanning Dropbox folder")
+        self.sync.rescan(self.sync.dropbox_path)
+
     @_with_lock
     def stop(self) -> None:
         """Stops syncing and destroys worker threads."""
@@ -4055,6 +5054,65 @@ def split_moved_event(
     return deleted_event, created_event
 
 
+def add_to_histories(
+    histories: Dict[str, _PathHistory], event: FileSystemEvent, timestamp: float
+) -> None:
+    """
+    Merges a file system event into the event history of its path. Moved events are
+    split into deleted and created events which are added to the histories of the
+    source and destination paths, respectively.
+
+    :param histories: Dictionary of event histories per path.
+    :param event: Event to add.
+    :param timestamp: Time when the event was registered.
+    """
+
+    if event.event_type == EVENT_TYPE_MOVED:
+        split_events: Tuple[FileSystemEvent, ...] = split_moved_event(event)
+    else:
+        split_events = (event,)
+
+    for e in split_events:
+        try:
+            histories[e.src_path].add(e, timestamp)
+        except KeyError:
+            histories[e.src_path] = _PathHistory(e, timestamp)
+
+
+def coalesce_list_folder_results(
+    results: Iterator[dropbox.files.ListFolderResult], max_entries: int
+) -> Iterator[dropbox.files.ListFolderResult]:
+    """
+    Merges consecutive pages of results from ``files/list_folder`` or
+    ``files/list_folder/continue`` until they contain at least ``max_entries`` entries.
+    Every yielded result carries the cursor and ``has_more`` flag of the last merged
+    page. The number of entries held in memory is therefore bounded by
+    ``max_entries`` plus the size of a single page.
+
+    :param results: Iterator over pages of results.
+    :param max_entries: Minimum number of entries to accumulate before yielding.
+    :returns: Iterator over merged results.
+    """
+
+    merged = None
+
+    for res in results:
+
+        if merged is None:
+            merged = res
+        else:
+            merged.entries.extend(res.entries)
+            merged.cursor = res.cursor
+            merged.has_more = res.has_more
+
+        if len(merged.entries) >= max_entries:
+            yield merged
+            merged = None
+
+    if merged is not None:
+        yield merged
+
+
 def entries_repr(entries: List[Metadata]) -> str:
     """
     Generates a nicely formatted string repr from a list of Dropbox metadata.
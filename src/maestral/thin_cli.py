@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the entry point for the command line interface. Read-only commands
+are answered from the status snapshot and the event socket of a running daemon, see
+:mod:`maestral.ipc`, without importing click, Pyro5 or any of the sync machinery. All
+other commands and options, as well as cases which require output that is only
+implemented in :mod:`maestral.cli`, are passed on to the full command line interface.
+"""
+
+# system imports
+import sys
+import os.path as osp
+import time
+from typing import Optional, List, Tuple, Dict, Callable, Any, cast
+
+# local imports
+from .ipc import EventSubscriber, StatusReader, get_status_path, read_status
+
+
+__all__ = ["main", "format_activity"]
+
+
+# ==== helpers =========================================================================
+
+
+def _style(text: str, color_code: int) -> str:
+    """Colors text with an ANSI escape code when printing to a terminal."""
+    if sys.stdout.isatty():
+        return f"\033[{color_code}m{text}\033[0m"
+    else:
+        return text
+
+
+def _parse_args(args: List[str]) -> Optional[Tuple[str, List[str], str]]:
+    """
+    Parses arguments of the form ``COMMAND [ARGS]... [-c CONFIG_NAME]``.
+
+    :param args: Command line arguments without the program name.
+    :returns: Tuple of command, positional arguments and config name or ``None`` if
+        there are any other options.
+    """
+
+    if not args:
+        return None
+
+    command = args[0]
+    positional: List[str] = []
+    config_name = "maestral"
+
+    i = 1
+
+    while i < len(args):
+        arg = args[i]
+
+        if arg in ("-c", "--config-name"):
+            if i + 1 == len(args):
+                return None
+            config_name = args[i + 1]
+            i += 1
+        elif arg.startswith("--config-name="):
+            config_name = arg.split("=", 1)[1]
+        elif arg.startswith("-"):
+            return None
+        else:
+            positional.append(arg)
+
+        i += 1
+
+    return command, positional, config_name
+
+
+def format_activity(
+    status: str, n_errors: int, events: List[Dict[str, Any]]
+) -> List[str]:
+    """
+    Formats the sync activity for display in the terminal.
+
+    :param status: Current status message.
+    :param n_errors: Number of sync errors.
+    :param events: Serialized sync events.
+    :returns: Lines to display.
+    """
+
+    from .utils import natural_size
+
+    lines = [f"Status: {status}, Sync errors: {n_errors}", ""]
+
+    filenames = ["Path"]
+    states = ["Status"]
+    col_len = 4
+
+    for event in events:
+
+        dbx_path = cast(str, event["dbx_path"])
+        direction = cast(str, event["direction"])
+        state = cast(str, event["status"])
+        size = cast(int, event["size"])
+        completed = cast(int, event["completed"])
+
+        filename = osp.basename(dbx_path)
+        filenames.append(filename)
+
+        arrow = "↓" if direction == "down" else "↑"
+
+        if completed > 0:
+            done_str = natural_size(completed, sep=False)
+            todo_str = natural_size(size, sep=False)
+            states.append(f"{done_str}/{todo_str} {arrow}")
+        else:
+            if state == "syncing" and direction == "up":
+                states.append("uploading")
+            elif state == "syncing" and direction == "down":
+                states.append("downloading")
+            else:
+                states.append(state)
+
+        col_len = max(len(filename), col_len)
+
+    for name, state in zip(filenames, states):  # create rows
+        lines.append(name.ljust(col_len + 2) + state)
+
+    return lines
+
+
+# ==== commands ========================================================================
+
+
+def status(args: List[str], config_name: str) -> bool:
+    """Prints the status if there are no errors or update notes to show."""
+
+    if args:
+        return False
+
+    snapshot = read_status(config_name)
+
+    if not snapshot:
+        return False
+
+    if snapshot["sync_errors"] or snapshot["fatal_errors"]:
+        return False
+
+    if snapshot["update_available"]:
+        return False
+
+    account = snapshot["account"]
+    account_type = account["type"].capitalize()
+
+    print("")
+    print(f"Account:      {account['email']} ({account_type})")
+    print(f"Usage:        {account['usage']}")
+    print(f"Status:       {snapshot['status']}")
+    print(f"Sync errors:  {_style('0', 32)}")
+    print("")
+
+    return True
+
+
+def filestatus(args: List[str], config_name: str) -> bool:
+    """Prints the sync status of existing local paths."""
+
+    if not args:
+        return False
+
+    local_paths = [osp.realpath(p) for p in args]
+
+    if not all(osp.exists(p) for p in local_paths):
+        return False
+
+    snapshot = read_status(config_name)
+
+    if not snapshot:
+        # The daemon may not be running or may not have published a snapshot yet.
+        return False
+    elif not snapshot["running"]:
+        stats = ["unwatched"] * len(local_paths)
+    else:
+        with EventSubscriber(config_name, timeout=10) as subscriber:
+            stats = subscriber.request("get_file_status_batch", local_paths)
+
+    print("\n".join(stats))
+
+    return True
+
+
+def activity(args: List[str], config_name: str) -> bool:
+    """Shows a live view of the sync activity from the status snapshot."""
+
+    import curses
+
+    if args:
+        return False
+
+    reader = StatusReader(get_status_path(config_name))
+    snapshot = reader.read()
+
+    if not snapshot or snapshot["fatal_errors"]:
+        reader.close()
+        return False
+
+    def curses_loop(screen) -> None:  # no type hints for screen provided yet
+
+        curses.use_default_colors()  # don't change terminal background
+        screen.nodelay(1)  # sets `screen.getch()` to non-blocking
+
+        while True:
+
+            snapshot = reader.read()
+
+            if not snapshot:
+                break
+
+            height, width = screen.getmaxyx()
+
+            lines = format_activity(
+                snapshot["status"],
+                len(snapshot["sync_errors"]),
+                snapshot["activity"][: height - 3],
+            )
+
+            # print to console screen
+            screen.clear()
+            try:
+                screen.addstr("\n".join(lines))
+            except curses.error:
+                pass
+            screen.refresh()
+
+            # abort when user presses 'q', refresh otherwise
+            key = screen.getch()
+            if key == ord("q"):
+                break
+            elif key < 0:
+                time.sleep(1)
+
+    try:
+        curses.wrapper(curses_loop)
+    finally:
+        reader.close()
+
+    return True
+
+
+def metrics(args: List[str], config_name: str) -> bool:
+    """Prints the metrics of a running daemon."""
+
+    if args:
+        return False
+
+    if not read_status(config_name):
+        return False
+
+    with EventSubscriber(config_name, timeout=10) as subscriber:
+        text = subscriber.request("get_metrics")
+
+    sys.stdout.write(text)
+
+    return True
+
+
+COMMANDS: Dict[str, Callable[[List[str], str], bool]] = {
+    "status": status,
+    "filestatus": filestatus,
+    "activity": activity,
+    "metrics": metrics,
+}
+
+
+def main() -> None:
+    """
+    Runs a read-only command without importing the full command line interface if
+    possible and falls back to :func:`maestral.cli.main` otherwise.
+    """
+
+    parsed = _parse_args(sys.argv[1:])
+
+    if parsed:
+        command, args, config_name = parsed
+        handler = COMMANDS.get(command)
+
+        try:
+            if handler and handler(args, config_name):
+                return
+        except (OSError, KeyError, ValueError, RuntimeError):
+            # Daemon is not reachable or has a different version. Use the full CLI.
+            pass
+
+    from .cli import main as cli_main
+
+    cli_main()
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 """Utility modules and functions"""
 import os
+import time
+from contextlib import contextmanager
 
-from packaging.version import Version
-from typing import List, Iterator, TypeVar, Optional, Iterable
+from typing import List, Iterator, TypeVar, Optional, Iterable, Dict
 
 
 _N = TypeVar("_N", float, int)
@@ -68,6 +69,23 @@ def clamp(n: _N, minn: _N, maxn: _N) -> _N:
         return n
 
 
+@contextmanager
+def timed(timings: Dict[str, float], name: str) -> Iterator[None]:
+    """
+    Measures the wall time spent in a with-block.
+
+    :param timings: Dictionary to store the duration in.
+    :param name: Key for the duration in seconds.
+    """
+
+    t0 = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - t0
+
+
 def get_newer_version(version: str, releases: Iterable[str]) -> Optional[str]:
     """
     Checks a given release version against a version list of releases to see if an
@@ -78,6 +96,8 @@ def get_newer_version(version: str, releases: Iterable[str]) -> Optional[str]:
     :returns: The version string of the latest release if a newer release is available.
     """
 
+    from packaging.version import Version
+
     releases = [r for r in releases if not Version(r).is_prerelease]
     releases.sort(key=lambda x: Version(x))
     latest_release = releases[-1]
@@ -1,37 +1,79 @@
 # -*- coding: utf-8 -*-
 """Module containing cache implementations."""
 
+import sys
+import time
 from collections import OrderedDict
 from threading import RLock
-from typing import Any
+from typing import Any, Optional, Callable, Dict, List, Tuple
+
+
+__all__ = ["LRUCache", "StripedLRUCache"]
 
 
 class LRUCache:
     """A simple LRU cache implementation
 
+    The cache can be bounded by the number of entries, by the total size of its values
+    or both. Entries may optionally expire after a given time-to-live. Hits, misses and
+    evictions are counted and can be retrieved from :attr:`stats`.
+
     :param capacity: Maximum number of of entries to keep.
+    :param max_size: Maximum total size of cached values in bytes, as determined by
+        ``getsizeof``. If ``None``, the size is not bounded.
+    :param ttl: Time-to-live of entries in seconds. If ``None``, entries don't expire.
+    :param getsizeof: Callable which returns the size of a value in bytes. Only used if
+        ``max_size`` is given.
     """
 
-    _cache: OrderedDict
+    _cache: "OrderedDict[Any, Tuple[Any, int, float]]"
 
-    def __init__(self, capacity: int) -> None:
+    def __init__(
+        self,
+        capacity: int,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        getsizeof: Callable[[Any], int] = sys.getsizeof,
+    ) -> None:
         self._lock = RLock()
         self._cache = OrderedDict()
         self.capacity = capacity
+        self.max_size = max_size
+        self.ttl = ttl
+        self._getsizeof = getsizeof
+
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
 
-    def get(self, key: Any) -> Any:
+    def get(self, key: Any, default: Any = None) -> Any:
         """
         Get the cached value for a key. Mark as most recently used.
 
         :param key: Key to query.
-        :returns: Cached value or None.
+        :param default: Value to return if the key is not cached. Use a sentinel object
+            to distinguish between cached ``None`` values and cache misses.
+        :returns: Cached value or default.
         """
         with self._lock:
             try:
-                self._cache.move_to_end(key)
-                return self._cache[key]
+                value, size, expiry = self._cache[key]
             except KeyError:
-                return None
+                self._misses += 1
+                return default
+
+            if expiry < time.monotonic():
+                self._remove(key)
+                self._misses += 1
+                return default
+
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return value
 
     def put(self, key: Any, value: Any) -> None:
         """
@@ -41,10 +83,40 @@ class LRUCache:
         :param value: Value to cache.
         """
         with self._lock:
-            self._cache[key] = value
-            self._cache.move_to_end(key)
-            if len(self._cache) > self.capacity:
-                self._cache.popitem(last=False)
+
+            self._remove(key)
+
+            size = self._getsizeof(value) if self.max_size is not None else 0
+            expiry = (
+                time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+            )
+
+            self._cache[key] = (value, size, expiry)
+            self._size += size
+
+            while len(self._cache) > self.capacity or (
+                self.max_size is not None and self._size > self.max_size
+            ):
+                _, (_, size, _) = self._cache.popitem(last=False)
+                self._size -= size
+                self._evictions += 1
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """
+        Removes a key from the cache.
+
+        :param key: Key to remove.
+        :param default: Value to return if the key is not cached.
+        :returns: Cached value or default.
+        """
+        with self._lock:
+            try:
+                value = self._cache[key][0]
+            except KeyError:
+                return default
+
+            self._remove(key)
+            return value
 
     def clear(self) -> None:
         """
@@ -53,3 +125,116 @@ class LRUCache:
 
         with self._lock:
             self._cache.clear()
+            self._size = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache statistics: the number of hits, misses and evictions since the cache was
+        created as well as the current number of entries and their total size.
+        """
+        with self._lock:
+            return dict(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._cache),
+                size=self._size,
+            )
+
+    def _remove(self, key: Any) -> None:
+        try:
+            _, size, _ = self._cache.pop(key)
+        except KeyError:
+            pass
+        else:
+            self._size -= size
+
+
+class StripedLRUCache:
+    """An LRU cache which is split into several independently locked stripes
+
+    Keys are distributed between stripes by their hash. This reduces lock contention
+    when the cache is accessed from many threads at the same time. The capacity and
+    maximum size are divided evenly between stripes and recency is tracked per stripe.
+    All other parameters are the same as for :class:`LRUCache`.
+
+    :param capacity: Maximum number of of entries to keep.
+    :param stripes: Number of stripes.
+    :param max_size: Maximum total size of cached values in bytes.
+    :param ttl: Time-to-live of entries in seconds.
+    :param getsizeof: Callable which returns the size of a value in bytes.
+    """
+
+    _stripes: List[LRUCache]
+
+    def __init__(
+        self,
+        capacity: int,
+        stripes: int = 16,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        getsizeof: Callable[[Any], int] = sys.getsizeof,
+    ) -> None:
+
+        stripe_capacity = max(1, capacity // stripes)
+        stripe_max_size = max(1, max_size // stripes) if max_size is not None else None
+
+        self._stripes = [
+            LRUCache(stripe_capacity, stripe_max_size, ttl, getsizeof)
+            for _ in range(stripes)
+        ]
+
+    def _stripe(self, key: Any) -> LRUCache:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._stripes)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Get the cached value for a key. Mark as most recently used.
+
+        :param key: Key to query.
+        :param default: Value to return if the key is not cached.
+        :returns: Cached value or default.
+        """
+        return self._stripe(key).get(key, default)
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Set the cached value for a key. Mark as most recently used.
+
+        :param key: Key to use. Must be hashable.
+        :param value: Value to cache.
+        """
+        self._stripe(key).put(key, value)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """
+        Removes a key from the cache.
+
+        :param key: Key to remove.
+        :param default: Value to return if the key is not cached.
+        :returns: Cached value or default.
+        """
+        return self._stripe(key).pop(key, default)
+
+    def clear(self) -> None:
+        """
+        Clears the cache.
+        """
+        for stripe in self._stripes:
+            stripe.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Cache statistics, summed over all stripes. See :attr:`LRUCache.stats`."""
+
+        stats: Dict[str, int] = dict()
+
+        for stripe in self._stripes:
+            for key, value in stripe.stats.items():
+                stats[key] = stats.get(key, 0) + value
+
+        return stats
@@ -12,7 +12,8 @@ import socket
 import time
 import logging
 from pathlib import Path
-from typing import Union, Tuple
+from threading import Thread, Condition, Event
+from typing import Union, Tuple, Optional
 
 __all__ = [
     "get_ac_state",
@@ -20,6 +21,7 @@ __all__ = [
     "get_inotify_limits",
     "CPU_COUNT",
     "cpu_usage_percent",
+    "CPUGovernor",
     "check_connection",
 ]
 
@@ -193,6 +195,117 @@ def cpu_usage_percent(interval: float = 0.1) -> float:
         return round(single_cpu_percent, 1)
 
 
+class CPUGovernor:
+    """
+    Limits the CPU usage of the current process by pausing worker threads.
+
+    A background thread samples the CPU time of the process at a fixed interval and
+    refills a token bucket with the CPU time which is available under the limit, minus
+    the CPU time which was actually used. Workers call :meth:`acquire` before each item
+    of work. This returns immediately while the bucket is not empty and blocks until the
+    sampler refills the bucket otherwise, without workers taking their own measurements.
+    The sampler is started on demand and stops after a period without calls to
+    :meth:`acquire`.
+
+    :param limit: CPU usage limit in percent, where 100% corresponds to one fully used
+        CPU core. Limits of ``100 * CPU_COUNT`` or higher disable throttling.
+    :param interval: Sampling interval in sec.
+    :param burst: CPU time in sec which can be used in a burst after an idle period,
+        relative to the limit.
+    :param idle_timeout: Time in sec without calls to :meth:`acquire` after which the
+        sampler is stopped.
+    """
+
+    def __init__(
+        self,
+        limit: float,
+        interval: float = 0.2,
+        burst: float = 1.0,
+        idle_timeout: float = 10.0,
+    ) -> None:
+
+        self.limit = limit
+        self.interval = interval
+        self.burst = burst
+        self.idle_timeout = idle_timeout
+
+        self._cond = Condition()
+        self._tokens = 0.0
+        self._last_acquire = 0.0
+        self._thread: Optional[Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the CPU usage is limited."""
+        return self.limit < 100 * CPU_COUNT
+
+    @property
+    def tokens(self) -> float:
+        """CPU time in sec which can currently be used without exceeding the limit."""
+        return self._tokens
+
+    def acquire(self, cancel: Optional[Event] = None) -> bool:
+        """
+        Blocks until CPU time is available under the limit.
+
+        :param cancel: Event which cancels waiting when set.
+        :returns: ``True`` if CPU time is available, ``False`` if waiting was cancelled.
+        """
+
+        if not self.enabled:
+            return True
+
+        with self._cond:
+            self._last_acquire = time.monotonic()
+
+            if not self._thread:
+                self._tokens = self.limit / 100 * self.burst
+                self._thread = Thread(
+                    target=self._sample, name="maestral-cpu-governor", daemon=True
+                )
+                self._thread.start()
+
+            while self._tokens <= 0:
+                if cancel and cancel.is_set():
+                    return False
+                self._cond.wait(self.interval)
+                self._last_acquire = time.monotonic()
+
+        return not (cancel and cancel.is_set())
+
+    def interrupt(self) -> None:
+        """Wakes all waiting workers, for instance after setting their cancel event."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _sample(self) -> None:
+
+        t0 = time.monotonic()
+        cpu0 = time.process_time()
+
+        while True:
+            time.sleep(self.interval)
+
+            t1 = time.monotonic()
+            cpu1 = time.process_time()
+
+            with self._cond:
+                rate = self.limit / 100
+                capacity = rate * self.burst
+
+                self._tokens += rate * (t1 - t0) - (cpu1 - cpu0)
+                self._tokens = max(-capacity, min(self._tokens, capacity))
+
+                if self._tokens > 0:
+                    self._cond.notify_all()
+
+                if t1 - self._last_acquire > self.idle_timeout:
+                    self._thread = None
+                    return
+
+            t0, cpu0 = t1, cpu1
+
+
 def check_connection(hostname: str, timeout: int = 2) -> bool:
     """
     A low latency check for an internet connection.
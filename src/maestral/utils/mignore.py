@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains a compiled matcher for mignore rules which are given as a
+:class:`pathspec.PathSpec` with git wildmatch patterns.
+"""
+
+import re
+from typing import Optional, Pattern
+
+import pathspec  # type: ignore
+
+
+__all__ = ["MignoreMatcher"]
+
+
+_named_group = re.compile(r"(?<!\\)\(\?P<\w+>")
+
+
+class MignoreMatcher:
+    """
+    Matches paths against mignore rules. If the rules do not contain any negations,
+    all patterns are compiled into a single regular expression so that a path can be
+    matched with a single regex search instead of one search per pattern. Otherwise,
+    the order of patterns matters and we fall back to the :class:`pathspec.PathSpec`.
+
+    Paths must be given relative to the Dropbox folder, without a leading slash and
+    with a trailing slash for folders.
+
+    :param spec: Mignore rules.
+    """
+
+    def __init__(self, spec: pathspec.PathSpec) -> None:
+        self.spec = spec
+        self._regex = self._compile(spec)
+
+    @staticmethod
+    def _compile(spec: pathspec.PathSpec) -> Optional[Pattern]:
+
+        patterns = [p for p in spec.patterns if p.include is not None]
+
+        if not patterns:
+            return None
+
+        if any(not p.include for p in patterns):
+            # negated patterns, fall back to PathSpec
+            return None
+
+        # names of groups must be unique in the combined regex
+        parts = [_named_group.sub("(?:", p.regex.pattern) for p in patterns]
+
+        try:
+            return re.compile("|".join(f"(?:{part})" for part in parts))
+        except re.error:
+            return None
+
+    def __len__(self) -> int:
+        return len(self.spec.patterns)
+
+    def match(self, relative_path: str) -> bool:
+        """
+        Checks if the given path matches the mignore rules.
+
+        :param relative_path: Path relative to the Dropbox folder.
+        :returns: Whether the path is ignored.
+        """
+        if self._regex is not None:
+            return self._regex.search(relative_path) is not None
+        else:
+            return self.spec.match_file(relative_path)
@@ -16,7 +16,7 @@ from dropbox.stone_validators import Struct  # type: ignore
 
 # local imports
 from . import sanitize_string
-from ..sync import SyncEvent
+from ..sync import SyncEvent, HistoryEntry
 
 if TYPE_CHECKING:
     from dropbox.stone_base import Struct as StoneStruct
@@ -69,12 +69,12 @@ def error_to_dict(err: Exception) -> ErrorType:
     return serialized
 
 
-def sync_event_to_dict(event: SyncEvent) -> StoneType:
+def sync_event_to_dict(event: Union[SyncEvent, HistoryEntry]) -> StoneType:
     """
-    Converts a SyncEvent to a dict. Keys will be strings and entries are native Python
-    types.
+    Converts a SyncEvent or an entry from the sync history to a dict. Keys will be
+    strings and entries are native Python types.
 
-    :param event: SyncEvent to convert.
+    :param event: SyncEvent or HistoryEntry to convert.
     :returns: Serialized SyncEvent.
     """
 
@@ -86,7 +86,9 @@ def sync_event_to_dict(event: SyncEvent) -> StoneType:
     for attr_name in attributes:
         value = getattr(event, attr_name)
 
-        if isinstance(value, Enum):
+        if callable(value):
+            continue
+        elif isinstance(value, Enum):
             serialized[attr_name] = value.value
         elif isinstance(value, str):
             serialized[attr_name] = sanitize_string(value)
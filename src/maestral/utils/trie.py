@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains a prefix tree (trie) for paths which supports fast lookups of
+parents and children of a given path.
+"""
+
+from typing import Dict, Iterator, Tuple, Any, List, Optional
+
+
+__all__ = ["PathTrie"]
+
+
+_missing = object()
+
+
+class _Node:
+
+    __slots__ = ("children", "value")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = dict()
+        self.value: Any = _missing
+
+
+def _components(path: str) -> List[str]:
+    return [c for c in path.split("/") if c]
+
+
+class PathTrie:
+    """
+    A mapping from paths to values which is stored as a tree of path components. This
+    allows checking if a path or any of its parents or children is contained in the
+    mapping with a cost proportional to the depth of the path instead of the number of
+    stored paths. Paths are split at "/" and are case sensitive.
+
+    This class is not thread-safe. Callers must provide their own locking if the trie
+    is accessed from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+        self._len = 0
+
+    def _find(self, path: str) -> Optional[_Node]:
+        node = self._root
+        for name in _components(path):
+            try:
+                node = node.children[name]
+            except KeyError:
+                return None
+        return node
+
+    def __setitem__(self, path: str, value: Any) -> None:
+        node = self._root
+        for name in _components(path):
+            try:
+                node = node.children[name]
+            except KeyError:
+                child = _Node()
+                node.children[name] = child
+                node = child
+
+        if node.value is _missing:
+            self._len += 1
+
+        node.value = value
+
+    def __getitem__(self, path: str) -> Any:
+        node = self._find(path)
+        if node is None or node.value is _missing:
+            raise KeyError(path)
+        return node.value
+
+    def __delitem__(self, path: str) -> None:
+        if self.pop(path, _missing) is _missing:
+            raise KeyError(path)
+
+    def __contains__(self, path: Any) -> bool:
+        node = self._find(path)
+        return node is not None and node.value is not _missing
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        for path, _ in self.items():
+            yield path
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """
+        Returns the value stored for a path.
+
+        :param path: Path to look up.
+        :param default: Value to return if the path is not stored.
+        :returns: Stored value or default.
+        """
+        node = self._find(path)
+        if node is None or node.value is _missing:
+            return default
+        return node.value
+
+    def pop(self, path: str, default: Any = _missing) -> Any:
+        """
+        Removes a path and returns its value. Children of the path are kept.
+
+        :param path: Path to remove.
+        :param default: Value to return if the path is not stored.
+        :returns: The removed value or default.
+        :raises KeyError: if the path is not stored and no default is given.
+        """
+
+        names = _components(path)
+        nodes = [self._root]
+
+        for name in names:
+            node = nodes[-1].children.get(name)
+            if node is None:
+                break
+            nodes.append(node)
+
+        node = nodes[-1]
+
+        if len(nodes) != len(names) + 1 or node.value is _missing:
+            if default is _missing:
+                raise KeyError(path)
+            return default
+
+        value = node.value
+        node.value = _missing
+        self._len -= 1
+
+        # prune empty branches
+        for name, parent in zip(reversed(names), reversed(nodes[:-1])):
+            child = parent.children[name]
+            if child.children or child.value is not _missing:
+                break
+            del parent.children[name]
+
+        return value
+
+    def pop_tree(self, path: str) -> List[Tuple[str, Any]]:
+        """
+        Removes a path and all of its children. The cost is proportional to the number
+        of removed paths.
+
+        :param path: Path to remove.
+        :returns: List of tuples of path and value of all removed paths.
+        """
+
+        names = _components(path)
+        nodes = [self._root]
+
+        for name in names:
+            node = nodes[-1].children.get(name)
+            if node is None:
+                return []
+            nodes.append(node)
+
+        removed = list(self.items(path))
+
+        if not names:
+            self.clear()
+            return removed
+
+        del nodes[-2].children[names[-1]]
+        self._len -= len(removed)
+
+        # prune empty branches
+        for name, parent in zip(reversed(names[:-1]), reversed(nodes[:-2])):
+            child = parent.children[name]
+            if child.children or child.value is not _missing:
+                break
+            del parent.children[name]
+
+        return removed
+
+    def clear(self) -> None:
+        """Removes all paths."""
+        self._root = _Node()
+        self._len = 0
+
+    def items(self, path: str = "/") -> Iterator[Tuple[str, Any]]:
+        """
+        Iterates over all stored paths equal to or inside of the given path.
+
+        :param path: Path to start from.
+        :returns: Iterator over tuples of path and value.
+        """
+
+        names = _components(path)
+        node = self._find(path)
+
+        if node is None:
+            return
+
+        stack = [(names, node)]
+
+        while stack:
+            names, node = stack.pop()
+
+            if node.value is not _missing:
+                yield "/" + "/".join(names), node.value
+
+            for name, child in node.children.items():
+                stack.append((names + [name], child))
+
+    def parents(self, path: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterates over all stored paths which are equal to or a parent of the given
+        path, starting with the shortest.
+
+        :param path: Path to look up.
+        :returns: Iterator over tuples of path and value.
+        """
+
+        node = self._root
+
+        if node.value is not _missing:
+            yield "/", node.value
+
+        names = _components(path)
+
+        for i, name in enumerate(names):
+            try:
+                node = node.children[name]
+            except KeyError:
+                return
+
+            if node.value is not _missing:
+                yield "/" + "/".join(names[: i + 1]), node.value
+
+    def has_equal_or_parent(self, path: str) -> bool:
+        """
+        Checks if the given path or any of its parents is stored.
+
+        :param path: Path to look up.
+        :returns: Whether a stored path is equal to or a parent of ``path``.
+        """
+        for _ in self.parents(path):
+            return True
+        return False
+
+    def has_equal_or_child(self, path: str) -> bool:
+        """
+        Checks if the given path or any of its children is stored.
+
+        :param path: Path to look up.
+        :returns: Whether a stored path is equal to or a child of ``path``.
+        """
+        node = self._find(path)
+
+        if node is None:
+            return False
+        elif node is self._root:
+            return self._len > 0
+        else:
+            # empty branches are always pruned, every other node has a value below it
+            return True
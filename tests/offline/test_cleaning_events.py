@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import time
 import timeit
 
 import pytest
@@ -13,7 +15,9 @@ from watchdog.events import (
     DirMovedEvent,
 )
 
+import maestral.sync
 from maestral.sync import SyncEngine
+from maestral.utils.trie import PathTrie
 from maestral.client import DropboxClient
 from maestral.config import remove_configuration
 
@@ -280,3 +284,113 @@ def test_performance(sync):
     )
 
     assert duration < 10 * n_loops
+
+
+def test_event_storm_coalescing(sync):
+
+    # events are merged per path on arrival, the queue size must only grow with the
+    # number of changed paths
+
+    sync.fs_events.enable()
+
+    for _ in range(1000):
+        sync.fs_events.queue_event(FileCreatedEvent(ipath(1)))
+        sync.fs_events.queue_event(FileModifiedEvent(ipath(1)))
+        sync.fs_events.queue_event(FileDeletedEvent(ipath(1)))
+    sync.fs_events.queue_event(FileCreatedEvent(ipath(1)))
+    sync.fs_events.queue_event(FileMovedEvent(ipath(2), ipath(3)))
+
+    histories, _ = sync.fs_events.pop_histories()
+
+    assert len(histories) == 3
+    assert histories[ipath(1)].n_events == 3001
+
+    res = [
+        FileCreatedEvent(ipath(1)),
+        FileMovedEvent(ipath(2), ipath(3)),
+    ]
+
+    cleaned_events = sync._clean_local_histories(histories)
+    assert set(cleaned_events) == set(res)
+
+    # queue has been emptied
+    assert not sync.fs_events.wait_for_event(timeout=0)
+
+
+def test_stream_quiet_paths(sync):
+
+    # paths which are quiet are returned while busy paths keep accumulating events
+
+    sync.fs_events.enable()
+
+    sync.fs_events.queue_event(FileCreatedEvent(ipath(1)))
+    sync.fs_events.queue_event(DirCreatedEvent(ipath(2)))
+    time.sleep(0.5)
+    sync.fs_events.queue_event(FileCreatedEvent(ipath(3)))
+    sync.fs_events.queue_event(FileCreatedEvent(ipath(2) + "/file.txt"))
+
+    histories, cursor = sync.fs_events.pop_quiet_histories(delay=0.2)
+
+    # the quiet folder is held back until its children are quiet as well
+    assert set(histories) == {ipath(1)}
+
+    histories, cursor = sync.fs_events.pop_quiet_histories(delay=0.2)
+
+    assert set(histories) == {ipath(2), ipath(3), ipath(2) + "/file.txt"}
+    assert not sync.fs_events.wait_for_event(timeout=0)
+
+
+def test_stream_quiet_moves(sync):
+
+    # both halves of a move are held back while either of them is busy
+
+    sync.fs_events.enable()
+
+    sync.fs_events.queue_event(DirMovedEvent(ipath(1), ipath(2)))
+    sync.fs_events.queue_event(FileCreatedEvent(ipath(3)))
+    time.sleep(0.5)
+    sync.fs_events.queue_event(FileModifiedEvent(ipath(2) + "/file.txt"))
+
+    histories, cursor = sync.fs_events.pop_quiet_histories(delay=0.2)
+
+    assert set(histories) == {ipath(3)}
+
+    histories, cursor = sync.fs_events.pop_quiet_histories(delay=0.2)
+
+    assert set(histories) == {ipath(1), ipath(2), ipath(2) + "/file.txt"}
+    assert not sync.fs_events.wait_for_event(timeout=0)
+
+    cleaned_events = sync._clean_local_histories(histories)
+    assert DirMovedEvent(ipath(1), ipath(2)) in cleaned_events
+
+
+def test_stream_ignores_notifications(sync, monkeypatch):
+
+    # busy paths are not checked again for every new event
+
+    n_scans = 0
+
+    class CountingTrie(PathTrie):
+        def __init__(self):
+            nonlocal n_scans
+            n_scans += 1
+            super().__init__()
+
+    monkeypatch.setattr(maestral.sync, "PathTrie", CountingTrie)
+
+    sync.fs_events.enable()
+    sync.fs_events.queue_event(DirCreatedEvent(ipath(1)))
+
+    def write_continuously():
+        for _ in range(100):
+            sync.fs_events.queue_event(FileModifiedEvent(ipath(1) + "/file.txt"))
+            time.sleep(0.005)
+
+    writer = threading.Thread(target=write_continuously)
+    writer.start()
+
+    histories, cursor = sync.fs_events.pop_quiet_histories(delay=0.2)
+    writer.join()
+
+    assert set(histories) == {ipath(1), ipath(1) + "/file.txt"}
+    assert n_scans < 20
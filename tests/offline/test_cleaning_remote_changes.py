@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import pytest
+from dropbox.files import (
+    ListFolderResult,
+    FileMetadata,
+    FolderMetadata,
+    DeletedMetadata,
+)
+
+from maestral.sync import SyncEngine, SyncEvent, coalesce_list_folder_results
+from maestral.client import DropboxClient
+from maestral.config import remove_configuration
+
+
+@pytest.fixture
+def sync():
+    sync = SyncEngine(DropboxClient("test-config"))
+    sync.dropbox_path = "/"
+
+    yield sync
+
+    remove_configuration("test-config")
+
+
+def file(path):
+    return FileMetadata(
+        name=path.split("/")[-1],
+        path_lower=path.lower(),
+        path_display=path,
+        id="id:" + path,
+        client_modified=datetime.utcnow(),
+        server_modified=datetime.utcnow(),
+        rev="a1c10ce0dd78",
+        size=0,
+    )
+
+
+def folder(path):
+    return FolderMetadata(
+        name=path.split("/")[-1],
+        path_lower=path.lower(),
+        path_display=path,
+        id="id:" + path,
+    )
+
+
+def deleted(path):
+    return DeletedMetadata(
+        name=path.split("/")[-1],
+        path_lower=path.lower(),
+        path_display=path,
+    )
+
+
+def page(entries, cursor, has_more=True):
+    return ListFolderResult(entries=entries, cursor=cursor, has_more=has_more)
+
+
+def test_coalesce_pages():
+
+    pages = [page([file(f"/{i}.txt")], cursor=str(i)) for i in range(5)]
+    pages[-1].has_more = False
+
+    merged = list(coalesce_list_folder_results(iter(pages), max_entries=2))
+
+    assert [len(res.entries) for res in merged] == [2, 2, 1]
+    assert [res.cursor for res in merged] == ["1", "3", "4"]
+    assert [res.has_more for res in merged] == [True, True, False]
+
+
+def test_single_path_history(sync):
+
+    changes = page([file("/a.txt"), deleted("/a.txt"), file("/a.txt")], cursor="1")
+
+    cleaned = sync._clean_remote_changes(changes)
+    assert [type(e) for e in cleaned.entries] == [FileMetadata]
+
+
+def test_deleted_parent_drops_children(sync, tmp_path):
+
+    sync.dropbox_path = str(tmp_path)
+
+    # an existing child which is not listed in the changes
+    (tmp_path / "folder").mkdir()
+    (tmp_path / "folder" / "old.txt").write_text("old")
+    for md in (folder("/folder"), file("/folder/old.txt")):
+        sync.update_index_from_sync_event(SyncEvent.from_dbx_metadata(md, sync))
+
+    # children created before their parent is deleted should be dropped,
+    # children created after the parent has been recreated should be kept
+    pages = [
+        page([folder("/folder"), file("/folder/1.txt")], cursor="1"),
+        page([deleted("/folder")], cursor="2"),
+        page([folder("/folder"), file("/folder/2.txt")], cursor="3", has_more=False),
+    ]
+
+    res = next(coalesce_list_folder_results(iter(pages), max_entries=100))
+    cleaned = sync._clean_remote_changes(res)
+
+    paths = {(type(e), e.path_lower) for e in cleaned.entries}
+
+    assert (FileMetadata, "/folder/1.txt") not in paths
+    assert (FileMetadata, "/folder/2.txt") in paths
+    assert (FolderMetadata, "/folder") in paths
+    assert cleaned.cursor == "3"
+
+    # the deletion of the recreated folder must be applied before its creation
+    types = [type(e) for e in cleaned.entries if e.path_lower == "/folder"]
+    assert types == [DeletedMetadata, FolderMetadata]
+
+    sync_events = [
+        SyncEvent.from_dbx_metadata(md, sync)
+        for md in cleaned.entries
+        if not isinstance(md, FileMetadata)
+    ]
+    sync.apply_remote_changes(sync_events)
+
+    assert (tmp_path / "folder").is_dir()
+    assert not (tmp_path / "folder" / "old.txt").exists()
+    assert not sync.get_index_entry("/folder/old.txt")
+
+    # a folder which is deleted and recreated with all its children, for instance when
+    # it is shared, is reduced to the final entries without deleting local content
+    for md in (folder("/shared"), file("/shared/a.txt")):
+        sync.update_index_from_dbx_metadata(md)
+
+    changes = page(
+        [
+            deleted("/shared"),
+            deleted("/shared/a.txt"),
+            folder("/shared"),
+            file("/shared/a.txt"),
+        ],
+        cursor="4",
+    )
+    cleaned = sync._clean_remote_changes(changes)
+
+    assert [(type(e), e.path_lower) for e in cleaned.entries] == [
+        (FolderMetadata, "/shared"),
+        (FileMetadata, "/shared/a.txt"),
+    ]
+
+
+def test_correct_case_batch(sync):
+
+    # parents which are part of the batch are resolved without any lookups
+    entries = [
+        folder("/Folder"),
+        folder("/folder/Sub"),
+        file("/folder/sub/File.txt"),
+    ]
+
+    cased_paths = sync.correct_case_batch(entries)
+
+    assert cased_paths == {
+        "/folder": "/Folder",
+        "/folder/sub": "/Folder/Sub",
+        "/folder/sub/file.txt": "/Folder/Sub/File.txt",
+    }
+
+
+def test_update_index_uses_batch_casing(sync, monkeypatch):
+
+    sync.update_index_from_dbx_metadata(folder("/Folder"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected case lookup")
+
+    # the parent casing is known and does not need to be looked up per entry
+    monkeypatch.setattr(sync, "correct_case", fail)
+    monkeypatch.setattr(sync.client, "get_metadata", fail)
+
+    sync.update_index_from_dbx_metadata(file("/folder/File.txt"))
+
+    assert sync.get_index_entry("/folder/file.txt").dbx_path_cased == "/Folder/File.txt"
@@ -53,6 +53,32 @@ def test_stop(config_name):
     assert result.exit_code == 0
 
 
+def test_status_verbose(config_name):
+
+    res = start_maestral_daemon_process(config_name, timeout=20)
+    assert res is Start.Ok
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["status", "--verbose", "-c", config_name])
+
+    assert result.exit_code == 0
+    assert "Startup phase" in result.output
+    assert "sync_engine.database" in result.output
+    assert "total" in result.output
+
+
+def test_metrics(config_name):
+
+    res = start_maestral_daemon_process(config_name, timeout=20)
+    assert res is Start.Ok
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["metrics", "-c", config_name])
+
+    assert result.exit_code == 0
+    assert "# TYPE maestral_api_requests_total counter" in result.output
+
+
 def test_filestatus(m):
     runner = CliRunner()
     result = runner.invoke(main, ["filestatus", "/usr", "-c", m.config_name])
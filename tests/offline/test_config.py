@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+import time
+
+import pytest
+
+from maestral.config.user import UserConfig
+
+
+DEFAULTS = [("main", {"counter": 0, "cursor": ""})]
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    return str(tmp_path / "test.state")
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_save(config_path):
+
+    conf = UserConfig(config_path, defaults=DEFAULTS)
+    conf.set("main", "counter", 1)
+
+    assert "counter = 1" in read_file(config_path)
+    assert not glob.glob(config_path + "*.tmp")
+
+
+def test_save_failure_keeps_file(config_path, monkeypatch):
+
+    conf = UserConfig(config_path, defaults=DEFAULTS)
+    conf.set("main", "counter", 1)
+
+    def replace(src, dst):
+        raise PermissionError(src)
+
+    monkeypatch.setattr(os, "replace", replace)
+
+    conf.set("main", "counter", 2)
+
+    # the previous file is kept and the temporary file is removed
+    assert "counter = 1" in read_file(config_path)
+    assert not glob.glob(config_path + "*.tmp")
+
+
+def test_unique_tmp_files(config_path):
+
+    # processes which save the same file must not share a temporary file
+    conf0 = UserConfig(config_path, defaults=DEFAULTS)
+    conf1 = UserConfig(config_path, defaults=DEFAULTS)
+
+    tmp_fpath0 = conf0._DefaultsConfig__write_tmp_file()
+    tmp_fpath1 = conf1._DefaultsConfig__write_tmp_file()
+
+    assert tmp_fpath0 != tmp_fpath1
+    assert os.path.dirname(tmp_fpath0) == os.path.dirname(config_path)
+    assert read_file(tmp_fpath0) == read_file(tmp_fpath1)
+
+
+def test_write_behind(config_path):
+
+    conf = UserConfig(config_path, defaults=DEFAULTS, write_behind=0.2)
+
+    for i in range(1, 101):
+        conf.set("main", "counter", i)
+
+    # updates are coalesced and written by a background timer
+    assert not os.path.exists(config_path)
+    assert conf.get("main", "counter") == 100
+
+    time.sleep(0.5)
+
+    assert "counter = 100" in read_file(config_path)
+    assert not glob.glob(config_path + "*.tmp")
+
+
+def test_write_behind_flush(config_path):
+
+    conf = UserConfig(config_path, defaults=DEFAULTS, write_behind=60)
+    conf.set("main", "cursor", "abc")
+    conf.flush()
+
+    assert "cursor = abc" in read_file(config_path)
+
+    reloaded = UserConfig(config_path, defaults=DEFAULTS)
+
+    assert reloaded.get("main", "cursor") == "abc"
+
+
+def test_write_behind_cleanup(config_path):
+
+    conf = UserConfig(config_path, defaults=DEFAULTS, backup=True, write_behind=0.1)
+    conf.set("main", "counter", 1)
+    conf.cleanup()
+
+    # pending changes are discarded
+    time.sleep(0.3)
+
+    assert not os.path.exists(config_path)
+
+
+def test_value_cache(config_path):
+
+    defaults = [("main", {"counter": 0, "items": ["a"]})]
+    conf = UserConfig(config_path, defaults=defaults)
+
+    assert conf.get("main", "counter") == 0
+
+    conf.set("main", "counter", 1)
+
+    assert conf.get("main", "counter") == 1
+
+    # mutable values are copies and cannot modify the cache
+    items = conf.get("main", "items")
+    items.append("b")
+
+    assert conf.get("main", "items") == ["a"]
+
+
+def test_reload_external_changes(config_path):
+
+    conf = UserConfig(config_path, defaults=DEFAULTS)
+    conf.set("main", "counter", 1)
+
+    other = UserConfig(config_path, defaults=DEFAULTS)
+    other.set("main", "counter", 2)
+
+    assert conf.get("main", "counter") == 1
+
+    conf._last_reload_check = 0
+
+    assert conf.get("main", "counter") == 2
@@ -3,9 +3,12 @@
 import sys
 import os
 import time
+import socket
 import subprocess
 import threading
 import uuid
+import urllib.request
+from urllib.error import HTTPError
 
 import pytest
 from Pyro5.api import Proxy
@@ -21,7 +24,10 @@ from maestral.daemon import (
     Lock,
 )
 from maestral.main import Maestral
+from maestral.config import MaestralConfig
 from maestral.errors import NotLinkedError
+from maestral.ipc import EventSubscriber, read_status
+from maestral import thin_cli
 
 
 # locking tests
@@ -206,3 +212,133 @@ def test_remote_exceptions(config_name):
 
     # stop daemon
     stop_maestral_daemon_process(config_name)
+
+
+# status snapshot and event subscription tests
+
+
+def test_status_snapshot(config_name):
+
+    # start daemon process
+    start_maestral_daemon_process(config_name, timeout=20)
+
+    t0 = time.monotonic()
+    status = read_status(config_name)
+
+    while status is None and time.monotonic() - t0 < 10:
+        time.sleep(0.1)
+        status = read_status(config_name)
+
+    assert status["config_name"] == config_name
+    assert not status["running"]
+    assert status["sync_errors"] == []
+
+    # stop daemon
+    stop_maestral_daemon_process(config_name)
+
+    assert read_status(config_name) is None
+
+
+def test_event_subscription(config_name):
+
+    # start daemon process
+    start_maestral_daemon_process(config_name, timeout=20)
+
+    with EventSubscriber(config_name, timeout=10) as subscriber:
+
+        # subscribers first receive the current state
+        events = [subscriber.receive() for _ in range(3)]
+
+        assert [e["type"] for e in events] == ["status", "sync_errors", "activity"]
+        assert not events[0]["running"]
+        assert events[1]["sync_errors"] == []
+        assert events[2]["added"] == []
+
+        # the connection is closed when the daemon shuts down
+        stop_maestral_daemon_process(config_name)
+
+        assert subscriber.receive() is None
+
+
+def test_event_socket_requests(config_name, tmp_path):
+
+    # start daemon process
+    start_maestral_daemon_process(config_name, timeout=20)
+
+    with EventSubscriber(config_name, timeout=10) as subscriber:
+
+        res = subscriber.request("get_file_status_batch", [str(tmp_path)])
+        assert res == ["unwatched"]
+
+        with pytest.raises(RuntimeError):
+            subscriber.request("unlink")
+
+        # events received while waiting for responses are kept
+        assert subscriber.receive()["type"] == "status"
+
+    # stop daemon
+    stop_maestral_daemon_process(config_name)
+
+
+def test_thin_cli(config_name, tmp_path, capsys):
+
+    # start daemon process
+    start_maestral_daemon_process(config_name, timeout=20)
+
+    t0 = time.monotonic()
+
+    while read_status(config_name) is None and time.monotonic() - t0 < 10:
+        time.sleep(0.1)
+
+    assert thin_cli.status([], config_name)
+    assert "Sync errors:  0" in capsys.readouterr().out
+
+    assert thin_cli.filestatus([str(tmp_path)], config_name)
+    assert capsys.readouterr().out == "unwatched\n"
+
+    assert thin_cli.metrics([], config_name)
+    assert "# TYPE maestral_api_requests_total counter" in capsys.readouterr().out
+
+    # stop daemon
+    stop_maestral_daemon_process(config_name)
+
+    # status is handled by the full CLI when the daemon is not running
+    assert not thin_cli.status([], config_name)
+
+
+def test_metrics_endpoint(config_name):
+
+    # find a free port
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    MaestralConfig(config_name).set("app", "metrics_port", port)
+
+    # start daemon process
+    start_maestral_daemon_process(config_name, timeout=20)
+
+    url = f"http://127.0.0.1:{port}/metrics"
+    t0 = time.monotonic()
+
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                content_type = response.headers["Content-Type"]
+                text = response.read().decode()
+            break
+        except OSError:
+            if time.monotonic() - t0 > 10:
+                raise
+            time.sleep(0.1)
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "# TYPE maestral_sync_queue_size gauge" in text
+
+    with pytest.raises(HTTPError) as exc_info:
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/other", timeout=5)
+
+    assert exc_info.value.code == 404
+
+    # stop daemon
+    stop_maestral_daemon_process(config_name)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import timeit
+
+import pytest
+from watchdog.events import FileCreatedEvent
+from watchdog.utils.dirsnapshot import DirectorySnapshot
+
+from maestral.sync import SyncEngine, SyncEvent
+from maestral.constants import MIGNORE_FILE, EXCLUDED_DIR_NAMES
+from maestral.client import DropboxClient
+from maestral.config import remove_configuration
+
+
+@pytest.fixture
+def sync():
+    sync = SyncEngine(DropboxClient("test-config"))
+    sync.dropbox_path = "/"
+
+    yield sync
+
+    remove_configuration("test-config")
+
+
+def test_clean_excluded_items_list():
+
+    items = ["/Folder/", "/folder/sub", "/folder", "/other/sub", "/other/sub2/a"]
+    cleaned = SyncEngine.clean_excluded_items_list(items)
+
+    assert set(cleaned) == {"/folder", "/other/sub", "/other/sub2/a"}
+
+
+def test_is_excluded_by_user(sync):
+
+    sync.excluded_items = ["/Folder", "/other/sub"]
+
+    assert sync.is_excluded_by_user("/folder")
+    assert sync.is_excluded_by_user("/FOLDER/file.txt")
+    assert sync.is_excluded_by_user("/other/sub/a/b")
+    assert not sync.is_excluded_by_user("/folder2")
+    assert not sync.is_excluded_by_user("/other")
+
+    assert sync.is_partially_excluded_by_user("/other")
+    assert sync.is_partially_excluded_by_user("/")
+    assert not sync.is_partially_excluded_by_user("/other/sub")
+    assert not sync.is_partially_excluded_by_user("/folder2")
+
+    # matcher is updated when the excluded items change
+    sync.excluded_items = []
+
+    assert not sync.is_excluded_by_user("/folder")
+    assert not sync.is_partially_excluded_by_user("/other")
+
+
+def test_is_excluded():
+
+    assert SyncEngine.is_excluded("/")
+    assert SyncEngine.is_excluded("/folder/.DS_Store")
+    assert SyncEngine.is_excluded("/folder/.dropbox.cache/file.txt")
+    assert SyncEngine.is_excluded("/folder/~$document.docx")
+    assert not SyncEngine.is_excluded("/folder/.dropbox.cache2/file.txt")
+    assert not SyncEngine.is_excluded("/folder/file.cache")
+
+    for name in EXCLUDED_DIR_NAMES:
+        assert SyncEngine.is_excluded(f"/folder/{name}/file.txt")
+
+
+def test_performance(sync):
+
+    # 10,000 excluded folders
+    sync.excluded_items = [f"/folder {i}/subfolder" for i in range(10000)]
+    paths = [f"/folder {i}/subfolder/file.txt" for i in range(0, 20000, 2)]
+
+    n_loops = 4
+    duration = timeit.timeit(
+        lambda: [sync.is_excluded_by_user(p) for p in paths], number=n_loops
+    )
+
+    assert duration < 1 * n_loops
+
+
+def test_scandir_with_mignore(tmp_path):
+
+    sync = SyncEngine(DropboxClient("test-config"))
+    sync.dropbox_path = str(tmp_path)
+
+    try:
+        (tmp_path / "node_modules" / "module").mkdir(parents=True)
+        (tmp_path / "src" / "node_modules").mkdir(parents=True)
+        (tmp_path / "src" / "main.js").touch()
+        (tmp_path / "src" / "main.pyc").touch()
+        (tmp_path / MIGNORE_FILE).write_text("node_modules/\n*.pyc\n")
+
+        sync._reload_mignore_rules_if_changed()
+        snapshot = DirectorySnapshot(
+            sync.dropbox_path, listdir=sync._scandir_with_mignore
+        )
+
+        # ignored folders are not descended into
+        assert {sync.to_dbx_path(p) for p in snapshot.paths} == {
+            "/",
+            "/src",
+            "/src/main.js",
+            "/.mignore",
+        }
+    finally:
+        remove_configuration("test-config")
+
+
+def test_mignore_checked_once_per_batch(tmp_path, monkeypatch):
+
+    sync = SyncEngine(DropboxClient("test-config"))
+    sync.dropbox_path = str(tmp_path)
+
+    try:
+        (tmp_path / MIGNORE_FILE).write_text("*.pyc\n")
+
+        n_checks = 0
+        reload_rules = sync._reload_mignore_rules_if_changed
+
+        def counting_reload():
+            nonlocal n_checks
+            n_checks += 1
+            reload_rules()
+
+        monkeypatch.setattr(sync, "_reload_mignore_rules_if_changed", counting_reload)
+
+        events = [
+            FileCreatedEvent(str(tmp_path / f"file {i}.{ext}"))
+            for i in range(100)
+            for ext in ("txt", "pyc")
+        ]
+        cleaned = sync._clean_local_events(events)
+        sync_events = [SyncEvent.from_file_system_event(e, sync) for e in cleaned]
+        filtered, excluded = sync._filter_excluded_changes_local(sync_events)
+
+        assert len(filtered) == 100
+        assert all(e.dbx_path.endswith(".pyc") for e in excluded)
+        assert n_checks == 2
+    finally:
+        remove_configuration("test-config")
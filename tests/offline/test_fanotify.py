@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import os
+import os.path as osp
+import sys
+import time
+
+import pytest
+from watchdog.events import (
+    FileSystemEventHandler,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirMovedEvent,
+)
+
+
+if not sys.platform.startswith("linux"):
+    pytest.skip("Requires fanotify", allow_module_level=True)
+
+
+from maestral.fsevents import create_observer  # noqa: E402
+from maestral.fsevents.fanotify import FanotifyObserver, check_available  # noqa: E402
+from maestral.fsevents.inotify import InotifyObserver  # noqa: E402
+
+
+def fanotify_available(path):
+    try:
+        check_available(path)
+    except OSError:
+        return False
+    else:
+        return True
+
+
+class EventCollector(FileSystemEventHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_any_event(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def observed(tmp_path):
+
+    root = str(tmp_path / "root")
+    os.mkdir(root)
+    os.mkdir(osp.join(root, "existing"))
+
+    if not fanotify_available(root):
+        pytest.skip("Fanotify not available")
+
+    handler = EventCollector()
+    observer = FanotifyObserver(timeout=0.1)
+    observer.schedule(handler, root, recursive=True)
+    observer.start()
+
+    yield root, handler, observer
+
+    observer.stop()
+    observer.join()
+
+
+def wait_for_events(handler, n_events=1, timeout=5):
+    t0 = time.time()
+    while len(handler.events) < n_events and time.time() - t0 < timeout:
+        time.sleep(0.05)
+    time.sleep(0.2)
+
+
+def test_create_delete(observed):
+
+    root, handler, observer = observed
+
+    path = osp.join(root, "existing", "file.txt")
+    open(path, "w").close()
+    os.remove(path)
+    wait_for_events(handler, 2)
+
+    assert handler.events == [FileCreatedEvent(path), FileDeletedEvent(path)]
+
+
+def test_new_subtree(observed):
+
+    root, handler, observer = observed
+
+    os.makedirs(osp.join(root, "a", "b"))
+    open(osp.join(root, "a", "b", "file.txt"), "w").close()
+    wait_for_events(handler, 3)
+
+    assert DirCreatedEvent(osp.join(root, "a")) in handler.events
+    assert DirCreatedEvent(osp.join(root, "a", "b")) in handler.events
+    assert FileCreatedEvent(osp.join(root, "a", "b", "file.txt")) in handler.events
+
+
+def test_moves(observed):
+
+    root, handler, observer = observed
+
+    src = osp.join(root, "existing")
+    dest = osp.join(root, "renamed")
+
+    os.rename(src, dest)
+    open(osp.join(dest, "file.txt"), "w").close()
+    os.rename(osp.join(dest, "file.txt"), osp.join(dest, "new.txt"))
+    wait_for_events(handler, 3)
+
+    assert handler.events == [
+        DirMovedEvent(src, dest),
+        FileCreatedEvent(osp.join(dest, "file.txt")),
+        FileMovedEvent(osp.join(dest, "file.txt"), osp.join(dest, "new.txt")),
+    ]
+
+
+def test_filters_events_outside_root(observed, tmp_path):
+
+    root, handler, observer = observed
+
+    outside = str(tmp_path / "outside")
+    os.mkdir(outside)
+    open(osp.join(outside, "file.txt"), "w").close()
+
+    # moves across the boundary are reported as created and deleted events
+    os.rename(osp.join(outside, "file.txt"), osp.join(root, "file.txt"))
+    os.rename(osp.join(root, "existing"), osp.join(outside, "existing"))
+    wait_for_events(handler, 2)
+
+    assert handler.events == [
+        FileCreatedEvent(osp.join(root, "file.txt")),
+        DirDeletedEvent(osp.join(root, "existing")),
+    ]
+    assert observer.stats["filtered"] > 0
+
+
+def test_fallback(tmp_path, monkeypatch):
+    def unavailable(path):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr("maestral.fsevents.fanotify.check_available", unavailable)
+
+    observer = create_observer("fanotify", path=str(tmp_path))
+
+    assert isinstance(observer, InotifyObserver)
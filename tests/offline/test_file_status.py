@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import os.path as osp
+from datetime import datetime
+
+import pytest
+from dropbox.files import FileMetadata, FolderMetadata
+
+from maestral.sync import SyncEvent, SyncDirection, SyncActivity, SyncErrorSet
+from maestral.errors import SyncError
+
+
+def folder(path):
+    return FolderMetadata(
+        name=path.split("/")[-1], path_lower=path.lower(), path_display=path, id="id:1"
+    )
+
+
+def file(path):
+    return FileMetadata(
+        name=path.split("/")[-1],
+        path_lower=path.lower(),
+        path_display=path,
+        id="id:" + path,
+        client_modified=datetime.utcnow(),
+        server_modified=datetime.utcnow(),
+        rev="a1c10ce0dd78",
+        size=0,
+    )
+
+
+@pytest.fixture
+def running_m(m, tmp_path):
+    m.sync.dropbox_path = str(tmp_path)
+    m.monitor.running.set()
+
+    m.sync.update_index_from_dbx_metadata(folder("/folder"))
+
+    for name in ("synced.txt", "uploading.txt", "downloading.txt", "error.txt"):
+        m.sync.update_index_from_dbx_metadata(file(f"/folder/{name}"))
+
+    yield m
+
+    m.monitor.running.clear()
+    m.sync.clear_index()
+
+
+def test_file_status_batch(running_m):
+
+    m = running_m
+
+    upload = SyncEvent.from_dbx_metadata(file("/folder/uploading.txt"), m.sync)
+    upload.direction = SyncDirection.Up
+    download = SyncEvent.from_dbx_metadata(file("/folder/downloading.txt"), m.sync)
+
+    m.sync.syncing.append(upload)
+    m.sync.syncing.append(download)
+    m.sync.sync_errors.add(SyncError("Error", "", dbx_path="/folder/error.txt"))
+
+    names = ["synced.txt", "uploading.txt", "downloading.txt", "error.txt", "new.txt"]
+    paths = [osp.join(m.sync.dropbox_path, "folder", name) for name in names]
+    paths.insert(0, osp.join(m.sync.dropbox_path, "folder"))
+    paths.append("/outside")
+
+    expected = [
+        "uploading",
+        "up to date",
+        "uploading",
+        "downloading",
+        "error",
+        "unwatched",
+        "unwatched",
+    ]
+
+    assert m.get_file_status_batch(paths) == expected
+    assert [m.get_file_status(p) for p in paths] == expected
+
+    # all items are unwatched while syncing is stopped
+    m.monitor.running.clear()
+
+    assert m.get_file_status_batch(paths) == ["unwatched"] * len(paths)
+
+
+def test_sync_activity(running_m):
+
+    m = running_m
+    m.sync.update_index_from_dbx_metadata(folder("/folder/sub"))
+    m.sync.update_index_from_dbx_metadata(folder("/other"))
+
+    activity = SyncActivity()
+
+    upload = SyncEvent.from_dbx_metadata(file("/folder/sub/file.txt"), m.sync)
+    upload.direction = SyncDirection.Up
+    download = SyncEvent.from_dbx_metadata(file("/folder/sub/file.txt"), m.sync)
+    other = SyncEvent.from_dbx_metadata(file("/other/file.txt"), m.sync)
+
+    activity.append(upload)
+    activity.append(download)
+    activity.append(other)
+
+    assert list(activity) == [upload, download, other]
+    assert len(activity) == 3
+    assert activity.count(SyncDirection.Up) == 1
+    assert activity.count(SyncDirection.Down) == 2
+
+    # the first queued event determines the direction
+    assert activity.get_direction("/FOLDER/sub/file.txt") == SyncDirection.Up
+    assert activity.get_direction("/folder") == SyncDirection.Up
+    assert activity.get_direction("/other") == SyncDirection.Down
+    assert activity.get_direction("/folder/sub/file2.txt") is None
+
+    activity.remove(upload)
+
+    assert activity.get_direction("/folder/sub/file.txt") == SyncDirection.Down
+    assert activity.get_direction("/folder") == SyncDirection.Down
+
+    with pytest.raises(ValueError):
+        activity.remove(upload)
+
+    activity.remove(download)
+    activity.remove(other)
+
+    assert not activity
+    assert activity.get_direction("/") is None
+    assert activity.count(SyncDirection.Up) == 0
+    assert activity.count(SyncDirection.Down) == 0
+
+
+def test_sync_error_set():
+
+    errors = SyncErrorSet()
+
+    error0 = SyncError("Error", "", dbx_path="/Folder")
+    error1 = SyncError("Error", "", dbx_path="/folder/file.txt")
+    error2 = SyncError("Error", "", dbx_path="/other.txt")
+
+    errors.add(error0)
+    errors.add(error1)
+    errors.add(error2)
+
+    assert len(errors) == 3
+    assert errors.get("/folder") == [error0]
+    assert errors.get("/folder/file2.txt") == []
+
+    assert errors.discard_equal_or_children("/folder") == 2
+    assert set(errors) == {error2}
+    assert errors.get("/folder/file.txt") == []
+
+    errors.clear()
+
+    assert not errors
@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
 from pathlib import Path
 
-from watchdog.events import DirCreatedEvent, DirMovedEvent
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirMovedEvent,
+    FileCreatedEvent,
+    FileMovedEvent,
+)
 
-from maestral.sync import SyncDirection, ItemType, ChangeType
+from maestral.sync import FSEventHandler, SyncDirection, ItemType, ChangeType
 from maestral.utils.path import move
 
 
@@ -88,3 +95,29 @@ def test_catching_non_ignored_events(sync):
     sync.wait_for_local_changes()
     sync_events, _ = sync.list_local_changes()
     assert all(not si.is_directory for si in sync_events)
+
+
+def test_ignore_registry():
+
+    fs_events = FSEventHandler()
+    fs_events.ignore_timeout = 0.1
+
+    with fs_events.ignore(DirCreatedEvent("/parent")):
+        # recursive ignores match children of the same type only
+        assert fs_events._is_ignored(DirCreatedEvent("/parent/child"))
+        assert fs_events._is_ignored(FileCreatedEvent("/parent/child.txt"))
+        assert not fs_events._is_ignored(DirDeletedEvent("/parent/child"))
+        assert not fs_events._is_ignored(FileCreatedEvent("/parent child.txt"))
+
+    with fs_events.ignore(FileMovedEvent("/a.txt", "/b.txt")):
+        # non-recursive ignores match only once
+        assert not fs_events._is_ignored(FileMovedEvent("/a.txt", "/c.txt"))
+        assert fs_events._is_ignored(FileMovedEvent("/a.txt", "/b.txt"))
+        assert not fs_events._is_ignored(FileMovedEvent("/a.txt", "/b.txt"))
+
+    # ignores expire after the timeout
+    assert fs_events._is_ignored(DirCreatedEvent("/parent/child"))
+    time.sleep(0.2)
+    fs_events.expire_ignored_events()
+    assert not fs_events._is_ignored(DirCreatedEvent("/parent/child"))
+    assert len(fs_events._ignored_events) == 0
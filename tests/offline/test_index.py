@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from dropbox.files import FileMetadata, FolderMetadata, DeletedMetadata
+
+from maestral.sync import SyncEngine
+from maestral.database import IndexRecord
+from maestral.client import DropboxClient
+from maestral.config import MaestralConfig, remove_configuration
+
+
+@pytest.fixture(params=[False, True], ids=["cached", "mirrored"])
+def sync(request):
+    MaestralConfig("test-config").set("sync", "index_mirror", request.param)
+
+    sync = SyncEngine(DropboxClient("test-config"))
+    sync.dropbox_path = "/"
+
+    yield sync
+
+    sync.clear_index()
+    remove_configuration("test-config")
+
+
+def folder(path):
+    return FolderMetadata(
+        name=path.split("/")[-1], path_lower=path.lower(), path_display=path, id="id:1"
+    )
+
+
+def file(path, rev="a1c10ce0dd78"):
+    return FileMetadata(
+        name=path.split("/")[-1],
+        path_lower=path.lower(),
+        path_display=path,
+        id="id:2",
+        client_modified=None,
+        server_modified=None,
+        rev=rev,
+        size=0,
+    )
+
+
+def test_index_updates(sync):
+
+    assert sync.get_index_entry("/Folder") is None
+
+    sync.update_index_from_dbx_metadata(folder("/Folder"))
+    sync.update_index_from_dbx_metadata(file("/folder/File.txt"))
+    sync.update_index_from_dbx_metadata(file("/folder-2.txt"))
+
+    entry = sync.get_index_entry("/folder/file.txt")
+
+    assert entry.dbx_path_cased == "/Folder/File.txt"
+    assert entry.is_file
+    assert sync.get_local_rev("/folder/file.txt") == "a1c10ce0dd78"
+    assert sync.index_count() == 3
+
+    # updates are visible immediately
+    sync.update_index_from_dbx_metadata(file("/folder/File.txt", rev="b2c10ce0dd78"))
+    assert sync.get_local_rev("/folder/file.txt") == "b2c10ce0dd78"
+
+    # removing a folder removes its children
+    md = DeletedMetadata(name="folder", path_lower="/folder", path_display="/folder")
+    sync.update_index_from_dbx_metadata(md)
+
+    assert sync.get_index_entry("/folder") is None
+    assert sync.get_index_entry("/folder/file.txt") is None
+    assert sync.get_index_entry("/folder-2.txt") is not None
+    assert sync.index_count() == 1
+
+
+def test_mirror_loaded_on_startup(sync):
+
+    sync.update_index_from_dbx_metadata(folder("/Folder"))
+
+    new_sync = SyncEngine(sync.client)
+    entry = new_sync.get_index_entry("/folder")
+
+    assert entry.dbx_path_cased == "/Folder"
+    assert isinstance(entry, IndexRecord) == (new_sync._index_mirror is not None)
+
+
+def test_get_index_entries(sync):
+
+    sync.update_index_from_dbx_metadata(folder("/Folder"))
+    sync.update_index_from_dbx_metadata(file("/folder/File.txt"))
+
+    # cached entry
+    sync.get_index_entry("/folder")
+
+    entries = sync.get_index_entries(["/folder", "/FOLDER/file.txt", "/missing"])
+
+    assert entries["/folder"].dbx_path_cased == "/Folder"
+    assert entries["/folder/file.txt"].rev == "a1c10ce0dd78"
+    assert entries["/missing"] is None
+
+    # results are cached
+    assert sync.get_index_entries(["/missing"]) == {"/missing": None}
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+import os
+import os.path as osp
+import sys
+import threading
+import time
+
+import pytest
+from watchdog.events import (
+    FileSystemEventHandler,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirMovedEvent,
+)
+
+
+if not sys.platform.startswith("linux"):
+    pytest.skip("Requires inotify", allow_module_level=True)
+
+
+from maestral.fsevents.inotify import (  # noqa: E402
+    InotifyObserver,
+    EVENT_HEADER,
+    IN_Q_OVERFLOW,
+)
+
+
+class EventCollector(FileSystemEventHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_any_event(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def observed(tmp_path):
+
+    root = str(tmp_path)
+    os.mkdir(osp.join(root, "existing"))
+
+    handler = EventCollector()
+    observer = InotifyObserver(timeout=0.1)
+    observer.schedule(handler, root, recursive=True)
+    observer.start()
+
+    yield root, handler, observer
+
+    observer.stop()
+    observer.join()
+
+
+def wait_for_events(handler, n_events=1, timeout=5):
+    t0 = time.time()
+    while len(handler.events) < n_events and time.time() - t0 < timeout:
+        time.sleep(0.05)
+    time.sleep(0.2)
+
+
+def test_watches_existing_tree(observed):
+
+    root, handler, observer = observed
+
+    assert observer.stats["watches"] == 2
+
+    path = osp.join(root, "existing", "file.txt")
+    open(path, "w").close()
+    wait_for_events(handler)
+
+    assert FileCreatedEvent(path) in handler.events
+
+
+def test_new_subtree(observed):
+
+    root, handler, observer = observed
+
+    # items in new folders are reported even if created before the watch is added
+    os.makedirs(osp.join(root, "a", "b", "c"))
+    open(osp.join(root, "a", "b", "c", "file.txt"), "w").close()
+    wait_for_events(handler, 4)
+
+    assert DirCreatedEvent(osp.join(root, "a")) in handler.events
+    assert DirCreatedEvent(osp.join(root, "a", "b", "c")) in handler.events
+    assert FileCreatedEvent(osp.join(root, "a", "b", "c", "file.txt")) in handler.events
+    assert observer.stats["watches"] == 5
+
+
+def test_new_subtree_does_not_block_reading(observed, tmp_path_factory):
+
+    root, handler, observer = observed
+
+    outside = tmp_path_factory.mktemp("outside")
+    os.makedirs(osp.join(outside, "a", "b"))
+
+    emitter = next(iter(observer.emitters))
+    scan = emitter._scan
+    release = threading.Event()
+
+    def blocking_scan(watch, emit, strict):
+        if watch.name == "a":
+            release.wait(5)
+        return scan(watch, emit, strict)
+
+    emitter._scan = blocking_scan
+
+    # move in a subtree whose contents are only found by scanning
+    os.rename(osp.join(outside, "a"), osp.join(root, "a"))
+    wait_for_events(handler)
+
+    # events are read while the new subtree is being scanned
+    path = osp.join(root, "existing", "file.txt")
+    open(path, "w").close()
+    wait_for_events(handler, 2)
+
+    assert FileCreatedEvent(path) in handler.events
+    assert DirCreatedEvent(osp.join(root, "a", "b")) not in handler.events
+
+    release.set()
+    wait_for_events(handler, 3)
+
+    assert DirCreatedEvent(osp.join(root, "a", "b")) in handler.events
+    assert observer.stats["watches"] == 4
+
+
+def test_moves(observed):
+
+    root, handler, observer = observed
+
+    src = osp.join(root, "existing")
+    dest = osp.join(root, "renamed")
+
+    os.rename(src, dest)
+    wait_for_events(handler)
+
+    assert handler.events == [DirMovedEvent(src, dest)]
+
+    # the watch follows the moved folder
+    handler.events.clear()
+    os.rename(osp.join(root, "renamed"), osp.join(root, "renamed2"))
+    open(osp.join(root, "renamed2", "file.txt"), "w").close()
+    os.rename(
+        osp.join(root, "renamed2", "file.txt"), osp.join(root, "renamed2", "new.txt")
+    )
+    wait_for_events(handler, 3)
+
+    assert handler.events == [
+        DirMovedEvent(dest, osp.join(root, "renamed2")),
+        FileCreatedEvent(osp.join(root, "renamed2", "file.txt")),
+        FileMovedEvent(
+            osp.join(root, "renamed2", "file.txt"),
+            osp.join(root, "renamed2", "new.txt"),
+        ),
+    ]
+
+
+def test_moved_out_of_tree(observed, tmp_path_factory):
+
+    root, handler, observer = observed
+
+    outside = tmp_path_factory.mktemp("outside")
+    file_path = osp.join(root, "existing", "file.txt")
+    open(file_path, "w").close()
+    wait_for_events(handler)
+    handler.events.clear()
+
+    os.rename(osp.join(root, "existing"), osp.join(outside, "existing"))
+    wait_for_events(handler)
+
+    assert handler.events == [DirDeletedEvent(osp.join(root, "existing"))]
+
+    # changes outside are no longer reported
+    handler.events.clear()
+    os.remove(osp.join(outside, "existing", "file.txt"))
+    wait_for_events(handler, timeout=0.5)
+
+    assert FileDeletedEvent(file_path) not in handler.events
+    assert observer.stats["watches"] == 1
+
+
+def test_queue_overflow(tmp_path):
+
+    called = []
+
+    observer = InotifyObserver(timeout=0.1, overflow_callback=lambda: called.append(1))
+    observer.schedule(EventCollector(), str(tmp_path), recursive=True)
+    observer.start()
+
+    try:
+        emitter = next(iter(observer.emitters))
+        emitter._process(EVENT_HEADER.pack(-1, IN_Q_OVERFLOW, 0, 0))
+        time.sleep(0.2)
+
+        assert called == [1]
+        assert observer.stats["overflows"] == 1
+    finally:
+        observer.stop()
+        observer.join()
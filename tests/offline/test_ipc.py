@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from datetime import datetime
+
+import pytest
+from dropbox.files import FileMetadata
+
+from maestral.ipc import StatusPublisher, StatusReader
+from maestral.sync import SyncEvent
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "test.status")
+
+
+def test_publish_and_read(path):
+
+    publisher = StatusPublisher(path)
+    reader = StatusReader(path)
+
+    assert reader.read() is None
+    assert reader.seq == 0
+
+    assert publisher.publish({"pid": os.getpid(), "status": "Up to date"})
+    assert not publisher.publish({"pid": os.getpid(), "status": "Up to date"})
+
+    assert reader.read() == {"pid": os.getpid(), "status": "Up to date"}
+    assert reader.seq == publisher.seq == 2
+
+    publisher.close()
+
+    assert reader.read() is None
+    assert not os.path.exists(path)
+
+
+def test_grow(path):
+
+    publisher = StatusPublisher(path, capacity=16)
+    reader = StatusReader(path)
+
+    publisher.publish({"pid": os.getpid(), "status": "Up to date"})
+    assert reader.read()["status"] == "Up to date"
+
+    activity = [f"/folder/file {i}.txt" for i in range(1000)]
+    publisher.publish({"pid": os.getpid(), "activity": activity})
+
+    assert reader.read()["activity"] == activity
+
+    publisher.close()
+
+
+def test_restarted_publisher(path):
+
+    publisher = StatusPublisher(path)
+    reader = StatusReader(path)
+
+    publisher.publish({"pid": os.getpid(), "status": "old"})
+    assert reader.read()["status"] == "old"
+
+    # a new publisher replaces the file of a publisher which did not shut down
+    new_publisher = StatusPublisher(path)
+    new_publisher.publish({"pid": os.getpid(), "status": "new"})
+
+    assert reader.read()["status"] == "new"
+
+    publisher.close()
+    assert reader.read()["status"] == "new"
+
+    new_publisher.close()
+
+
+def test_crashed_publisher(path):
+
+    publisher = StatusPublisher(path)
+    publisher.publish({"pid": 2**22 + 1, "status": "Up to date"})
+
+    assert StatusReader(path).read() is None
+
+    publisher.close()
+
+
+def test_consistent_reads(path):
+
+    publisher = StatusPublisher(path, capacity=16)
+    done = threading.Event()
+
+    def publish():
+        for i in range(2000):
+            publisher.publish({"pid": os.getpid(), "items": [i] * (i % 100)})
+        done.set()
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+
+    reader = StatusReader(path)
+
+    while not done.is_set():
+        data = reader.read()
+        if data:
+            items = data["items"]
+            assert len(set(items)) <= 1
+            assert not items or len(items) == items[0] % 100
+
+    thread.join()
+    publisher.close()
+
+
+def test_state_changes(m):
+
+    # first call publishes the current state
+    events = m._get_state_changes()
+    assert [e["type"] for e in events] == ["status"]
+
+    # no changes
+    assert m._get_state_changes() == []
+
+    md = FileMetadata(
+        name="file.txt",
+        path_lower="/file.txt",
+        path_display="/file.txt",
+        id="id:1",
+        client_modified=datetime.utcnow(),
+        server_modified=datetime.utcnow(),
+        rev="a1c10ce0dd78",
+        size=1000,
+    )
+    event = SyncEvent.from_dbx_metadata(md, m.sync)
+
+    # new activity
+    m.sync.syncing.append(event)
+    events = m._get_state_changes()
+
+    assert len(events) == 1
+    assert events[0]["type"] == "activity"
+    assert events[0]["added"][0]["dbx_path"] == "/file.txt"
+    assert events[0]["removed"] == []
+
+    event_id = events[0]["added"][0]["id"]
+
+    # progress
+    event.completed = 500
+    events = m._get_state_changes()
+
+    assert events == [
+        dict(type="activity", added=[], removed=[], progress=[(event_id, 500)])
+    ]
+
+    # new subscribers receive the current state
+    initial_events = m._get_initial_events()
+    assert initial_events[2]["added"][0]["id"] == event_id
+
+    # finished
+    m.sync.syncing.remove(event)
+    events = m._get_state_changes()
+
+    assert events == [dict(type="activity", added=[], removed=[event_id], progress=[])]
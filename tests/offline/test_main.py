@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import time
+
+from maestral.main import Maestral
+from maestral.config import remove_configuration
+from maestral.ipc import read_status
+
+
+def test_startup_timings(m):
+
+    timings = m.startup_timings
+
+    for phase in ("config", "logging", "sync_engine", "post_update", "total"):
+        assert timings[phase] >= 0
+
+    for phase in ("database", "index_mirror", "cache_dir"):
+        assert timings[f"sync_engine.{phase}"] >= 0
+
+    # keyring access is deferred by default
+    assert "keyring" not in timings
+
+
+def test_load_credentials():
+
+    m = Maestral("test-config", load_credentials=True)
+
+    try:
+        t0 = time.monotonic()
+
+        while "keyring" not in m.startup_timings and time.monotonic() - t0 < 10:
+            time.sleep(0.01)
+
+        assert "keyring" in m.startup_timings
+        assert not m.client.auth.loaded  # no account is linked
+    finally:
+        remove_configuration(m.config_name)
+
+
+def test_cache_dir_cleaned_on_startup(m, tmp_path):
+
+    m.sync.dropbox_path = str(tmp_path)
+    os.mkdir(m.sync.file_cache_path)
+
+    with open(os.path.join(m.sync.file_cache_path, "stale"), "w") as f:
+        f.write("content")
+
+    m2 = Maestral(m.config_name)
+
+    assert m2.sync.file_cache_path == m.sync.file_cache_path
+    assert not os.path.exists(m2.sync.file_cache_path)
+
+
+def test_status_published_on_change(m):
+
+    n_snapshots = 0
+    get_status_snapshot = m._get_status_snapshot
+
+    def counting_snapshot():
+        nonlocal n_snapshots
+        n_snapshots += 1
+        return get_status_snapshot()
+
+    m._get_status_snapshot = counting_snapshot
+
+    def run_loop(seconds):
+        m._loop.run_until_complete(asyncio.sleep(seconds))
+
+    try:
+        run_loop(0.5)
+
+        assert n_snapshots == 1
+        assert read_status(m.config_name)["config_name"] == m.config_name
+
+        # no snapshots are created while idle
+        run_loop(1.5)
+        assert n_snapshots == 1
+
+        # changes are coalesced into a single snapshot
+        for _ in range(10):
+            m._on_state_change()
+
+        run_loop(0.5)
+        assert n_snapshots == 2
+    finally:
+        m.shutdown_daemon()
+        run_loop(0.1)
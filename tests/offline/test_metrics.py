@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+from dropbox import exceptions
+from dropbox.dropbox_client import DropboxBase, _DropboxTransport
+
+from maestral.client import DropboxClient
+from maestral.metrics import Registry, Counter, InstrumentedLock
+
+
+def test_counter():
+
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ["endpoint"])
+
+    requests.labels("files/upload").inc()
+    requests.labels("files/upload").inc(2)
+    requests.labels("files/download").inc()
+
+    assert requests.labels("files/upload").value == 3
+
+    with pytest.raises(ValueError):
+        requests.labels("files/upload").inc(-1)
+
+    with pytest.raises(ValueError):
+        requests.labels("files/upload", "extra")
+
+    with pytest.raises(ValueError):
+        requests.inc()
+
+    assert registry.expose() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{endpoint="files/upload"} 3.0\n'
+        'requests_total{endpoint="files/download"} 1.0\n'
+    )
+
+
+def test_gauge():
+
+    registry = Registry()
+    gauge = registry.gauge("queue_size", "Queue size.")
+
+    gauge.inc(5)
+    gauge.dec(2)
+    assert gauge.value == 3
+
+    gauge.set_function(lambda: 10)
+    assert gauge.value == 10
+    assert "queue_size 10.0\n" in registry.expose()
+
+
+def test_histogram():
+
+    registry = Registry()
+    histogram = registry.histogram("duration_seconds", "Duration.", buckets=(0.1, 1))
+
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(5)
+
+    with histogram.time():
+        pass
+
+    lines = registry.expose().splitlines()
+
+    assert 'duration_seconds_bucket{le="0.1"} 3.0' in lines
+    assert 'duration_seconds_bucket{le="1.0"} 3.0' in lines
+    assert 'duration_seconds_bucket{le="+Inf"} 4.0' in lines
+    assert "duration_seconds_count 4.0" in lines
+
+    with pytest.raises(ValueError):
+        registry.histogram("unsorted_seconds", "Unsorted.", buckets=(1, 0.1))
+
+
+def test_registry():
+
+    registry = Registry()
+    counter = registry.counter("events_total", "Events.", ["kind"])
+
+    # existing metrics are returned
+    assert registry.counter("events_total", "Events.", ["kind"]) is counter
+    assert registry.get("events_total") is counter
+    assert len(registry) == 1
+
+    with pytest.raises(ValueError):
+        registry.gauge("events_total", "Events.", ["kind"])
+
+    with pytest.raises(ValueError):
+        registry.register(Counter("events_total", "Events."))
+
+    # label values are escaped
+    counter.labels('a "quoted"\\path\n').inc()
+
+    assert 'events_total{kind="a \\"quoted\\"\\\\path\\n"} 1.0' in registry.expose()
+
+
+def test_instrumented_lock():
+
+    registry = Registry()
+    wait_time = registry.histogram("wait_seconds", "Wait.").labels()
+    lock = InstrumentedLock(threading.RLock(), wait_time)
+
+    with lock:
+        # reentrant acquisition is recorded
+        with lock:
+            pass
+
+    assert wait_time.count == 2
+
+    # non-blocking attempts are not recorded
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+    assert wait_time.count == 2
+
+    # time spent waiting for another thread is recorded
+    acquired = threading.Event()
+
+    def hold_lock():
+        with lock:
+            acquired.set()
+            time.sleep(0.1)
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    acquired.wait()
+
+    with lock:
+        pass
+
+    thread.join()
+
+    assert wait_time.count == 4
+    assert wait_time.sum >= 0.05
+
+
+def test_client_metrics(monkeypatch):
+
+    responses = [exceptions.RateLimitError("request-id", backoff=0), "result"]
+
+    def request_json_string(self, host, func_name, *args, **kwargs):
+        res = responses.pop(0)
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    monkeypatch.setattr(_DropboxTransport, "request_json_string", request_json_string)
+
+    client = DropboxClient("test-config")
+    client._init_sdk_with_token(access_token="token")
+
+    assert isinstance(client.dbx, DropboxBase)
+
+    res = client.dbx.request_json_string_with_retry(
+        "content", "files/upload", "upload", b"{}", "user", b"data"
+    )
+
+    assert res == "result"
+
+    text = client.metrics.expose()
+
+    assert 'maestral_api_requests_total{endpoint="files/upload"} 2.0' in text
+    assert 'maestral_api_retries_total{endpoint="files/upload"} 1.0' in text
+    assert 'maestral_api_errors_total{endpoint="files/upload"} 1.0' in text
+    assert 'maestral_backoffs_total{reason="rate_limit"} 1.0' in text
+    assert "maestral_uploaded_bytes_total 8.0" in text
+    assert (
+        'maestral_api_request_duration_seconds_count{endpoint="files/upload"} 2.0'
+        in text
+    )
+
+
+def test_sync_metrics(m):
+
+    text = m.get_metrics()
+
+    assert 'maestral_sync_queue_size{direction="up"} 0.0' in text
+    assert 'maestral_sync_queue_size{direction="down"} 0.0' in text
+    assert "maestral_sync_errors 0.0" in text
+    assert "maestral_local_events_pending 0.0" in text
+    assert 'maestral_lock_wait_seconds_count{lock="sync_lock"}' in text
+    assert "maestral_db_access_duration_seconds_count" in text
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from maestral.sync import SyncEngine
+from maestral.database import Session
+from maestral.client import DropboxClient
+from maestral.config import MaestralState, remove_configuration
+
+
+@pytest.fixture
+def sync():
+    sync = SyncEngine(DropboxClient("test-config"))
+    sync.dropbox_path = "/"
+
+    yield sync
+
+    remove_configuration("test-config")
+
+
+def test_set_operations(sync):
+
+    errors = sync.upload_errors
+
+    errors.add("/folder/file.txt")
+    errors.add("/folder/file.txt")
+    errors.update(["/a", "/b", "/c"])
+
+    assert len(errors) == 4
+    assert "/a" in errors
+    assert "/folder" not in errors
+    assert "/a" not in sync.download_errors
+
+    errors.discard("/a")
+    errors.discard("/does-not-exist")
+    errors.difference_update(["/b"])
+
+    assert set(errors) == {"/c", "/folder/file.txt"}
+
+    errors.clear()
+
+    assert len(errors) == 0
+
+
+def test_has_equal_or_child(sync):
+
+    sync.upload_errors.update(["/folder/sub/file.txt", "/other"])
+
+    assert sync.upload_errors.has_equal_or_child("/")
+    assert sync.upload_errors.has_equal_or_child("/folder")
+    assert sync.upload_errors.has_equal_or_child("/folder/sub/")
+    assert sync.upload_errors.has_equal_or_child("/other")
+    assert not sync.upload_errors.has_equal_or_child("/folder/sub/file")
+    assert not sync.upload_errors.has_equal_or_child("/fold")
+    assert not sync.upload_errors.has_equal_or_child("/folder-2")
+    assert not sync.upload_errors.has_equal_or_child("/other/child")
+
+
+def test_session_reset(sync):
+
+    sync.pending_uploads.add("/a")
+
+    # replace the session as done by SyncEngine._free_memory
+    with sync._database_access():
+        sync._db_session.close()
+        sync._db_session = Session()
+
+    sync.pending_uploads.add("/b")
+
+    assert sync.pending_uploads._session is sync._db_session
+    assert set(sync.pending_uploads) == {"/a", "/b"}
+
+
+def test_clear_index_keeps_sets(sync):
+
+    sync.pending_uploads.add("/a")
+    sync.download_errors.add("/b")
+
+    sync.clear_index()
+    sync.clear_sync_history()
+
+    assert set(sync.pending_uploads) == {"/a"}
+    assert set(sync.download_errors) == {"/b"}
+
+
+def test_migrate_from_state():
+
+    state = MaestralState("test-config")
+    state.set("sync", "download_errors", ["/a", "/b"])
+
+    try:
+        sync = SyncEngine(DropboxClient("test-config"))
+
+        assert set(sync.download_errors) == {"/a", "/b"}
+        assert state.get("sync", "download_errors") == []
+    finally:
+        remove_configuration("test-config")
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import os
+import os.path as osp
+from queue import Queue
+
+import pytest
+from watchdog.events import (
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+)
+from watchdog.observers.api import ObservedWatch
+
+from maestral.fsevents.polling import IncrementalPollingEmitter
+
+
+def set_old_mtimes(root):
+    # Directories which changed within the mtime resolution are listed again on every
+    # poll. Move mtimes into the past to check which directories are listed.
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (0, 0))
+
+
+@pytest.fixture
+def emitter(tmp_path):
+
+    root = str(tmp_path)
+    os.makedirs(osp.join(root, "a", "b"))
+    os.mkdir(osp.join(root, "c"))
+    with open(osp.join(root, "a", "b", "file.txt"), "w") as f:
+        f.write("content")
+
+    set_old_mtimes(root)
+
+    emitter = IncrementalPollingEmitter(
+        Queue(), ObservedWatch(root, recursive=True), timeout=0
+    )
+    emitter.on_thread_start()
+    emitter.events = []
+    emitter.queue_event = emitter.events.append
+
+    return root, emitter
+
+
+def poll(emitter):
+    emitter.events.clear()
+    emitter.queue_events(0)
+    return list(emitter.events)
+
+
+def test_no_changes(emitter):
+
+    root, emitter = emitter
+
+    assert poll(emitter) == []
+    assert emitter.stats["dirs"] == 4
+    assert emitter.stats["dirs_listed"] == 0
+
+
+def test_lists_changed_dirs_only(emitter):
+
+    root, emitter = emitter
+
+    path = osp.join(root, "a", "b", "new.txt")
+    open(path, "w").close()
+
+    assert poll(emitter) == [
+        FileCreatedEvent(path),
+        DirModifiedEvent(osp.join(root, "a", "b")),
+    ]
+    assert emitter.stats["dirs_listed"] == 1
+
+
+def test_created_and_deleted_trees(emitter):
+
+    root, emitter = emitter
+
+    os.makedirs(osp.join(root, "c", "d", "e"))
+    open(osp.join(root, "c", "d", "file.txt"), "w").close()
+    os.remove(osp.join(root, "a", "b", "file.txt"))
+    os.rmdir(osp.join(root, "a", "b"))
+
+    events = poll(emitter)
+
+    assert events[0] == FileCreatedEvent(osp.join(root, "c", "d", "file.txt"))
+    assert set(events[1:]) == {
+        DirDeletedEvent(osp.join(root, "a", "b")),
+        DirModifiedEvent(osp.join(root, "a")),
+        DirModifiedEvent(osp.join(root, "c")),
+        DirCreatedEvent(osp.join(root, "c", "d")),
+        DirCreatedEvent(osp.join(root, "c", "d", "e")),
+    }
+    assert emitter.stats["dirs"] == 5
+
+
+def test_moves(emitter):
+
+    root, emitter = emitter
+
+    os.rename(osp.join(root, "a"), osp.join(root, "c", "a"))
+    os.rename(osp.join(root, "c", "a", "b", "file.txt"), osp.join(root, "new.txt"))
+
+    events = poll(emitter)
+
+    assert (
+        FileMovedEvent(osp.join(root, "a", "b", "file.txt"), osp.join(root, "new.txt"))
+        not in events
+    )
+    assert DirMovedEvent(osp.join(root, "a"), osp.join(root, "c", "a")) in events
+
+    # Changes in the moved folder are detected at its new location.
+    assert FileDeletedEvent(osp.join(root, "c", "a", "b", "file.txt")) in poll(emitter)
+
+    # Moves between listed folders are detected directly.
+    set_old_mtimes(root)
+    poll(emitter)
+    os.rename(osp.join(root, "new.txt"), osp.join(root, "c", "new.txt"))
+
+    assert FileMovedEvent(
+        osp.join(root, "new.txt"), osp.join(root, "c", "new.txt")
+    ) in poll(emitter)
+
+
+def test_full_scan(emitter):
+
+    root, emitter = emitter
+    emitter.full_scan_interval = 2
+
+    path = osp.join(root, "a", "b", "file.txt")
+    with open(path, "a") as f:
+        f.write(" modified")
+    os.utime(osp.join(root, "a", "b"), (0, 0))
+
+    # In-place modifications are only detected by a full scan.
+    assert poll(emitter) == []
+    assert poll(emitter) == [FileModifiedEvent(path)]
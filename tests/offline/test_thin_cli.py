@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import subprocess
+
+from maestral.thin_cli import _parse_args, format_activity, filestatus
+
+
+# Budget for importing the command line entry point. This is well above the typical
+# import time of ~30 ms to allow for slow test machines.
+IMPORT_TIME_BUDGET = 0.15
+
+HEAVY_MODULES = {
+    "click",
+    "Pyro5",
+    "sqlalchemy",
+    "dropbox",
+    "watchdog",
+    "keyring",
+    "maestral.cli",
+    "maestral.daemon",
+    "maestral.main",
+    "maestral.sync",
+}
+
+
+def test_import_time():
+
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import maestral.thin_cli"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    imported = {}
+
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+
+        try:
+            imported[name.strip()] = int(cumulative) / 1e6
+        except ValueError:
+            # header line
+            continue
+
+    assert "maestral.thin_cli" in imported
+
+    heavy = {
+        name
+        for name in imported
+        if name in HEAVY_MODULES or name.split(".")[0] in HEAVY_MODULES
+    }
+
+    assert not heavy
+    assert imported["maestral.thin_cli"] < IMPORT_TIME_BUDGET
+
+
+def test_parse_args():
+
+    assert _parse_args([]) is None
+    assert _parse_args(["status"]) == ("status", [], "maestral")
+    assert _parse_args(["status", "-c", "test"]) == ("status", [], "test")
+    assert _parse_args(["filestatus", "a", "--config-name=test", "b"]) == (
+        "filestatus",
+        ["a", "b"],
+        "test",
+    )
+
+    # other options are handled by the full CLI
+    assert _parse_args(["status", "--help"]) is None
+    assert _parse_args(["status", "-c"]) is None
+
+
+def test_format_activity():
+
+    events = [
+        dict(
+            dbx_path="/folder/file.txt",
+            direction="down",
+            status="syncing",
+            size=2000,
+            completed=1000,
+        ),
+        dict(
+            dbx_path="/folder/long file name.txt",
+            direction="up",
+            status="syncing",
+            size=0,
+            completed=0,
+        ),
+    ]
+
+    lines = format_activity("Syncing...", 0, events)
+
+    assert lines == [
+        "Status: Syncing..., Sync errors: 0",
+        "",
+        "Path".ljust(20) + "Status",
+        "file.txt".ljust(20) + "1.0KB/2.0KB ↓",
+        "long file name.txt".ljust(20) + "uploading",
+    ]
+
+
+def test_filestatus_without_snapshot(tmp_path):
+
+    from maestral.config import MaestralConfig, remove_configuration
+
+    MaestralConfig("test-config")
+
+    try:
+        # without a status snapshot, the full CLI asks the daemon
+        assert not filestatus([str(tmp_path)], "test-config")
+    finally:
+        remove_configuration("test-config")
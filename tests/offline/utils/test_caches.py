@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from maestral.utils.caches import LRUCache, StripedLRUCache
+
+
+def test_lru_eviction():
+
+    cache = LRUCache(capacity=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats == dict(hits=2, misses=1, evictions=1, entries=2, size=0)
+
+
+def test_cached_none():
+
+    missing = object()
+
+    cache = LRUCache(capacity=2)
+    cache.put("a", None)
+
+    assert cache.get("a", missing) is None
+    assert cache.get("b", missing) is missing
+
+
+def test_max_size():
+
+    cache = LRUCache(capacity=10, max_size=10, getsizeof=len)
+    cache.put("a", "123456")
+    cache.put("b", "123456")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "123456"
+    assert cache.stats["size"] == 6
+
+
+def test_ttl():
+
+    cache = LRUCache(capacity=10, ttl=0.1)
+    cache.put("a", 1)
+
+    assert cache.get("a") == 1
+
+    time.sleep(0.2)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_striped():
+
+    cache = StripedLRUCache(capacity=1000, stripes=4)
+
+    for i in range(100):
+        cache.put(i, i)
+
+    assert all(cache.get(i) == i for i in range(100))
+    assert cache.pop(1) == 1
+    assert cache.get(1) is None
+    assert cache.stats["hits"] == 100
+    assert cache.stats["entries"] == 99
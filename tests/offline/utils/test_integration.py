@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import time
+from threading import Thread, Event
+
+from maestral.utils.integration import CPUGovernor, CPU_COUNT
+
+
+def busy_worker(governor, duration, cancel=None):
+
+    t0 = time.monotonic()
+
+    while time.monotonic() - t0 < duration:
+        if not governor.acquire(cancel):
+            return
+        # one small item of work
+        sum(range(10_000))
+
+
+def test_disabled():
+
+    governor = CPUGovernor(100 * CPU_COUNT)
+
+    assert not governor.enabled
+    assert governor.acquire()
+    assert governor._thread is None
+
+
+def test_limits_cpu_usage():
+
+    governor = CPUGovernor(20, interval=0.05, burst=0.1)
+
+    cpu0 = time.process_time()
+    busy_worker(governor, duration=2)
+    cpu_usage = (time.process_time() - cpu0) / 2 * 100
+
+    assert cpu_usage < 40
+
+
+def test_cancel():
+
+    governor = CPUGovernor(1, interval=10, burst=0.01)
+    cancel = Event()
+
+    # use up all tokens
+    governor.acquire()
+    governor._tokens = 0
+
+    thread = Thread(target=busy_worker, args=(governor, 60, cancel))
+    thread.start()
+
+    time.sleep(0.1)
+    cancel.set()
+    governor.interrupt()
+    thread.join(timeout=1)
+
+    assert not thread.is_alive()
+    assert not governor.acquire(cancel)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import pathspec
+import pytest
+
+from maestral.utils.mignore import MignoreMatcher
+
+
+PATHS = [
+    "node_modules/",
+    "a/node_modules/",
+    "a/node_modules/b.js",
+    "build/",
+    "a/build/",
+    "file.pyc",
+    "a/b/file.pyc",
+    "keep.pyc",
+    "foo/bar/",
+    "foo/x/y/bar",
+    "foo/bar.txt",
+    "readme.md",
+]
+
+
+@pytest.mark.parametrize(
+    "lines",
+    [
+        [],
+        ["# comment", ""],
+        ["node_modules/", "*.pyc", "/build", "foo/**/bar"],
+        ["*.pyc", "!keep.pyc"],
+    ],
+)
+def test_matches_pathspec(lines):
+
+    spec = pathspec.PathSpec.from_lines("gitwildmatch", lines)
+    matcher = MignoreMatcher(spec)
+
+    for path in PATHS:
+        assert matcher.match(path) == spec.match_file(path), path
+
+
+def test_combined_regex():
+
+    spec = pathspec.PathSpec.from_lines("gitwildmatch", ["node_modules/", "*.pyc"])
+    assert MignoreMatcher(spec)._regex is not None
+
+    # negations depend on the order of patterns and are not combined
+    spec = pathspec.PathSpec.from_lines("gitwildmatch", ["*.pyc", "!keep.pyc"])
+    assert MignoreMatcher(spec)._regex is None
@@ -6,7 +6,14 @@ import pytest
 from requests.exceptions import RequestException
 
 from maestral.errors import SyncError
-from maestral.utils.serializer import error_to_dict
+from maestral.database import (
+    SyncEvent,
+    SyncDirection,
+    SyncStatus,
+    ItemType,
+    ChangeType,
+)
+from maestral.utils.serializer import error_to_dict, sync_event_to_dict
 
 
 default_keys = ("type", "inherits", "traceback", "title", "message")
@@ -29,3 +36,28 @@ def test_error_to_dict(exc):
 
     # all default keys must be present
     assert all(key in serialized_exc for key in default_keys)
+
+
+def test_sync_event_to_dict():
+    """test that in-flight and history events are serialised with the same keys"""
+
+    event = SyncEvent(
+        direction=SyncDirection.Up,
+        item_type=ItemType.File,
+        sync_time=1.0,
+        dbx_path="/test.txt",
+        local_path="/dropbox/test.txt",
+        change_type=ChangeType.Added,
+        status=SyncStatus.Done,
+        size=10,
+    )
+    history_entry = event.to_history_entry()
+
+    serialized_event = sync_event_to_dict(event)
+    serialized_entry = sync_event_to_dict(history_entry)
+
+    assert set(serialized_entry) - set(serialized_event) == {"id"}
+    assert all(
+        serialized_entry[key] == value for key, value in serialized_event.items()
+    )
+    assert all(type(val).__name__ in builtin_types for val in serialized_event.values())
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from maestral.utils.trie import PathTrie
+
+
+@pytest.fixture
+def trie():
+    trie = PathTrie()
+    trie["/a"] = 1
+    trie["/a/b/c"] = 2
+    trie["/d"] = 3
+    return trie
+
+
+def test_mapping(trie):
+
+    assert len(trie) == 3
+    assert trie["/a/b/c"] == 2
+    assert "/a/b" not in trie
+    assert trie.get("/a/b") is None
+    assert set(trie) == {"/a", "/a/b/c", "/d"}
+    assert dict(trie.items("/a")) == {"/a": 1, "/a/b/c": 2}
+
+    with pytest.raises(KeyError):
+        trie["/a/b"]
+
+
+def test_parents(trie):
+
+    assert list(trie.parents("/a/b/c/d")) == [("/a", 1), ("/a/b/c", 2)]
+    assert trie.has_equal_or_parent("/a/b")
+    assert trie.has_equal_or_parent("/d")
+    assert not trie.has_equal_or_parent("/e/a")
+
+
+def test_children(trie):
+
+    assert trie.has_equal_or_child("/a/b")
+    assert trie.has_equal_or_child("/")
+    assert not trie.has_equal_or_child("/a/b/c/d")
+
+
+def test_pop(trie):
+
+    assert trie.pop("/a/b/c") == 2
+    assert trie.pop("/a/b/c", None) is None
+    assert len(trie) == 2
+
+    # empty branches are pruned
+    assert not trie.has_equal_or_child("/a/b")
+
+    with pytest.raises(KeyError):
+        del trie["/a/b"]
+
+
+def test_pop_tree(trie):
+
+    trie["/ab"] = 4
+
+    assert sorted(trie.pop_tree("/a")) == [("/a", 1), ("/a/b/c", 2)]
+    assert trie.pop_tree("/a") == []
+    assert set(trie) == {"/ab", "/d"}
+    assert len(trie) == 2
+
+    # empty branches are pruned
+    trie["/e/f/g"] = 5
+    assert trie.pop_tree("/e/f") == [("/e/f/g", 5)]
+    assert not trie.has_equal_or_child("/e")
+
+    assert sorted(trie.pop_tree("/")) == [("/ab", 4), ("/d", 3)]
+    assert len(trie) == 0
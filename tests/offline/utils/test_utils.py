@@ -2,7 +2,7 @@
 
 import pytest
 
-from maestral.utils import get_newer_version
+from maestral.utils import get_newer_version, timed
 
 
 releases = (
@@ -25,3 +25,20 @@ releases = (
 )
 def test_has_newer_version(current_version, newer_version):
     assert get_newer_version(current_version, releases) == newer_version
+
+
+def test_timed():
+
+    timings = {}
+
+    with timed(timings, "phase"):
+        pass
+
+    assert timings["phase"] >= 0
+
+    # durations are recorded even if the block raises
+    with pytest.raises(RuntimeError):
+        with timed(timings, "failed"):
+            raise RuntimeError()
+
+    assert "failed" in timings